@@ -0,0 +1,96 @@
+"""
+Compare the csv reader options (see services.flat_file.csv_reader) on the
+file shapes we profile: the mixed test file repeated, a wide numeric file
+and a file of long text values. Times the read alone and the full profile.
+
+    python benchmarks/bench_csv_reader.py [--records N] [--repeat N]
+"""
+import os
+import sys
+import timeit
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parents[1] / 'src'))
+
+import numpy as np
+import pandas as pd
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.csv_reader import CsvEngine, CsvReaderOptions, read_csv
+
+TEST_FILE_PATH = Path(__file__).parents[1] / 'test' / 'test_files' / 'test_file_rwrwr.csv'
+WIDE_COLUMNS = 40
+TEXT_WORDS = 60 # Words per long text value
+
+READER_OPTIONS = [
+    ('C', None),
+    ('C, two phase', CsvReaderOptions(two_phase=True)),
+    ('C, arrow strings', CsvReaderOptions(arrow_strings=True)),
+    ('PYARROW', CsvReaderOptions(engine=CsvEngine.PYARROW)),
+    ('PYARROW, arrow strings', CsvReaderOptions(engine=CsvEngine.PYARROW, arrow_strings=True)),
+]
+
+
+def write_mixed_file(file_path, records):
+    with open(TEST_FILE_PATH) as test_file:
+        lines = test_file.read().splitlines()
+    with open(file_path, 'w') as mixed_file:
+        mixed_file.write(lines[0] + '\n')
+        for _ in range(records // (len(lines) - 1) + 1):
+            mixed_file.write('\n'.join(lines[1:]) + '\n')
+
+
+def write_wide_file(file_path, records):
+    rng = np.random.default_rng(0)
+    columns = {}
+    for i in range(WIDE_COLUMNS):
+        if i % 2 == 0:
+            columns['int_{0}'.format(i)] = rng.integers(0, 1000000, records)
+        else:
+            columns['float_{0}'.format(i)] = rng.normal(0, 1000, records).round(4)
+    pd.DataFrame(columns).to_csv(file_path, index=False)
+
+
+def write_text_file(file_path, records):
+    rng = np.random.default_rng(0)
+    words = np.array(open(TEST_FILE_PATH).read().split())
+    comments = [' '.join(rng.choice(words, TEXT_WORDS)) for _ in range(1000)]
+    pd.DataFrame({
+        'id': np.arange(records),
+        'comment': rng.choice(comments, records),
+        'note': rng.choice(comments, records)
+    }).to_csv(file_path, index=False)
+
+
+def run(records, repeat):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        files = []
+        for shape, write_file in [('mixed', write_mixed_file), ('wide', write_wide_file), ('text', write_text_file)]:
+            file_path = os.path.join(tmp_dir, '{0}.csv'.format(shape))
+            write_file(file_path, records)
+            files.append((shape, file_path))
+
+        print('{0:<8} {1:<24} {2:>10} {3:>8} {4:>12}'.format('file', 'reader', 'read ms', 'speedup', 'profile ms'))
+        for shape, file_path in files:
+            baseline = None
+            for reader_name, options in READER_OPTIONS:
+                read_seconds = min(timeit.repeat(lambda: read_csv(file_path, options), number=1, repeat=repeat))
+                profile_seconds = min(timeit.repeat(lambda: FlatFile(file_path, csv_reader=options), number=1, repeat=repeat))
+                baseline = read_seconds if baseline is None else baseline
+                print('{0:<8} {1:<24} {2:>10.1f} {3:>7.1f}x {4:>12.1f}'.format(
+                    shape, reader_name, read_seconds * 1000, baseline / read_seconds, profile_seconds * 1000
+                ))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.records, args.repeat)
@@ -0,0 +1,91 @@
+"""
+Compare the legacy EnhancedJSONEncoder (deep copy of every value, fields and
+properties looked up per object) with the current encoder and dumps.
+
+    python benchmarks/bench_json_encoder.py [--invalid-records N] [--records N]
+"""
+import re
+import sys
+import copy
+import json
+import timeit
+import argparse
+import dataclasses
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parents[1] / 'src'))
+
+import numpy as np
+
+from common.utils.json_encoder import EnhancedJSONEncoder, dumps
+from services.flat_file.flat_file import FlatFile
+
+TEST_FILE_PATH = Path(__file__).parents[1] / 'test' / 'test_files' / 'test_file_rwrwr.csv'
+
+
+class LegacyEnhancedJSONEncoder(json.JSONEncoder):
+    """EnhancedJSONEncoder before the serialization plans"""
+    is_special = re.compile(r'^__[^\d\W]\w*__\Z', re.UNICODE)
+
+    def default(self, obj):
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return float(obj)
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if dataclasses.is_dataclass(obj):
+            return self._asdict_inner(obj)
+        return super(LegacyEnhancedJSONEncoder, self).default(obj)
+
+    def _asdict_inner(self, obj):
+        if dataclasses.is_dataclass(obj):
+            result = []
+            for f in dataclasses.fields(obj):
+                result.append((f.name, self._asdict_inner(getattr(obj, f.name))))
+            for name, attr in vars(type(obj)).items():
+                if not self.is_special.match(name) and isinstance(attr, property):
+                    result.append((name, attr.__get__(obj)))
+            return dict(result)
+        elif isinstance(obj, (list, tuple)):
+            return type(obj)(self._asdict_inner(v) for v in obj)
+        elif isinstance(obj, dict):
+            return type(obj)((self._asdict_inner(k), self._asdict_inner(v)) for k, v in obj.items())
+        return copy.deepcopy(obj)
+
+
+def get_payloads(invalid_records, records):
+    ff = FlatFile(str(TEST_FILE_PATH))
+    descriptor = ff.get_file_descriptor()
+    # Stand in for a column with many rows failing to parse
+    descriptor.columns[0].original_type.invalid_record_index = list(range(invalid_records))
+    record_list = (ff.get_records() * (records // descriptor.total_records + 1))[:records]
+    return {'descriptor': descriptor, 'records': record_list}
+
+
+def run(invalid_records, records, repeat):
+    payloads = get_payloads(invalid_records, records)
+    encoders = [
+        ('legacy, indent=2', lambda obj: json.dumps(obj, cls=LegacyEnhancedJSONEncoder, indent=2)),
+        ('EnhancedJSONEncoder, indent=2', lambda obj: json.dumps(obj, cls=EnhancedJSONEncoder, indent=2)),
+        ('EnhancedJSONEncoder, compact', lambda obj: json.dumps(obj, cls=EnhancedJSONEncoder, separators=(',', ':'))),
+        ('dumps, compact', dumps),
+    ]
+    print('{0:<12} {1:<32} {2:>10} {3:>8}'.format('payload', 'encoder', 'ms', 'speedup'))
+    for payload_name, payload in payloads.items():
+        baseline = None
+        for encoder_name, encoder in encoders:
+            seconds = min(timeit.repeat(lambda: encoder(payload), number=1, repeat=repeat))
+            baseline = seconds if baseline is None else baseline
+            print('{0:<12} {1:<32} {2:>10.2f} {3:>7.1f}x'.format(
+                payload_name, encoder_name, seconds * 1000, baseline / seconds
+            ))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--invalid-records', type=int, default=100000)
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.invalid_records, args.records, args.repeat)
@@ -0,0 +1,210 @@
+"""
+Time and memory profile the profiling pipeline on synthetic files of several sizes.
+
+    python benchmarks/bench_profiling.py [--sizes 10000,100000] [--cases flat_file,ddl]
+        [--repeat N] [--data-dir DIR] [--baseline FILE] [--save-baseline] [--tolerance 0.25]
+
+Each case runs in a fresh process so its peak RSS is its own. Throughput is
+reported as rows (or items, see CASES) and MB per second. Results are
+compared with the stored baseline, the exit code is 1 if any case is
+slower than the baseline by more than the tolerance. Baselines are only
+comparable on the machine they were saved on.
+"""
+import os
+import sys
+import json
+import timeit
+import argparse
+import tempfile
+import resource
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(str(Path(__file__).parents[1] / 'src'))
+sys.path.append(str(Path(__file__).parent))
+
+import pandas as pd
+
+from generate_csv import SHAPES, write_csv
+from common.utils.json_encoder import EnhancedJSONEncoder
+from services.jsondb import JsonDb
+from services.flat_file.flat_file import FlatFile, STREAM_CHUNK_SIZE
+from services.flat_file.batch_profiler import BatchProfiler
+
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+DEFAULT_SIZES = [10000, 100000]
+DEFAULT_TOLERANCE = 0.25
+JSONDB_PAGE_SIZE = 1000 # Records per JsonDb document
+BATCH_PARTITIONS = 8 # Files the batch_profiler case splits a file into
+
+
+def flat_file(file_path):
+    return (lambda: FlatFile(file_path)), None, os.path.getsize(file_path)
+
+
+def flat_file_chunked(file_path):
+    return (lambda: FlatFile(file_path, chunk_size=STREAM_CHUNK_SIZE)), None, os.path.getsize(file_path)
+
+
+def batch_profiler(file_path):
+    with open(file_path) as csv_file:
+        header = csv_file.readline()
+        rows = csv_file.readlines()
+    part_dir = tempfile.mkdtemp()
+    part_size = len(rows) // BATCH_PARTITIONS + 1
+    for i in range(BATCH_PARTITIONS):
+        with open(os.path.join(part_dir, 'part_{0}.csv'.format(i)), 'w') as part_file:
+            part_file.writelines([header] + rows[i * part_size:(i + 1) * part_size])
+    return (lambda: BatchProfiler.from_directory(part_dir)), None, os.path.getsize(file_path)
+
+
+def string_datetime_type(file_path):
+    df = pd.read_csv(file_path)
+    columns = [df[col_name].dropna().drop_duplicates() for col_name in df.columns if col_name.startswith('date_')]
+
+    def run():
+        for col_values in columns:
+            FlatFile._string_datetime_type(col_values)
+    return run, None, int(sum(col_values.str.len().sum() for col_values in columns))
+
+
+def precision_and_scale(file_path):
+    col_values = pd.read_csv(file_path, usecols=['decimal'])['decimal'].dropna()
+    return (lambda: FlatFile._get_precision_and_scale(col_values)), len(col_values.index), col_values.nbytes
+
+
+def ddl(file_path):
+    descriptor = FlatFile(file_path).get_file_descriptor()
+    ddl_text = FlatFile._get_ddl(descriptor)
+    return (lambda: FlatFile._get_ddl(descriptor)), len(descriptor.columns), len(ddl_text)
+
+
+def json_encoder(file_path):
+    ff = FlatFile(file_path)
+    payload = {'descriptor': ff.get_file_descriptor(), 'records': ff.get_records()}
+    size = len(json.dumps(payload, cls=EnhancedJSONEncoder, indent=2))
+    return (lambda: json.dumps(payload, cls=EnhancedJSONEncoder, indent=2)), None, size
+
+
+def jsondb(file_path):
+    records = FlatFile(file_path).get_records()
+    pages = [records[start:start + JSONDB_PAGE_SIZE] for start in range(0, len(records), JSONDB_PAGE_SIZE)]
+    tmp_dir = tempfile.mkdtemp()
+
+    def run():
+        db = JsonDb(file_path=os.path.join(tmp_dir, '{0}.sqlite'.format(os.getpid())))
+        for i, page in enumerate(pages):
+            db.set_by_key(str(i), page)
+        for i in range(len(pages)):
+            db.get_by_key(str(i))
+        db.close()
+    run()
+    return run, None, os.path.getsize(os.path.join(tmp_dir, '{0}.sqlite'.format(os.getpid())))
+
+
+# Case name : (setup, shapes). setup(file_path) returns the function timed, the
+# items it handles (None for the rows of the file) and the bytes it handles
+CASES = {
+    'flat_file': (flat_file, list(SHAPES)),
+    'flat_file_chunked': (flat_file_chunked, ['tall', 'wide']),
+    'batch_profiler': (batch_profiler, ['tall']),
+    'string_datetime_type': (string_datetime_type, ['dirty_dates']),
+    'precision_and_scale': (precision_and_scale, ['mixed_numeric']),
+    'ddl': (ddl, ['wide']),
+    'json_encoder': (json_encoder, ['tall']),
+    'jsondb': (jsondb, ['tall'])
+}
+
+
+def get_peak_rss_mb():
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024
+
+
+def run_case(case_name, file_path, rows, repeat):
+    setup, _ = CASES[case_name]
+    fn, items, size = setup(file_path)
+    seconds = min(timeit.repeat(fn, number=1, repeat=repeat))
+    return {
+        'seconds': seconds,
+        'items': rows if items is None else items,
+        'bytes': size,
+        'peak_rss_mb': get_peak_rss_mb()
+    }
+
+
+def get_file(data_dir, shape, rows):
+    file_path = os.path.join(data_dir, '{0}_{1}.csv'.format(shape, rows))
+    if not os.path.isfile(file_path):
+        write_csv(shape, rows, file_path)
+    return file_path
+
+
+def run(case_names, sizes, repeat, data_dir, baseline_path, save_baseline, tolerance):
+    baseline = {}
+    if not save_baseline and os.path.isfile(baseline_path):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    results = {}
+    regressions = []
+    print('{0:<22} {1:<17} {2:>8} {3:>10} {4:>12} {5:>8} {6:>9} {7:>8}'.format(
+        'case', 'shape', 'rows', 'ms', 'items/s', 'MB/s', 'peak MB', 'vs base'
+    ))
+    spawn_context = multiprocessing.get_context('spawn')
+    for case_name in case_names:
+        for shape in CASES[case_name][1]:
+            for rows in sizes:
+                # Peak RSS carries over to child processes, so nothing large runs in this one
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn_context) as executor:
+                    file_path = executor.submit(get_file, data_dir, shape, rows).result()
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn_context) as executor:
+                    result = executor.submit(run_case, case_name, file_path, rows, repeat).result()
+
+                key = '{0}/{1}/{2}'.format(case_name, shape, rows)
+                results[key] = result
+                ratio = None
+                if key in baseline:
+                    ratio = result['seconds'] / baseline[key]['seconds']
+                    if ratio > 1 + tolerance:
+                        regressions.append(key)
+                print('{0:<22} {1:<17} {2:>8} {3:>10.1f} {4:>12,.0f} {5:>8.1f} {6:>9.1f} {7:>8}'.format(
+                    case_name, shape, rows,
+                    result['seconds'] * 1000,
+                    result['items'] / result['seconds'],
+                    result['bytes'] / (1024 * 1024) / result['seconds'],
+                    result['peak_rss_mb'],
+                    '-' if ratio is None else '{0:.2f}x'.format(ratio)
+                ))
+
+    if save_baseline:
+        with open(baseline_path, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        print('Saved baseline to {0}'.format(baseline_path))
+    if len(regressions) > 0:
+        print('Slower than the baseline by more than {0:.0%}: {1}'.format(tolerance, ', '.join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)))
+    parser.add_argument('--cases', default=','.join(CASES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--data-dir', default=None, help='Generated files are kept here and reused')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    case_names = args.cases.split(',')
+    for case_name in case_names:
+        if case_name not in CASES:
+            parser.error('Unknown case {0}, expected one of {1}'.format(case_name, ', '.join(CASES)))
+    sizes = [int(size) for size in args.sizes.split(',')]
+    data_dir = tempfile.mkdtemp() if args.data_dir is None else args.data_dir
+    os.makedirs(data_dir, exist_ok=True)
+    sys.exit(run(case_names, sizes, args.repeat, data_dir, args.baseline, args.save_baseline, args.tolerance))
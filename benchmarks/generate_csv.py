@@ -0,0 +1,150 @@
+"""
+Write synthetic csv files in the shapes the profiler has to handle.
+
+    python benchmarks/generate_csv.py SHAPE ROWS FILE_PATH [--seed N]
+
+Shapes:
+    tall              few columns, many rows of typical values
+    wide              WIDE_COLUMNS integer, numeric and text columns
+    high_cardinality  nearly every value distinct (ids, emails, free text)
+    dirty_dates       dates in several formats with blanks and junk values
+    mixed_numeric     integers, decimals, exponents and the odd text value
+    boolean_like      the spellings of booleans pandas and the profiler detect
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BLOCK_ROWS = 100000 # Rows generated and written at a time
+WIDE_COLUMNS = 200
+WORDS = np.array([
+    'alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel', 'india', 'juliet',
+    'kilo', 'lima', 'mike', 'november', 'oscar', 'papa', 'quebec', 'romeo', 'sierra', 'tango'
+])
+DATE_FORMATS = ['%Y-%m-%d', '%Y/%m/%d', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S', '%b %d %Y']
+JUNK_VALUES = np.array(['N/A', 'unknown', 'yesterday', '0000-00-00', '12/31'])
+BOOLEAN_SPELLINGS = {
+    'upper': ('TRUE', 'FALSE'),
+    'title': ('True', 'False'),
+    'letter': ('t', 'f'),
+    'yes_no': ('yes', 'no'),
+    'digit': ('1', '0')
+}
+
+
+def _with_nulls(rng, values, share):
+    values = np.asarray(values, dtype=object)
+    values[rng.random(len(values)) < share] = None
+    return values
+
+
+def _dates(rng, rows, start='2000-01-01', days=9000):
+    return pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days * 86400, rows), unit='s')
+
+
+def _text(rng, rows, words=6):
+    return pd.Series(rng.choice(WORDS, (rows, words)).tolist()).str.join(' ').to_numpy()
+
+
+def tall(rng, start, rows):
+    return pd.DataFrame({
+        'id': np.arange(start, start + rows),
+        'created_at': _dates(rng, rows).strftime('%Y-%m-%d %H:%M:%S'),
+        'category': rng.choice(WORDS[:8], rows),
+        'amount': rng.normal(100, 40, rows).round(2),
+        'quantity': rng.integers(1, 20, rows),
+        'is_active': rng.choice(['TRUE', 'FALSE'], rows)
+    })
+
+
+def wide(rng, start, rows):
+    columns = {'id': np.arange(start, start + rows)}
+    for i in range(1, WIDE_COLUMNS):
+        kind = i % 3
+        if kind == 0:
+            columns['int_{0}'.format(i)] = rng.integers(0, 100000, rows)
+        elif kind == 1:
+            columns['num_{0}'.format(i)] = rng.normal(0, 1000, rows).round(3)
+        else:
+            columns['text_{0}'.format(i)] = rng.choice(WORDS, rows)
+    return pd.DataFrame(columns)
+
+
+def high_cardinality(rng, start, rows):
+    ids = np.arange(start, start + rows)
+    return pd.DataFrame({
+        'id': ids,
+        'token': ['{0:016x}'.format(v) for v in rng.integers(0, 2 ** 62, rows)],
+        'email': ['user{0}@example{1}.com'.format(i, i % 97) for i in ids],
+        'comment': _text(rng, rows, words=10),
+        'measure': rng.random(rows)
+    })
+
+
+def dirty_dates(rng, start, rows):
+    columns = {'id': np.arange(start, start + rows)}
+    for i, strftime_format in enumerate(DATE_FORMATS):
+        values = _dates(rng, rows).strftime(strftime_format).to_numpy(dtype=object)
+        # Some rows in another format, some junk and some blank
+        other = rng.random(rows) < 0.05
+        values[other] = _dates(rng, int(other.sum())).strftime(DATE_FORMATS[(i + 1) % len(DATE_FORMATS)])
+        junk = rng.random(rows) < 0.01
+        values[junk] = rng.choice(JUNK_VALUES, int(junk.sum()))
+        columns['date_{0}'.format(i)] = _with_nulls(rng, values, 0.05)
+    return pd.DataFrame(columns)
+
+
+def mixed_numeric(rng, start, rows):
+    scales = 10.0 ** rng.integers(0, 6, rows)
+    decimals = np.round(rng.normal(0, 10000, rows) * scales) / scales
+    exponents = ['{0:.3e}'.format(v) for v in rng.normal(0, 1, rows) * 10.0 ** rng.integers(-8, 9, rows)]
+    mostly_integer = rng.integers(-1000000, 1000000, rows).astype(object)
+    mostly_integer[rng.random(rows) < 0.01] = 'n/a value'
+    return pd.DataFrame({
+        'id': np.arange(start, start + rows),
+        'integer': _with_nulls(rng, rng.integers(-2 ** 40, 2 ** 40, rows), 0.02),
+        'decimal': _with_nulls(rng, decimals, 0.02),
+        'exponent': exponents,
+        'mostly_integer': mostly_integer
+    })
+
+
+def boolean_like(rng, start, rows):
+    columns = {'id': np.arange(start, start + rows)}
+    for name, (true_value, false_value) in BOOLEAN_SPELLINGS.items():
+        columns['bool_{0}'.format(name)] = np.where(rng.random(rows) < 0.5, true_value, false_value)
+    columns['bool_with_nulls'] = _with_nulls(rng, rng.choice(['TRUE', 'FALSE'], rows), 0.1)
+    return pd.DataFrame(columns)
+
+
+SHAPES = {
+    'tall': tall,
+    'wide': wide,
+    'high_cardinality': high_cardinality,
+    'dirty_dates': dirty_dates,
+    'mixed_numeric': mixed_numeric,
+    'boolean_like': boolean_like
+}
+
+
+def write_csv(shape, rows, file_path, seed=0):
+    """Write rows of a shape to file_path in blocks, the same seed writes the same file"""
+    if shape not in SHAPES:
+        raise ValueError('Unknown shape {0}, expected one of {1}'.format(shape, ', '.join(SHAPES)))
+    rng = np.random.default_rng(seed)
+    with open(file_path, 'w', newline='') as csv_file:
+        for start in range(0, rows, BLOCK_ROWS):
+            block = SHAPES[shape](rng, start, min(BLOCK_ROWS, rows - start))
+            block.to_csv(csv_file, index=False, header=start == 0)
+    return file_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('shape', choices=list(SHAPES))
+    parser.add_argument('rows', type=int)
+    parser.add_argument('file_path')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_csv(args.shape, args.rows, args.file_path, seed=args.seed)
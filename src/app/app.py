@@ -1,27 +1,65 @@
 import sys
+import logging
+import tracemalloc
 from pathlib import Path
 path_dir = Path(__file__).parents[1]
 sys.path.append(str(path_dir))
 
-from flask import Flask
+from flask import Flask, make_response
 from flask_restful import Api
+from flask_restful.representations.json import output_json as restful_output_json
 from flask_cors import CORS
 
 from resources.FlatFile import FlatFileResource
 from resources.FlatFileData import FlatFileDataResource
 from resources.FlatFileUpload import FlatFileUploadResource
+from resources.FlatFileJob import FlatFileJobResource
+from resources.FlatFileInvalidRecords import FlatFileInvalidRecordsResource
+from resources.FlatFileMetrics import FlatFileMetricsResource
+from resources.FlatFileRefresh import FlatFileRefreshResource
+from services.profile_cache import ProfileCache
+from services.profile_jobs import ProfileJobQueue
+from common.utils.json_encoder import dumps
 
 app = Flask(__name__)
 app.config.from_object('config.Config')
+logging.basicConfig(level=app.config['LOG_LEVEL'])
+if app.config['PROFILE_TRACE_ALLOCATIONS']:
+  # Adds peak_allocated to the profile metrics, at a cost to profiling speed
+  tracemalloc.start()
+app.extensions['profile_cache'] = ProfileCache(
+    max_entries=app.config['PROFILE_CACHE_MAX_ENTRIES'],
+    max_entry_size=app.config['PROFILE_CACHE_MAX_ENTRY_SIZE']
+)
+app.extensions['profile_jobs'] = ProfileJobQueue(
+    workers=app.config['UPLOAD_JOB_WORKERS'],
+    max_queued=app.config['UPLOAD_JOB_MAX_QUEUED']
+)
 
 cors = CORS(app, resources={r"/*": {"origins": "*"}})
 api = Api(app)
 
 
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    if not app.config['JSON_COMPACT']:
+        return restful_output_json(data, code, headers=headers)
+    resp = make_response(dumps(data), code)
+    resp.headers.extend(headers or {})
+    return resp
+
+
 # Flat File Resources
 api.add_resource(FlatFileUploadResource, '/flatfile')
 api.add_resource(FlatFileResource, '/flatfile/<string:file_id>')
 api.add_resource(FlatFileDataResource, '/flatfile/<string:file_id>/data')
+api.add_resource(FlatFileJobResource, '/flatfile/jobs/<string:job_id>')
+api.add_resource(
+    FlatFileInvalidRecordsResource,
+    '/flatfile/<string:file_id>/columns/<string:column_name>/invalid_records'
+)
+api.add_resource(FlatFileMetricsResource, '/flatfile/<string:file_id>/metrics')
+api.add_resource(FlatFileRefreshResource, '/flatfile/<string:file_id>/refresh')
 
 
 if __name__ == '__main__':
@@ -7,3 +7,28 @@ class Config(object):
         'indent': 2,
         'cls': EnhancedJSONEncoder
     }
+    # Responses are written compact by common.utils.json_encoder.dumps,
+    # set to False to pretty print them with the RESTFUL_JSON settings
+    JSON_COMPACT = True
+
+    # Profiles of previously uploaded files, keyed by content hash
+    PROFILE_CACHE_MAX_ENTRIES = 128
+    PROFILE_CACHE_MAX_ENTRY_SIZE = 1024 * 1024
+
+    # Records returned per page by /flatfile/<id>/data
+    DATA_PAGE_SIZE = 1000
+    DATA_MAX_PAGE_SIZE = 10000
+
+    # Uploads posted with ?async=true are profiled by a bounded pool of workers
+    UPLOAD_JOB_WORKERS = 2
+    UPLOAD_JOB_MAX_QUEUED = 16
+    # Bytes each async profile may hold, None to read files that fit whole.
+    # Over budget files are read in chunks and column statistics downgrade
+    # to estimates, see services.flat_file.memory_budget
+    PROFILE_MEMORY_BUDGET = None
+
+    # Profile metrics (time and memory of each stage) are logged at INFO
+    LOG_LEVEL = 'INFO'
+    # Trace allocations with tracemalloc so profile metrics include peak_allocated.
+    # Profiling is several times slower while tracing, leave off in production
+    PROFILE_TRACE_ALLOCATIONS = False
@@ -1,7 +1,17 @@
-from flask_restful import Resource
+import numpy as np
+from flask import current_app, Response, stream_with_context
+from flask_restful import Resource, reqparse
 
 from services.jsondb import JsonDb
-from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_reader import FlatFileReader, encode_cursor, decode_cursor
+from services.flat_file.flat_file_descriptor import ColumnDataType
+from services.flat_file.record_index_set import RecordIndexSet
+from services.flat_file.record_filter import FilterOperator, parse_filter
+
+RECORD_FORMATS = {
+  'json': 'application/json',
+  'ndjson': 'application/x-ndjson'
+}
 
 class FlatFileDataResource(Resource):
    
@@ -9,10 +19,136 @@ class FlatFileDataResource(Resource):
     db = JsonDb()
     try:
       file_descriptor = db.get_by_key(file_id)
-      ff = FlatFile(file_descriptor['local_file_path'])
-      return ff.get_records()
     except Exception as e:
         return {
             'error': 'FILE_NOT_FOUND',
             'message': 'File {0} not found'.format(file_id)
         }, 404
+
+    parser = reqparse.RequestParser()
+    parser.add_argument('offset', type=int, location='args')
+    parser.add_argument('limit', type=int, location='args')
+    parser.add_argument('cursor', type=str, location='args')
+    parser.add_argument('format', type=str, location='args', default='json')
+    # Only these records, ie. 5,10-20 (by _record_index). offset and limit page through them
+    parser.add_argument('records', type=str, location='args')
+    # Only these columns, ie. host,srcport. _record_index is always returned
+    parser.add_argument('columns', type=str, location='args')
+    # Rows matching every filter, ie. filter=srcport:gte:1024&filter=owner:notnull, see RecordFilter
+    parser.add_argument('filter', type=str, location='args', action='append')
+    args = parser.parse_args()
+
+    column_types = {
+      c['column_name']: ColumnDataType((c.get('original_type') or {}).get('data_type') or ColumnDataType.UNKNOWN)
+      for c in file_descriptor['columns']
+    }
+    try:
+      offset, limit = self._get_page(args)
+      columns = None
+      if args['columns'] is not None:
+        columns = self._get_columns(args['columns'], column_types)
+      filters = [parse_filter(value, column_types) for value in args['filter'] or []]
+      records = None
+      if args['records'] is not None:
+        records = self._get_records(args['records'], file_descriptor['total_records'])
+    except ValueError as e:
+      return {
+        'error': 'INVALID_PARAMETER',
+        'message': str(e)
+      }, 400
+
+    if args['format'] not in RECORD_FORMATS:
+      return {
+        'error': 'INVALID_PARAMETER',
+        'message': 'format must be one of {0}'.format(', '.join(RECORD_FORMATS.keys()))
+      }, 400
+
+    reader = FlatFileReader.from_descriptor(file_descriptor)
+    records = self._apply_filters(reader, file_descriptor, filters, records)
+
+    # Pagination details are sent as headers so the body can be streamed
+    total_records = file_descriptor['total_records'] if records is None else records.count
+    headers = {
+      'X-Total-Records': str(total_records),
+      'X-Offset': str(offset),
+      'X-Limit': str(limit)
+    }
+    if offset + limit < total_records:
+      headers['X-Next-Cursor'] = encode_cursor(offset + limit)
+
+    if records is not None:
+      # Rows of the page are read from the nearest indexed row, see services.flat_file.row_index
+      page = {'rows': records.page(offset=offset, limit=limit), 'columns': columns}
+    else:
+      page = {'offset': offset, 'limit': limit, 'columns': columns}
+    if args['format'] == 'ndjson':
+      body = reader.iter_ndjson(**page)
+    else:
+      body = reader.iter_json(**page)
+
+    return Response(
+      stream_with_context(body),
+      mimetype=RECORD_FORMATS[args['format']],
+      headers=headers
+    )
+
+  def _get_page(self, args):
+    max_page_size = current_app.config['DATA_MAX_PAGE_SIZE']
+    limit = current_app.config['DATA_PAGE_SIZE'] if args['limit'] is None else args['limit']
+    if limit < 1 or limit > max_page_size:
+      raise ValueError('limit must be between 1 and {0}'.format(max_page_size))
+
+    if args['cursor'] is not None:
+      offset = decode_cursor(args['cursor'])
+    else:
+      offset = 0 if args['offset'] is None else args['offset']
+    if offset < 0:
+      raise ValueError('offset must be 0 or greater')
+    return offset, limit
+
+  def _get_columns(self, value, column_types):
+    columns = list(dict.fromkeys(c.strip() for c in value.split(',')))
+    unknown = [c for c in columns if c not in column_types]
+    if len(unknown) > 0:
+      raise ValueError('columns {0} not found'.format(', '.join(unknown)))
+    return columns
+
+  def _apply_filters(self, reader, file_descriptor, filters, records):
+    """
+    RecordIndexSet of the records matching every filter, None if there are
+    no filters or records. Invalid filters only read the descriptor, the
+    others read the columns they filter on for the rows left
+    """
+    for record_filter in filters:
+      if record_filter.operator != FilterOperator.INVALID:
+        continue
+      column = next(c for c in file_descriptor['columns'] if c['column_name'] == record_filter.column_name)
+      field_details = column.get('{0}_type'.format(record_filter.value)) or {}
+      invalid_record_index = RecordIndexSet.from_serializable(field_details.get('invalid_record_index'))
+      records = invalid_record_index if records is None else records.intersection(invalid_record_index)
+
+    value_filters = [f for f in filters if f.operator != FilterOperator.INVALID]
+    if len(value_filters) > 0:
+      records = reader.find_rows(value_filters, rows=records)
+    return records
+
+  def _get_records(self, value, total_records):
+    """RecordIndexSet of the rows of a list of _record_index values and ranges, past the last row dropped"""
+    starts = []
+    lengths = []
+    for part in value.split(','):
+      first, _, last = part.strip().partition('-')
+      try:
+        first = int(first)
+        last = first if last == '' else int(last)
+      except ValueError:
+        raise ValueError('records must be a list of record indexes and ranges, ie. 5,10-20')
+      if first < 1 or last < first:
+        raise ValueError('records must be 1 or greater and ranges in order, ie. 10-20')
+      starts.append(first - 1)
+      lengths.append(last - first + 1)
+
+    records = RecordIndexSet().update(RecordIndexSet(starts, lengths))
+    ends = np.minimum(records.starts + records.lengths, total_records)
+    kept = ends > records.starts
+    return RecordIndexSet(records.starts[kept], (ends - records.starts)[kept])
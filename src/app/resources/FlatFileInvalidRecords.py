@@ -0,0 +1,57 @@
+from flask import current_app
+from flask_restful import Resource, reqparse
+
+from services.jsondb import JsonDb
+from services.flat_file.record_index_set import RecordIndexSet
+
+FIELD_TYPES = ['potential', 'original']
+
+class FlatFileInvalidRecordsResource(Resource):
+  """Page through the invalid_record_index of a column without returning the whole descriptor"""
+
+  def get(self, file_id, column_name):
+    db = JsonDb()
+    try:
+      file_descriptor = db.get_by_key(file_id)
+    except Exception as e:
+        return {
+            'error': 'FILE_NOT_FOUND',
+            'message': 'File {0} not found'.format(file_id)
+        }, 404
+
+    columns = [c for c in file_descriptor['columns'] if c['column_name'] == column_name]
+    if len(columns) == 0:
+      return {
+        'error': 'COLUMN_NOT_FOUND',
+        'message': 'Column {0} not found in file {1}'.format(column_name, file_id)
+      }, 404
+
+    parser = reqparse.RequestParser()
+    parser.add_argument('type', type=str, location='args', default='potential')
+    parser.add_argument('offset', type=int, location='args', default=0)
+    parser.add_argument('limit', type=int, location='args')
+    args = parser.parse_args()
+
+    max_page_size = current_app.config['DATA_MAX_PAGE_SIZE']
+    limit = current_app.config['DATA_PAGE_SIZE'] if args['limit'] is None else args['limit']
+    if args['type'] not in FIELD_TYPES:
+      return {
+        'error': 'INVALID_PARAMETER',
+        'message': 'type must be one of {0}'.format(', '.join(FIELD_TYPES))
+      }, 400
+    if limit < 1 or limit > max_page_size or args['offset'] < 0:
+      return {
+        'error': 'INVALID_PARAMETER',
+        'message': 'offset must be 0 or greater and limit between 1 and {0}'.format(max_page_size)
+      }, 400
+
+    field_details = columns[0].get('{0}_type'.format(args['type'])) or {}
+    invalid_record_index = RecordIndexSet.from_serializable(field_details.get('invalid_record_index'))
+    return {
+      'column_name': column_name,
+      'type': args['type'],
+      'count': invalid_record_index.count,
+      'offset': args['offset'],
+      'limit': limit,
+      'invalid_record_index': invalid_record_index.page(offset=args['offset'], limit=limit)
+    }
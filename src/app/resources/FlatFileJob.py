@@ -0,0 +1,13 @@
+from flask import current_app
+from flask_restful import Resource
+
+class FlatFileJobResource(Resource):
+
+  def get(self, job_id):
+    job = current_app.extensions['profile_jobs'].get(job_id)
+    if job is None:
+      return {
+        'error': 'JOB_NOT_FOUND',
+        'message': 'Job {0} not found'.format(job_id)
+      }, 404
+    return job
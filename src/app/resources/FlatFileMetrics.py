@@ -0,0 +1,28 @@
+from flask_restful import Resource
+from services.jsondb import JsonDb
+
+class FlatFileMetricsResource(Resource):
+
+  def get(self, file_id):
+    """Time and memory of each profiling stage and column, see services.flat_file.profile_metrics"""
+    db = JsonDb()
+    try:
+      file_descriptor = db.get_by_key(file_id)
+    except AssertionError:
+      return {
+        'error': 'FILE_NOT_FOUND',
+        'message': 'File {0} not found'.format(file_id)
+      }, 404
+
+    metrics = file_descriptor.get('metrics')
+    if metrics is None:
+      # Profiled before metrics were recorded
+      return {
+        'error': 'METRICS_NOT_FOUND',
+        'message': 'File {0} has no profile metrics'.format(file_id)
+      }, 404
+    return {
+      'file_id': file_id,
+      'is_approximate': file_descriptor.get('is_approximate', False),
+      'metrics': metrics
+    }
@@ -0,0 +1,122 @@
+import os
+
+from flask import current_app
+from flask_restful import Resource, reqparse, inputs
+
+from services.jsondb import JsonDb
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_reader import FlatFileReader
+from services.flat_file.columnar_sidecar import has_sidecar, get_sidecar_path
+from services.flat_file.profile_state import read_profile_state, is_appended
+from services.flat_file.profile_metrics import ProfileStage, log_metrics
+from services.flat_file.row_index import build_row_index, read_row_index, write_row_index
+
+class FlatFileRefreshResource(Resource):
+
+  def post(self, file_id):
+    """
+    Profile the rows appended to a stored file since it was last profiled and
+    replace its descriptor with the next version. The first refresh of a file
+    profiles it in full and keeps the statistics later refreshes build on
+    """
+    parser = reqparse.RequestParser()
+    parser.add_argument('async', type=inputs.boolean, location='args', default=False)
+    args = parser.parse_args()
+
+    db = JsonDb()
+    try:
+      file_descriptor = db.get_by_key(file_id)
+    except AssertionError:
+      return {
+        'error': 'FILE_NOT_FOUND',
+        'message': 'File {0} not found'.format(file_id)
+      }, 404
+
+    local_file_path = file_descriptor['local_file_path']
+    if not os.path.isfile(local_file_path):
+      return {
+        'error': 'FILE_NOT_FOUND',
+        'message': 'File {0} is no longer stored'.format(file_id)
+      }, 404
+
+    memory_budget = current_app.config['PROFILE_MEMORY_BUDGET']
+    if not args['async']:
+      return refresh_file(file_id, file_descriptor, memory_budget=memory_budget)
+
+    # Run on the upload job workers so refreshes share their limit on concurrent profiles
+    profile_jobs = current_app.extensions['profile_jobs']
+    job = profile_jobs.submit(
+      lambda job: refresh_file(file_id, file_descriptor, job=job, memory_budget=memory_budget).unique_id,
+      file_name=file_descriptor.get('original_file_name')
+    )
+    if job is None:
+      return {
+        'error': 'QUEUE_FULL',
+        'message': 'Too many files are waiting to be profiled, try again later'
+      }, 503
+    return {
+      'job_id': job.job_id,
+      'status': job.status,
+      'file_id': file_id
+    }, 202
+
+
+def refresh_file(file_id, file_descriptor, job=None, memory_budget=None):
+  """
+  Profile the rows of a stored file appended since file_descriptor, store the next
+  version of its descriptor in the JsonDb and return it.
+  memory_budget: Bytes the profile may hold, see services.flat_file.memory_budget
+  """
+  _set_job_progress(job, 'profiling', 0.1)
+  local_file_path = file_descriptor['local_file_path']
+  appended = file_descriptor.get('profile_state_path') is not None
+  # Checked before the profile replaces the state of the previous version
+  state = read_profile_state(file_descriptor.get('profile_state_path'))
+  previous_size = state.profiled_size if state is not None and is_appended(state, local_file_path) else None
+  descriptor = FlatFile(
+    local_file_path, previous_descriptor=file_descriptor, memory_budget=memory_budget
+  ).get_file_descriptor()
+
+  # The sidecar of the previous version lacks the appended rows. Its record batches
+  # are copied and only the appended rows are parsed, unless a column type changed
+  _set_job_progress(job, 'sidecar', 0.7)
+  with descriptor.metrics.measure(ProfileStage.SIDECAR):
+    reader = FlatFileReader.from_descriptor(descriptor)
+    previous_sidecar_path = file_descriptor.get('sidecar_path')
+    written = None
+    if previous_size is not None and has_sidecar(previous_sidecar_path, file_descriptor.get('sidecar_format_version')):
+      written = reader.append_sidecar(descriptor, previous_sidecar_path, state.total_records, previous_size)
+    if written is None:
+      reader.write_sidecar(descriptor)
+    # Copies of a cached profile share its sidecar, only this file's own is removed
+    if descriptor.sidecar_path is None and previous_sidecar_path == get_sidecar_path(local_file_path) \
+        and os.path.isfile(previous_sidecar_path):
+      os.remove(previous_sidecar_path)
+
+  # Only the appended rows are scanned for the offsets of the row index
+  with descriptor.metrics.measure(ProfileStage.ROW_INDEX):
+    previous_row_index = read_row_index(
+      file_descriptor.get('row_index_path'),
+      file_descriptor.get('row_index_format_version')
+    )
+    write_row_index(descriptor, build_row_index(local_file_path, previous=previous_row_index))
+  descriptor.metrics.finish()
+
+  _set_job_progress(job, 'storing', 0.9)
+  db = JsonDb()
+  db.set_by_key(file_id, descriptor)
+  log_metrics(
+    descriptor.metrics,
+    file_id=file_id,
+    file_name=descriptor.original_file_name,
+    file_size=descriptor.file_size,
+    total_records=descriptor.total_records,
+    version=descriptor.version,
+    appended=appended
+  )
+  return descriptor
+
+
+def _set_job_progress(job, stage, progress):
+  if job is not None:
+    job.set_progress(stage, progress)
@@ -1,9 +1,16 @@
+import os
+
 from flask import current_app
-from flask_restful import Resource, reqparse, request
+from flask_restful import Resource, reqparse, request, inputs
 from werkzeug.utils import secure_filename
 
 from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_reader import FlatFileReader
+from services.flat_file.stream_profiler import StreamProfiler
+from services.flat_file.row_index import RowIndexBuilder, build_row_index, write_row_index
+from services.flat_file.profile_metrics import ProfileMetrics, ProfileStage, log_metrics
 from services.file_services.local_file_service import LocalFileService
+from services.profile_cache import get_file_head_hash
 from services.jsondb import JsonDb
 
 
@@ -16,20 +23,142 @@ class FlatFileUploadResource(Resource):
     return db.get_all()
 
   def post(self):
+    parser = reqparse.RequestParser()
+    parser.add_argument('async', type=inputs.boolean, location='args', default=False)
+    # A preview profile is returned straight away and the exact profile is run as an async job
+    parser.add_argument('preview', type=inputs.boolean, location='args', default=False)
+    args = parser.parse_args()
 
     fs = LocalFileService(LOCAL_FILE_DIRECTORY)
     local_file_path = fs.get_csv_file_path()
     user_file = request.files['file']
     clean_filename = secure_filename(user_file.filename)
-    user_file.save(local_file_path)
+    profile_cache = current_app.extensions['profile_cache']
+    # Rows are found as the upload is written so records can be read from any row
+    row_index_builder = RowIndexBuilder()
 
-    ff = FlatFile(local_file_path, original_file_name=clean_filename)
-    descriptor = ff.get_file_descriptor()
+    if not args['async'] and not args['preview']:
+      # The upload is profiled as it is written so the descriptor is ready with the last byte,
+      # unless its first block matches a cached file and it is likely a repeat upload
+      stream_profiler = StreamProfiler(
+        local_file_path,
+        original_file_name=clean_filename,
+        expected_size=request.content_length,
+        skip=profile_cache.may_contain
+      )
+      content_hash = fs.save_file_stream(
+        user_file.stream, local_file_path, consumers=[stream_profiler, row_index_builder]
+      )
+      profile_file(
+        local_file_path, clean_filename, content_hash, profile_cache, stream_profiler=stream_profiler,
+        row_index_builder=row_index_builder
+      )
+      return {
+        'local_file_path': local_file_path,
+        'clean_filename': clean_filename
+      }
 
-    db = JsonDb()
-    db.set_by_key(descriptor.unique_id, descriptor)
+    content_hash = fs.save_file_stream(user_file.stream, local_file_path, consumers=[row_index_builder])
+
+    preview_descriptor = None
+    unique_id = None
+    if args['preview']:
+      # Stored before the job is queued so the exact profile always replaces it
+      preview_descriptor = FlatFile(local_file_path, original_file_name=clean_filename, preview=True).get_file_descriptor()
+      preview_descriptor.content_hash = content_hash
+      unique_id = preview_descriptor.unique_id
+      db = JsonDb()
+      db.set_by_key(unique_id, preview_descriptor)
+      log_metrics(preview_descriptor.metrics, file_id=unique_id, file_name=clean_filename, preview=True)
 
-    return {
+    # The job runs outside of the request so everything it needs is bound now
+    profile_jobs = current_app.extensions['profile_jobs']
+    memory_budget = current_app.config['PROFILE_MEMORY_BUDGET']
+    job = profile_jobs.submit(
+      lambda job: profile_file(local_file_path, clean_filename, content_hash, profile_cache, job=job, unique_id=unique_id,
+                               memory_budget=memory_budget, row_index_builder=row_index_builder),
+      file_name=clean_filename
+    )
+    if job is None:
+      if unique_id is not None:
+        db.delete_by_key(unique_id)
+      os.remove(local_file_path)
+      return {
+        'error': 'QUEUE_FULL',
+        'message': 'Too many uploads are waiting to be profiled, try again later'
+      }, 503
+
+    result = {
+      'job_id': job.job_id,
+      'status': job.status,
       'local_file_path': local_file_path,
       'clean_filename': clean_filename
     }
+    if preview_descriptor is not None:
+      result['file_id'] = unique_id
+      result['preview'] = preview_descriptor
+    return result, 202
+
+
+def profile_file(local_file_path, clean_filename, content_hash, profile_cache, job=None, stream_profiler=None,
+                 unique_id=None, memory_budget=None, row_index_builder=None):
+  """
+  Profile a saved upload, store its descriptor in the JsonDb and return its unique_id.
+  The descriptor of a stream_profiler that read the upload is used instead of profiling it again,
+  unless it skipped the upload.
+  When unique_id is given the descriptor replaces the one stored under it, ie. a preview.
+  memory_budget: Bytes the profile may hold, see services.flat_file.memory_budget
+  row_index_builder: RowIndexBuilder that read the upload as it was saved, the file is
+  scanned for its row index without one
+  """
+  _set_job_progress(job, 'profiling', 0.1)
+
+  # Identical uploads reuse the cached profile
+  cached_descriptor = profile_cache.get(content_hash)
+  if cached_descriptor is not None:
+    metrics = ProfileMetrics()
+    with metrics.measure(ProfileStage.PROFILE_CACHE):
+      descriptor = FlatFile.copy_file_descriptor(cached_descriptor, local_file_path, original_file_name=clean_filename)
+    descriptor.metrics = metrics.finish()
+  else:
+    if stream_profiler is not None and not stream_profiler.is_skipped:
+      descriptor = stream_profiler.get_file_descriptor()
+    else:
+      descriptor = FlatFile(
+        local_file_path, original_file_name=clean_filename, memory_budget=memory_budget
+      ).get_file_descriptor()
+    descriptor.content_hash = content_hash
+    # Typed columnar copy so reads do not parse the csv again
+    _set_job_progress(job, 'sidecar', 0.7)
+    with descriptor.metrics.measure(ProfileStage.SIDECAR):
+      reader = FlatFileReader.from_descriptor(descriptor)
+      if not reader.has_sidecar():
+        reader.write_sidecar(descriptor)
+    with descriptor.metrics.measure(ProfileStage.ROW_INDEX):
+      if row_index_builder is not None:
+        row_index = row_index_builder.get_row_index(local_file_path)
+      else:
+        row_index = build_row_index(local_file_path)
+      write_row_index(descriptor, row_index)
+    descriptor.metrics.finish()
+    profile_cache.set(content_hash, descriptor, head_hash=get_file_head_hash(local_file_path))
+
+  _set_job_progress(job, 'storing', 0.9)
+  if unique_id is not None:
+    descriptor.unique_id = unique_id
+  db = JsonDb()
+  db.set_by_key(descriptor.unique_id, descriptor)
+  log_metrics(
+    descriptor.metrics,
+    file_id=descriptor.unique_id,
+    file_name=clean_filename,
+    file_size=descriptor.file_size,
+    total_records=descriptor.total_records,
+    cached=cached_descriptor is not None
+  )
+  return descriptor.unique_id
+
+
+def _set_job_progress(job, stage, progress):
+  if job is not None:
+    job.set_progress(stage, progress)
@@ -1,51 +1,85 @@
 import re
-import dataclasses
-import copy
 import json
+import dataclasses
 
 import numpy as np
 
+try:
+    import orjson
+except ImportError: # orjson is optional, dumps falls back to the json module
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_SERIALIZE_NUMPY
+
+COMPACT_SEPARATORS = (',', ':')
+
+# Per dataclass type : names of its fields and of its (non special) properties
+_SERIALIZATION_PLANS = {}
+
+
+def get_serialization_plan(cls):
+    """Field and property names of a dataclass type, worked out once per type"""
+    plan = _SERIALIZATION_PLANS.get(cls)
+    if plan is None:
+        field_names = tuple(f.name for f in dataclasses.fields(cls))
+        property_names = tuple(
+            name for cls_type in reversed(cls.__mro__)
+            for name, attr in vars(cls_type).items()
+            if not EnhancedJSONEncoder.is_special.match(name) and isinstance(attr, property)
+        )
+        # A property overridden in a subclass is listed once, in its first position
+        plan = (field_names, tuple(dict.fromkeys(property_names)))
+        _SERIALIZATION_PLANS[cls] = plan
+    return plan
+
+
+def to_serializable(obj):
+    """
+    Convert a dataclass, with its property values, a numpy value or an object
+    with a __json__ method to types the json module can encode. Values inside
+    the result are not converted, the encoder calls this again for any it can
+    not encode
+    """
+    if hasattr(obj, '__json__'):
+        return obj.__json__()
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        field_names, property_names = get_serialization_plan(type(obj))
+        result = {name: getattr(obj, name) for name in field_names}
+        for name in property_names:
+            result[name] = getattr(obj, name)
+        return result
+    raise TypeError('Object of type {0} is not JSON serializable'.format(type(obj).__name__))
+
+
+def dumps(obj, compact=True):
+    """
+    Serialize obj to a JSON string, compact unless compact is False in which
+    case it is indented by 2 spaces. Uses orjson when it is installed, NaN
+    and infinite floats are then written as null
+    """
+    if orjson is not None:
+        options = ORJSON_OPTIONS if compact else ORJSON_OPTIONS | orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=to_serializable, option=options).decode('utf-8')
+    if compact:
+        return json.dumps(obj, cls=EnhancedJSONEncoder, separators=COMPACT_SEPARATORS)
+    return json.dumps(obj, cls=EnhancedJSONEncoder, indent=2)
+
+
 # We need a custom JSON encoder to handle numpy types and data classes
 class EnhancedJSONEncoder(json.JSONEncoder):
     is_special = re.compile(r'^__[^\d\W]\w*__\Z', re.UNICODE)
 
     def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        if isinstance(obj, np.floating):            
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        if dataclasses.is_dataclass(obj):
-            #### Special Handling to fetch property values
-            return self._asdict(obj)
-
-        return super(EnhancedJSONEncoder, self).default(obj)
-
-    def _asdict(self, obj, *, dict_factory=dict):
-        if not dataclasses.is_dataclass(obj):
-            raise TypeError("_asdict() should only be called on dataclass instances")
-        return self._asdict_inner(obj, dict_factory)
-
-    def _asdict_inner(self, obj, dict_factory):
-        if dataclasses.is_dataclass(obj):
-            result = []
-            # Get values of its fields (recursively).
-            for f in dataclasses.fields(obj):
-                value = self._asdict_inner(getattr(obj, f.name), dict_factory)
-                result.append((f.name, value))
-            # Add values of non-special attributes which are properties.
-            is_special = self.is_special.match  # Local var to speed access.
-            for name, attr in vars(type(obj)).items():
-                if not is_special(name) and isinstance(attr, property):
-                    result.append((name, attr.__get__(obj)))  # Get property's value.
-            return dict_factory(result)
-        elif isinstance(obj, tuple) and hasattr(obj, '_fields'):
-            return type(obj)(*[self._asdict_inner(v, dict_factory) for v in obj])
-        elif isinstance(obj, (list, tuple)):
-            return type(obj)(self._asdict_inner(v, dict_factory) for v in obj)
-        elif isinstance(obj, dict):
-            return type(obj)((self._asdict_inner(k, dict_factory),
-                            self._asdict_inner(v, dict_factory)) for k, v in obj.items())
-        else:
-            return copy.deepcopy(obj)        
+        try:
+            return to_serializable(obj)
+        except TypeError:
+            return super(EnhancedJSONEncoder, self).default(obj)
@@ -0,0 +1,309 @@
+import os
+import csv
+import gzip
+import math
+import dataclasses
+from enum import Enum
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError: # zstandard is optional, parts are gzip compressed without it
+    zstandard = None
+
+from common.utils.json_encoder import dumps
+from services.flat_file.flat_file import FlatFile, RECORD_INDEX_COL_NAME, RE_TRUE_STRING, RE_FALSE_STRING
+from services.flat_file.flat_file_reader import FlatFileReader
+from services.flat_file.flat_file_descriptor import ColumnDataType
+from services.flat_file.datetime_format import to_strftime_format
+
+DEFAULT_SLICES = 4 # Slices of the target cluster, the part count is a multiple of it
+MIN_PART_SIZE = 1024 * 1024 # Bytes of csv, smaller files are written as fewer parts
+MAX_PART_SIZE = 256 * 1024 * 1024
+MANIFEST_FILE_NAME = 'manifest'
+PART_FILE_NAME = 'part-{0:05d}.csv{1}'
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Values written for the COPY options of RedshiftTable.copy_table_from_s3
+COPY_DELIMITER = '|'
+COPY_QUOTE = '"'
+BOOLEAN_TRUE = 't'
+BOOLEAN_FALSE = 'f'
+DATE_FORMAT = '%Y-%m-%d'
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+DATETIME_FRACTION_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+class CopyCompression(str, Enum):
+    GZIP = "GZIP"
+    ZSTD = "ZSTD"
+
+
+PART_EXTENSIONS = {
+    CopyCompression.GZIP: '.gz',
+    CopyCompression.ZSTD: '.zst'
+}
+
+
+@dataclasses.dataclass
+class CopyExportPart:
+    path: str
+    url: str # Entry in the manifest
+    records: int = 0
+    raw_size: int = 0 # Bytes of csv before compression
+    content_length: int = 0 # Bytes of the compressed part
+
+
+@dataclasses.dataclass
+class CopyExportResult:
+    output_directory: str
+    manifest_path: str
+    manifest_url: str
+    compression: CopyCompression
+    total_records: int = 0
+    parts: list[CopyExportPart] = dataclasses.field(default_factory=list)
+    # Values that do not parse as the column type, written as NULL
+    null_values: dict[str, int] = dataclasses.field(default_factory=dict)
+
+
+def get_part_count(csv_size, total_records, slices=DEFAULT_SLICES,
+                   min_part_size=MIN_PART_SIZE, max_part_size=MAX_PART_SIZE):
+    """
+    Parts a file is split into so every slice loads the same share: a multiple
+    of the slices with none above max_part_size, fewer than the slices when
+    parts would be smaller than min_part_size. csv_size is the uncompressed
+    size of the file, see get_csv_size
+    """
+    if total_records == 0:
+        return 1
+    parts = slices * max(1, math.ceil(csv_size / (slices * max_part_size)))
+    if csv_size / parts < min_part_size:
+        parts = max(1, csv_size // min_part_size)
+    return int(min(parts, total_records))
+
+
+def get_csv_size(file_descriptor):
+    """Bytes of the csv once decompressed, the size on disk for descriptors without it"""
+    return file_descriptor.get('uncompressed_size') or file_descriptor.get('file_size') or 0
+
+
+def get_column_formats(file_descriptor):
+    """
+    Column name : (data_type, strftime format) of the type each column has
+    in the DDL, the potential type when there is one
+    """
+    if dataclasses.is_dataclass(file_descriptor):
+        file_descriptor = {'columns': [dataclasses.asdict(c) for c in file_descriptor.columns]}
+
+    column_formats = {}
+    for column in file_descriptor['columns']:
+        type_details = column.get('potential_type') or column.get('original_type') or {}
+        data_type = type_details.get('data_type')
+        if data_type is not None:
+            column_formats[column['column_name']] = (
+                ColumnDataType(data_type),
+                to_strftime_format(type_details.get('string_format'))
+            )
+    return column_formats
+
+
+def format_chunk(chunk, column_formats):
+    """
+    Convert the DATE, DATETIME and BOOLEAN columns of a chunk of csv text (see
+    FlatFileReader.iter_text_chunks) to the text COPY loads for them, other
+    columns are written as they are in the file. Returns the chunk and the count
+    of values per column that do not parse as the column type and are written as NULL
+    """
+    chunk = chunk.drop(columns=[RECORD_INDEX_COL_NAME], errors='ignore')
+    null_values = {}
+    for col_name, (data_type, strftime_format) in column_formats.items():
+        if col_name not in chunk:
+            continue
+        col_values = chunk[col_name]
+        if data_type == ColumnDataType.BOOLEAN:
+            converted = _to_boolean_text(col_values)
+        elif data_type in (ColumnDataType.DATE, ColumnDataType.DATETIME):
+            converted = _to_datetime_text(col_values, data_type, strftime_format)
+        else:
+            continue
+        invalid = int((col_values.notna() & converted.isna()).sum())
+        if invalid > 0:
+            null_values[col_name] = invalid
+        chunk[col_name] = converted
+    return chunk, null_values
+
+
+class RedshiftCopyExport(object):
+    """
+    Write a profiled file as compressed, pipe delimited csv parts and a
+    manifest that RedshiftTable.copy_table_from_s3 loads with MANIFEST.
+    Parts hold consecutive rows and are written concurrently by a pool of
+    processes, each reading the text of its rows from the csv in chunks so
+    memory does not grow with the part size. Numbers are written as they are
+    in the file, never through floats
+    """
+
+    def __init__(self, file_descriptor, output_directory, compression=CopyCompression.GZIP,
+                 slices=DEFAULT_SLICES, workers=None, url_prefix=None,
+                 min_part_size=MIN_PART_SIZE, max_part_size=MAX_PART_SIZE):
+        """
+        file_descriptor: FlatFileDescriptor or the descriptor dict stored in the JsonDb
+        url_prefix: Where the output directory is uploaded to (ie. s3://bucket/prefix/),
+        manifest entries are local paths without it
+        workers: Processes writing parts, defaults to one per CPU
+        """
+        self.compression = CopyCompression(compression)
+        if self.compression == CopyCompression.ZSTD and zstandard is None:
+            raise ValueError('ZSTD compression requires zstandard to be installed')
+        if dataclasses.is_dataclass(file_descriptor):
+            file_descriptor = {
+                'local_file_path': file_descriptor.local_file_path,
+                'file_size': file_descriptor.file_size,
+                'uncompressed_size': file_descriptor.uncompressed_size,
+                'total_records': file_descriptor.total_records,
+                'sidecar_path': file_descriptor.sidecar_path,
+                'sidecar_format_version': file_descriptor.sidecar_format_version,
+                'row_index_path': file_descriptor.row_index_path,
+                'row_index_format_version': file_descriptor.row_index_format_version,
+                'columns': [dataclasses.asdict(c) for c in file_descriptor.columns]
+            }
+        self.file_descriptor = file_descriptor
+        self.output_directory = output_directory
+        self.url_prefix = url_prefix
+        self.workers = os.cpu_count() if workers is None else workers
+        self.part_count = get_part_count(
+            get_csv_size(file_descriptor),
+            file_descriptor.get('total_records') or 0,
+            slices=slices,
+            min_part_size=min_part_size,
+            max_part_size=max_part_size
+        )
+
+    def export(self):
+        os.makedirs(self.output_directory, exist_ok=True)
+        total_records = self.file_descriptor.get('total_records') or 0
+        records_per_part = math.ceil(total_records / self.part_count)
+        part_args = [
+            (
+                self.file_descriptor,
+                self._get_part_path(part),
+                self.compression,
+                part * records_per_part,
+                max(0, min(records_per_part, total_records - part * records_per_part))
+            )
+            for part in range(self.part_count)
+        ]
+
+        workers = min(self.workers, self.part_count)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=FlatFile._get_worker_context()) as executor:
+                futures = [executor.submit(_write_part, *args) for args in part_args]
+                part_results = [future.result() for future in futures]
+        else:
+            part_results = [_write_part(*args) for args in part_args]
+
+        result = CopyExportResult(
+            self.output_directory,
+            manifest_path=os.path.join(self.output_directory, MANIFEST_FILE_NAME),
+            manifest_url=self._get_url(MANIFEST_FILE_NAME),
+            compression=self.compression,
+            total_records=total_records
+        )
+        for part, null_values in part_results:
+            part.url = self._get_url(os.path.basename(part.path))
+            result.parts.append(part)
+            for col_name, count in null_values.items():
+                result.null_values[col_name] = result.null_values.get(col_name, 0) + count
+
+        # Written last so a manifest is only there once every part is complete
+        manifest = {
+            'entries': [
+                {'url': part.url, 'mandatory': True, 'meta': {'content_length': part.content_length}}
+                for part in result.parts
+            ]
+        }
+        with open(result.manifest_path, 'w') as manifest_file:
+            manifest_file.write(dumps(manifest, compact=False))
+        return result
+
+    def get_copy_statement(self, table, iam_role, region=None):
+        """COPY of the parts through the manifest into a RedshiftTable"""
+        return table.copy_table_from_s3(
+            self._get_url(MANIFEST_FILE_NAME),
+            iam_role,
+            region=region,
+            compression=self.compression.value,
+            manifest=True
+        )
+
+    def _get_part_path(self, part):
+        return os.path.join(self.output_directory, PART_FILE_NAME.format(part, PART_EXTENSIONS[self.compression]))
+
+    def _get_url(self, file_name):
+        if self.url_prefix is None:
+            return os.path.abspath(os.path.join(self.output_directory, file_name))
+        return self.url_prefix.rstrip('/') + '/' + file_name
+
+
+def _write_part(file_descriptor, part_path, compression, offset, limit):
+    """Write rows offset to offset + limit as one compressed part"""
+    reader = FlatFileReader.from_descriptor(file_descriptor)
+    column_formats = get_column_formats(file_descriptor)
+    part = CopyExportPart(part_path, url=None)
+    null_values = {}
+
+    with _open_part(part_path, compression) as part_file:
+        for chunk in reader.iter_text_chunks(offset=offset, limit=limit):
+            chunk, chunk_null_values = format_chunk(chunk, column_formats)
+            data = chunk.to_csv(
+                sep=COPY_DELIMITER,
+                quotechar=COPY_QUOTE,
+                quoting=csv.QUOTE_MINIMAL,
+                header=False,
+                index=False,
+                na_rep='',
+                lineterminator='\n'
+            ).encode('utf-8')
+            part_file.write(data)
+            part.records += len(chunk.index)
+            part.raw_size += len(data)
+            for col_name, count in chunk_null_values.items():
+                null_values[col_name] = null_values.get(col_name, 0) + count
+
+    part.content_length = os.path.getsize(part_path)
+    return part, null_values
+
+
+def _open_part(part_path, compression):
+    if compression == CopyCompression.ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(part_path, 'wb'), closefd=True)
+    return gzip.open(part_path, 'wb', compresslevel=GZIP_LEVEL)
+
+
+def _to_boolean_text(col_values):
+    # Text booleans (true, t, yes, ...) and integer columns of 0 and 1
+    text = col_values.str.strip()
+    converted = pd.Series(None, index=col_values.index, dtype=object)
+    converted[text.str.match(RE_TRUE_STRING, na=False) | (text == '1')] = BOOLEAN_TRUE
+    converted[text.str.match(RE_FALSE_STRING, na=False) | (text == '0')] = BOOLEAN_FALSE
+    return converted
+
+
+def _to_datetime_text(col_values, data_type, strftime_format=None):
+    text = col_values.astype(object).where(col_values.notna(), None)
+    if strftime_format is not None:
+        parsed = pd.to_datetime(text, format=strftime_format, errors='coerce')
+    else:
+        parsed = pd.to_datetime(text, format='mixed', errors='coerce')
+
+    if data_type == ColumnDataType.DATE:
+        output_format = DATE_FORMAT
+    elif (parsed.dt.microsecond != 0).any():
+        output_format = DATETIME_FRACTION_FORMAT
+    else:
+        output_format = DATETIME_FORMAT
+    converted = parsed.dt.strftime(output_format).astype(object)
+    return converted.where(parsed.notna(), None)
@@ -304,9 +304,14 @@ class RedshiftTable(object):
 
         return dbt_schema
 
-    def copy_table_from_s3(self, s3_path, iam_role, region=None):
-        """Return COPY statement that will load a file from S3 into Redshift"""
+    def copy_table_from_s3(self, s3_path, iam_role, region=None, compression=None, manifest=False):
+        """
+        Return COPY statement that will load a file from S3 into Redshift
+        compression: GZIP or ZSTD when the files are compressed
+        manifest: s3_path is a manifest listing the files (ie. from RedshiftCopyExport)
+        """
         region_string = "region '{0}'".format(region) if region is not None else ""
+        options = [option for option in (compression, 'manifest' if manifest else None) if option]
         load = """
             COPY {0}
             from '{1}'
@@ -323,8 +328,9 @@ class RedshiftTable(object):
             timeformat 'auto'
             dateformat 'auto'
             {3}
+            {4}
             """.format(
-            self.get_table_name(), s3_path, iam_role, region_string
+            self.get_table_name(), s3_path, iam_role, region_string, '\n            '.join(options)
         )
 
         return load
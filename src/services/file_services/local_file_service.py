@@ -1,17 +1,51 @@
 import uuid
 import os
 import csv
+import hashlib
 import pandas as pd
 from datetime import datetime
 
+from services.flat_file.csv_reader import read_csv
+
+
+STREAM_BLOCK_SIZE = 1024 * 1024
+
 
 class LocalFileService:
     def __init__(self, local_directory):
         self.local_directory = local_directory
 
-    def load_csv_to_dataframe(self, local_file_name):
+    def save_file_stream(self, stream, local_file_path, block_size=STREAM_BLOCK_SIZE, consumers=None):
+        """
+        Write a stream to disk and return the sha256 hex digest of its content.
+        Every block is also passed to the write method of each consumer, close
+        is called once the file is complete and abort if saving fails
+        """
+        consumers = [] if consumers is None else consumers
+        content_hash = hashlib.sha256()
+        try:
+            with open(local_file_path, "wb") as outfile:
+                while True:
+                    block = stream.read(block_size)
+                    if not block:
+                        break
+                    content_hash.update(block)
+                    outfile.write(block)
+                    for consumer in consumers:
+                        consumer.write(block)
+        except Exception as e:
+            for consumer in consumers:
+                consumer.abort(e)
+            raise
+
+        for consumer in consumers:
+            consumer.close()
+        return content_hash.hexdigest()
+
+    def load_csv_to_dataframe(self, local_file_name, reader_options=None):
+        """reader_options: CsvReaderOptions, see services.flat_file.csv_reader"""
         local_file_path = "{0}/{1}".format(self.local_directory, local_file_name)
-        df = pd.read_csv(local_file_path, encoding="utf-8", index_col=False)
+        df = read_csv(local_file_path, reader_options)
         df.columns = df.columns.str.replace(" ", "_")
         df.reset_index(drop=True, inplace=True)
         df.columns = map(str.lower, df.columns)
@@ -0,0 +1,180 @@
+import os
+import glob
+
+from services.flat_file.flat_file import FlatFile, STREAM_CHUNK_SIZE
+from services.flat_file.flat_file_descriptor import FlatFileDescriptor, DistinctCountMethod, ColumnDataType
+from services.flat_file.column_statistics import ColumnStatistics, widen_data_type
+from services.flat_file.distinct_counter import DEFAULT_PRECISION as DEFAULT_HLL_PRECISION
+from services.flat_file.profile_metrics import ProfileMetrics, ProfileStage
+from services.flat_file.compression import CsvSource
+
+DEFAULT_FILE_PATTERN = '*.csv'
+
+
+class BatchProfiler:
+    """
+    Profile a set of same-shaped csv files (ie. the partitions of one table)
+    as a single file. Each file is profiled in chunks by a pool of worker
+    processes, one file per task, and the mergeable column statistics of the
+    files are combined by column name: types widen, counts add up, maximums
+    and distinct sketches merge. The DDL is generated once from the merged
+    columns. Record indexes (ie. invalid_record_index) count rows across the
+    files in the order given. Files may be compressed, each is decompressed by
+    the worker profiling it
+    """
+    def __init__(self, file_paths, table_name=None, workers=None, chunk_size=STREAM_CHUNK_SIZE,
+                 distinct_method=DistinctCountMethod.HYPERLOGLOG, hll_precision=DEFAULT_HLL_PRECISION):
+        """
+        table_name: Name of the merged descriptor and its table, defaults to
+        the directory the files share
+        workers: Processes profiling files, defaults to one per CPU
+        distinct_method: EXACT merges the distinct values of every file, which
+        grows with the column cardinality, HYPERLOGLOG merges fixed size sketches
+        """
+        if len(file_paths) == 0:
+            raise AssertionError('Batch requires at least one file')
+        for file_path in file_paths:
+            FlatFile._get_file_size(file_path)
+
+        self.file_paths = list(file_paths)
+        self.table_name = table_name
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        self.distinct_method = DistinctCountMethod(distinct_method)
+        if self.distinct_method == DistinctCountMethod.SAMPLE:
+            raise ValueError('Batch profiles count distinct values with EXACT or HYPERLOGLOG')
+        self.hll_precision = hll_precision
+        self.metrics = ProfileMetrics()
+        self.file_descriptors = []
+        self.file_descriptor = self._profile()
+        self.file_descriptor.metrics = self.metrics.finish()
+
+    @staticmethod
+    def from_directory(directory, pattern=DEFAULT_FILE_PATTERN, **kwargs):
+        """Profile the files in a directory matching pattern, in name order"""
+        file_paths = sorted(glob.glob(os.path.join(directory, pattern)))
+        if len(file_paths) == 0:
+            raise IOError('No files matching {0} in {1}'.format(pattern, directory))
+        kwargs.setdefault('table_name', os.path.basename(os.path.normpath(directory)))
+        return BatchProfiler(file_paths, **kwargs)
+
+    def get_file_descriptor(self):
+        """The merged descriptor of every file"""
+        return self.file_descriptor
+
+    def get_file_descriptors(self):
+        """The descriptor of each file, in the order given"""
+        return self.file_descriptors
+
+    def _profile(self):
+        file_results = self._map_files(
+            _profile_file,
+            [(file_path, self.chunk_size, self.distinct_method, self.hll_precision) for file_path in self.file_paths]
+        )
+
+        # Column order is the order columns are first seen in
+        column_types = {}
+        for _, _, column_stats in file_results:
+            for stats in column_stats:
+                column_types[stats.column_name] = widen_data_type(column_types.get(stats.column_name), stats.data_type)
+
+        # Columns typed STRING once merged still need checking for datetimes in
+        # the files where they held another type
+        string_columns = [name for name, data_type in column_types.items() if data_type == ColumnDataType.STRING]
+        recheck_files = [
+            position for position, (_, _, column_stats) in enumerate(file_results)
+            if any(stats.column_name in string_columns and len(stats.datetime_unchecked_chunks) > 0
+                   for stats in column_stats)
+        ]
+        if len(recheck_files) > 0:
+            rechecked = self._map_files(
+                _check_file_datetimes,
+                [
+                    (self.file_paths[position], self.chunk_size, file_results[position][2], string_columns)
+                    for position in recheck_files
+                ]
+            )
+            for position, (column_stats, metrics) in zip(recheck_files, rechecked):
+                file_results[position] = file_results[position][:2] + (column_stats,)
+                self.metrics.merge(metrics)
+
+        merged_stats = {}
+        total_records = 0
+        file_size = 0
+        uncompressed_size = 0
+        for file_path, (file_descriptor, metrics, column_stats) in zip(self.file_paths, file_results):
+            self.file_descriptors.append(file_descriptor)
+            self.metrics.merge(metrics)
+            for stats in column_stats:
+                merged = merged_stats.get(stats.column_name)
+                if merged is None:
+                    merged = merged_stats[stats.column_name] = ColumnStatistics(
+                        stats.column_name,
+                        distinct_sketch=FlatFile._new_distinct_sketch(self.distinct_method, self.hll_precision),
+                        hll_precision=self.hll_precision
+                    )
+                stats.datetime_parse_failures = stats.datetime_parse_failures.shift(total_records)
+                # Rows of earlier files without the column count as nulls
+                merged.total_records = total_records
+                merged.merge(stats)
+            total_records += file_descriptor.total_records
+            file_size += file_descriptor.file_size
+            uncompressed_size += file_descriptor.uncompressed_size
+
+        file_descriptor = FlatFileDescriptor(
+            os.path.commonpath(self.file_paths) if len(self.file_paths) > 1 else self.file_paths[0],
+            original_file_name=self.table_name,
+            file_size=file_size,
+            uncompressed_size=uncompressed_size,
+            total_records=total_records
+        )
+        # Files compressed the same way
+        compressions = set(file_descriptor.compression for file_descriptor in self.file_descriptors)
+        file_descriptor.compression = compressions.pop() if len(compressions) == 1 else None
+        for stats in merged_stats.values():
+            stats.total_records = total_records
+            file_descriptor.add_column_descriptor(
+                FlatFile._get_column_descriptor_from_statistics(stats, total_records)
+            )
+
+        # Calculate DDL once for every file
+        with self.metrics.measure(ProfileStage.DDL):
+            file_descriptor.ddl = FlatFile._get_ddl(file_descriptor)
+        return file_descriptor
+
+    def _map_files(self, fn, file_args):
+        """Run fn for each file across a process pool, results are in file order"""
+        workers = min(self.workers, len(file_args))
+        if workers > 1:
+            return FlatFile._map_column_batches(workers, fn, file_args)
+        return [fn(*args) for args in file_args]
+
+
+def _profile_file(file_path, chunk_size, distinct_method, hll_precision):
+    """Profile one file of a batch, returns its descriptor, ProfileMetrics and ColumnStatistics"""
+    csv_source = CsvSource(file_path)
+    with csv_source.open() as source:
+        # Compressed files are parsed from their decompressing stream, so its size is known
+        total_records, columns, metrics, column_stats = FlatFile._get_column_batch_chunked(
+            file_path, chunk_size, None, distinct_method, hll_precision,
+            stream=None if csv_source.compression is None else source, keep_statistics=True
+        )
+    file_descriptor = FlatFileDescriptor(
+        file_path,
+        file_size=FlatFile._get_file_size(file_path),
+        compression=csv_source.compression,
+        uncompressed_size=csv_source.uncompressed_size,
+        total_records=total_records
+    )
+    for col_desc in columns:
+        file_descriptor.add_column_descriptor(col_desc)
+    with metrics.measure(ProfileStage.DDL):
+        file_descriptor.ddl = FlatFile._get_ddl(file_descriptor)
+    return file_descriptor, metrics, column_stats
+
+
+def _check_file_datetimes(file_path, chunk_size, column_stats, string_columns):
+    metrics = ProfileMetrics()
+    with metrics.measure(ProfileStage.DATETIME_RECHECK):
+        FlatFile._check_unchecked_datetime_chunks(file_path, chunk_size, column_stats, string_columns=string_columns)
+    return column_stats, metrics
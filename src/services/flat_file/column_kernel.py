@@ -0,0 +1,180 @@
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+from services.flat_file.flat_file_descriptor import ColumnDataType
+
+SAMPLE_SIZE = 5
+PRECISION_BLOCK_SIZE = 65536 # Values measured at a time by get_precision_and_scale
+
+PANDAS_TYPE_MAP = {
+    'string': ColumnDataType.STRING,
+    'boolean': ColumnDataType.BOOLEAN,
+    'Int64': ColumnDataType.INTEGER,
+    'Float64': ColumnDataType.NUMERIC
+}
+
+
+@dataclasses.dataclass
+class ColumnSummary:
+    """
+    Statistics of one column computed by summarize_column. distinct_values
+    holds each distinct non null value once, indexed by the row it first
+    appears on
+    """
+    column_name: str
+    total_records: int = 0
+    non_null_values: int = 0
+    distinct_values: pd.Series = None
+    data_type: ColumnDataType = ColumnDataType.UNKNOWN
+    max_value: int = None
+    max_length: int = None
+    precision: int = None
+    scale: int = None
+    sample_values: list[any] = dataclasses.field(default_factory=list)
+
+    @property
+    def distinct_count(self):
+        return len(self.distinct_values.index)
+
+
+def get_distinct_values(col_values):
+    """
+    Return the non null count and the distinct non null values of a column,
+    indexed by the row each first appears on. The rows are hashed once, this
+    replaces notnull().sum(), dropna() and drop_duplicates()
+    """
+    codes, uniques = pd.factorize(col_values)
+    non_null_values = len(codes) - int(np.count_nonzero(codes < 0))
+    if len(uniques) == 0:
+        return non_null_values, col_values.iloc[:0]
+
+    # Codes are numbered in order of first appearance, so a row holds the
+    # first occurrence of its value when its code is above every code before it
+    previous_max = np.maximum.accumulate(codes)
+    is_first = codes > np.concatenate(([-1], previous_max[:-1]))
+    first_rows = col_values.index[np.flatnonzero(is_first)]
+    return non_null_values, pd.Series(uniques, index=first_rows, name=col_values.name)
+
+
+def summarize_column(col_values, distinct_sketch=None, sample_size=SAMPLE_SIZE, rng=None):
+    """
+    Profile a column read by pandas in a single pass over its rows. Every
+    statistic after the null and distinct counts is taken from the distinct
+    values, which are never more than the rows and usually far fewer.
+    distinct_sketch: HyperLogLog the distinct values are added to
+    """
+    non_null_values, distinct_values = get_distinct_values(col_values)
+    summary = ColumnSummary(
+        col_values.name,
+        total_records=len(col_values.index),
+        non_null_values=non_null_values,
+        distinct_values=distinct_values
+    )
+    if len(distinct_values.index) == 0:
+        return summary
+
+    if distinct_sketch is not None:
+        distinct_sketch.add_values(distinct_values)
+
+    # Generic Value Types : String, Integer, Decimal, Boolean
+    pandas_type = str(distinct_values.convert_dtypes().dtype)
+    summary.data_type = PANDAS_TYPE_MAP.get(pandas_type, ColumnDataType.STRING)
+
+    if summary.data_type == ColumnDataType.INTEGER:
+        summary.max_value = int(distinct_values.max())
+    elif summary.data_type == ColumnDataType.STRING:
+        summary.max_length = int(distinct_values.map(len).max())
+    elif summary.data_type == ColumnDataType.NUMERIC:
+        summary.precision, summary.scale = get_precision_and_scale(distinct_values)
+
+    slots, positions = reservoir_sample(len(distinct_values.index), 0, sample_size, rng)
+    sample_values = distinct_values.iloc[positions].tolist()
+    summary.sample_values = [sample_values[i] for i in np.argsort(slots, kind='stable')]
+    return summary
+
+
+def reservoir_sample(candidates, seen, sample_size=SAMPLE_SIZE, rng=None):
+    """
+    Reservoir sampling of a batch of candidates after seen earlier ones,
+    with the random draws for the whole batch made at once.
+    Returns the sample slots and the candidate positions that end up in
+    them. A slot equal to the current sample length is an append, slots are
+    only listed once so they can be applied in any order
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    positions = np.arange(candidates)
+    # The first sample_size candidates fill the sample, each later one
+    # replaces a random slot with probability sample_size / candidates so far
+    slots = np.where(
+        seen + positions < sample_size,
+        seen + positions,
+        rng.integers(0, seen + positions + 1)
+    )
+    chosen = np.flatnonzero(slots < sample_size)
+    # Later candidates overwrite earlier ones in the same slot
+    slots, last = np.unique(slots[chosen][::-1], return_index=True)
+    return slots, chosen[::-1][last]
+
+
+def get_precision_and_scale(df_col, sample_size=None):
+    """
+    Given a numeric column calculate the maximum precision and scale
+    of the dataset from the text of each value. Floats are measured on
+    str(value) so the result matches Decimal(str(value)).as_tuple(),
+    strings (ie. raw csv values) are measured as written.
+    Precision:  Total Digits
+    Scale :     Total number of digits after the decimal
+    """
+    if sample_size is not None and len(df_col.index) > sample_size:
+        df_col = df_col.sample(n=sample_size)
+    if len(df_col.index) == 0:
+        return None, None
+
+    values = df_col.to_numpy()
+    if df_col.dtype == object:
+        text_values = values.astype('S')
+    else:
+        text_values = values.astype('float64').astype('S32')
+
+    max_precision = 0
+    max_scale = 0
+    for start in range(0, len(text_values), PRECISION_BLOCK_SIZE):
+        precision, scale = _get_text_precision_and_scale(
+            text_values[start:start + PRECISION_BLOCK_SIZE]
+        )
+        max_precision = max(max_precision, precision)
+        max_scale = max(max_scale, scale)
+
+    return max_precision, max_scale
+
+
+def _get_text_precision_and_scale(text_values):
+    """
+    Measure an array of fixed width byte strings as a (values x characters)
+    matrix so every value is measured in the same numpy operations
+    """
+    width = text_values.dtype.itemsize
+    chars = text_values.view(np.uint8).reshape(len(text_values), width)
+    positions = np.arange(width)
+
+    is_exponent = (chars == ord('e')) | (chars == ord('E'))
+    has_exponent = is_exponent.any(axis=1)
+    exponent_pos = np.where(has_exponent, is_exponent.argmax(axis=1), width)
+
+    is_dot = chars == ord('.')
+    dot_pos = np.where(is_dot.any(axis=1), is_dot.argmax(axis=1), width)
+
+    is_digit = (chars >= ord('0')) & (chars <= ord('9')) & (positions < exponent_pos[:, None])
+    # Leading zeros are not significant but a zero value still has one digit
+    is_significant = is_digit & (np.cumsum(is_digit & (chars > ord('0')), axis=1) > 0)
+    digits = np.maximum(is_significant.sum(axis=1), 1)
+    fraction_digits = (is_digit & (positions > dot_pos[:, None])).sum(axis=1)
+
+    exponent = np.zeros(len(text_values), dtype=np.int64)
+    for i in np.flatnonzero(has_exponent):
+        exponent[i] = int(text_values[i][exponent_pos[i] + 1:])
+    scale = np.abs(exponent - fraction_digits)
+
+    return int(digits.max()), int(scale.max())
@@ -0,0 +1,203 @@
+import copy
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+from services.flat_file.flat_file_descriptor import ColumnDataType
+from services.flat_file.distinct_counter import HyperLogLog, DEFAULT_PRECISION as DEFAULT_HLL_PRECISION
+from services.flat_file.record_index_set import RecordIndexSet
+from services.flat_file.column_kernel import SAMPLE_SIZE, reservoir_sample
+
+# Types that can be widened into each other without falling back to STRING
+NUMERIC_TYPES = (ColumnDataType.INTEGER, ColumnDataType.NUMERIC)
+TEMPORAL_TYPES = (ColumnDataType.DATE, ColumnDataType.DATETIME)
+
+SET_ENTRY_SIZE = 84 # Bytes a text value takes in a set on top of its characters
+
+
+def widen_data_type(current_type, new_type):
+    """
+    Return the narrowest type that can hold values of both types.
+    UNKNOWN (or None) never narrows a type, INTEGER widens to NUMERIC,
+    DATE widens to DATETIME and any other mix falls back to STRING
+    """
+    if current_type is None or current_type == ColumnDataType.UNKNOWN:
+        return new_type
+    if new_type is None or new_type == ColumnDataType.UNKNOWN:
+        return current_type
+    if current_type == new_type:
+        return current_type
+    if current_type in NUMERIC_TYPES and new_type in NUMERIC_TYPES:
+        return ColumnDataType.NUMERIC
+    if current_type in TEMPORAL_TYPES and new_type in TEMPORAL_TYPES:
+        return ColumnDataType.DATETIME
+    return ColumnDataType.STRING
+
+
+def _max_or_none(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+@dataclasses.dataclass
+class ColumnStatistics:
+    """
+    Mergeable per-column profile state. Each chunk of a file updates its own
+    ColumnStatistics and the results can be merged in any order, so peak memory
+    is bounded by the chunk size rather than the file size (exact distinct
+    values are the exception: they grow with the column cardinality unless a
+    distinct_sketch is used). With a state_limit, statistics that outgrow it
+    switch to bounded structures and are listed in downgraded_stats
+    """
+    column_name: str
+    total_records: int = 0
+    non_null_values: int = 0
+    type_votes: dict = dataclasses.field(default_factory=dict)
+    has_float_values: bool = False
+    max_length: int = None
+    max_value: int = None
+    precision: int = None
+    scale: int = None
+    sample_values: list[any] = dataclasses.field(default_factory=list)
+    sample_candidates: int = 0
+    distinct_set: set = dataclasses.field(default_factory=set)
+    distinct_sketch: HyperLogLog = None # Replaces distinct_set when set
+    hll_precision: int = DEFAULT_HLL_PRECISION # Of the sketch distinct_set is folded into past the state_limit
+    datetime_types: set = dataclasses.field(default_factory=set)
+    datetime_parse_failures: RecordIndexSet = dataclasses.field(default_factory=RecordIndexSet)
+    datetime_formats: set = dataclasses.field(default_factory=set) # strftime formats, None for dateutil parsed values
+    datetime_unchecked_chunks: list[any] = dataclasses.field(default_factory=list) # (start, stop) rows of chunks that were not datetime checked
+    state_limit: int = None # Bytes the distinct values and parse failures may hold, see services.flat_file.memory_budget
+    distinct_set_size: int = 0 # Estimated bytes of distinct_set
+    downgraded_stats: set = dataclasses.field(default_factory=set) # COLUMN_STATS names estimated to fit the state_limit
+
+    @property
+    def data_type(self):
+        """The widened type over every chunk vote"""
+        data_type = None
+        for vote in self.type_votes.keys():
+            data_type = widen_data_type(data_type, vote)
+        if data_type is None or self.non_null_values == 0:
+            return ColumnDataType.UNKNOWN
+        return data_type
+
+    def add_type_vote(self, data_type, count=1):
+        self.type_votes[data_type] = self.type_votes.get(data_type, 0) + count
+
+    @property
+    def distinct_count(self):
+        if self.distinct_sketch is not None:
+            return self.distinct_sketch.count()
+        return len(self.distinct_set)
+
+    def add_distinct_values(self, values):
+        """
+        Add values to the distinct set and return the ones not seen before.
+        A sketch cannot tell which values are new so every value is returned
+        """
+        if self.distinct_sketch is not None:
+            self.distinct_sketch.add_values(values)
+            return values
+
+        distinct_set = self.distinct_set
+        new_values_mask = np.fromiter(
+            (v not in distinct_set for v in values), dtype=bool, count=len(values)
+        )
+        new_values = values[new_values_mask]
+        distinct_set.update(new_values)
+        if self.state_limit is not None:
+            self.distinct_set_size += int(new_values.str.len().sum()) + len(new_values) * SET_ENTRY_SIZE
+            self._enforce_state_limit()
+        return new_values
+
+    def add_datetime_parse_failures(self, parse_failures):
+        self.datetime_parse_failures.update(parse_failures)
+        self._enforce_state_limit()
+
+    @property
+    def state_size(self):
+        """Estimated bytes of the statistics that grow with the rows"""
+        failures = self.datetime_parse_failures
+        return self.distinct_set_size + failures.starts.nbytes + failures.lengths.nbytes
+
+    def set_state_limit(self, state_limit):
+        """Hold statistics kept until now, whose size was only tracked under a limit, to state_limit"""
+        if self.state_limit is None and self.distinct_sketch is None:
+            values = pd.Series(list(self.distinct_set), dtype=object)
+            self.distinct_set_size = int(values.str.len().sum()) + len(values) * SET_ENTRY_SIZE
+        self.state_limit = state_limit
+        self._enforce_state_limit()
+
+    def _enforce_state_limit(self):
+        """
+        Over the state_limit exact distinct values are folded into a HyperLogLog
+        sketch, then parse failures past the limit stop being recorded
+        """
+        if self.state_limit is None or self.state_size <= self.state_limit:
+            return
+        if self.distinct_sketch is None:
+            self.distinct_sketch = HyperLogLog(self.hll_precision)
+            self.distinct_sketch.add_values(list(self.distinct_set))
+            self.distinct_set = set()
+            self.distinct_set_size = 0
+            self.downgraded_stats.update(['distinct_values', 'distinct_ratio'])
+        if self.state_size > self.state_limit:
+            # Runs are 16 bytes, the earliest failures are kept
+            failures = self.datetime_parse_failures
+            runs = max(0, (self.state_limit - self.distinct_set_size) // 16)
+            self.datetime_parse_failures = RecordIndexSet(failures.starts[:runs], failures.lengths[:runs])
+            self.downgraded_stats.add('invalid_record_index')
+
+    def add_sample_values(self, values, rng=None):
+        """Reservoir sample over the distinct values passed in"""
+        values = pd.Series(values, dtype=object) if not isinstance(values, pd.Series) else values
+        if len(self.sample_values) > 0:
+            values = values[~values.isin(self.sample_values)]
+        slots, positions = reservoir_sample(len(values.index), self.sample_candidates, SAMPLE_SIZE, rng)
+        self.sample_candidates += len(values.index)
+        for slot, v in zip(slots.tolist(), values.iloc[positions].tolist()):
+            if slot < len(self.sample_values):
+                self.sample_values[slot] = v
+            else:
+                self.sample_values.append(v)
+
+    def merge(self, other):
+        """Merge the statistics of another chunk / file for the same column"""
+        self.total_records += other.total_records
+        self.non_null_values += other.non_null_values
+        for data_type, count in other.type_votes.items():
+            self.add_type_vote(data_type, count)
+        self.has_float_values = self.has_float_values or other.has_float_values
+        self.max_length = _max_or_none(self.max_length, other.max_length)
+        self.max_value = _max_or_none(self.max_value, other.max_value)
+        self.precision = _max_or_none(self.precision, other.precision)
+        self.scale = _max_or_none(self.scale, other.scale)
+        self._merge_distinct_values(other)
+        self.add_sample_values(other.sample_values)
+        self.datetime_types.update(other.datetime_types)
+        self.datetime_formats.update(other.datetime_formats)
+        self.datetime_unchecked_chunks.extend(other.datetime_unchecked_chunks)
+        self.downgraded_stats.update(other.downgraded_stats)
+        self.add_datetime_parse_failures(other.datetime_parse_failures)
+        return self
+
+    def _merge_distinct_values(self, other):
+        # Exact sets are folded into the sketch if either side is estimated
+        if self.distinct_sketch is None and other.distinct_sketch is None:
+            self.distinct_set.update(other.distinct_set)
+            # Values in both sets are counted twice, the estimate errs on the high side
+            self.distinct_set_size += other.distinct_set_size
+            return
+        if self.distinct_sketch is None:
+            self.distinct_sketch = copy.deepcopy(other.distinct_sketch)
+            self.distinct_sketch.add_values(list(self.distinct_set))
+            self.distinct_set = set()
+            self.distinct_set_size = 0
+        elif other.distinct_sketch is not None:
+            self.distinct_sketch.merge(other.distinct_sketch)
+        if len(other.distinct_set) > 0:
+            self.distinct_sketch.add_values(list(other.distinct_set))
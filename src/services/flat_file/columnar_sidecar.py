@@ -0,0 +1,184 @@
+import os
+import pathlib
+import itertools
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError: # pyarrow is optional, files are read from the csv without it
+    pa = None
+
+from services.flat_file.flat_file_descriptor import ColumnDataType
+
+SIDECAR_EXTENSION = '.arrow'
+SIDECAR_FORMAT_VERSION = 1 # Arrow IPC file, one record batch per csv chunk, original_type columns
+
+ARROW_TYPE_MAP = {
+    ColumnDataType.INTEGER: 'int64',
+    ColumnDataType.NUMERIC: 'float64',
+    ColumnDataType.BOOLEAN: 'bool_',
+}
+
+
+def is_available():
+    return pa is not None
+
+
+def get_sidecar_path(file_path):
+    return str(pathlib.Path(file_path).with_suffix(SIDECAR_EXTENSION))
+
+
+def has_sidecar(sidecar_path, sidecar_format_version):
+    """True if a sidecar of the current format version can be read"""
+    return (
+        is_available()
+        and sidecar_path is not None
+        and sidecar_format_version == SIDECAR_FORMAT_VERSION
+        and os.path.isfile(sidecar_path)
+    )
+
+
+def get_arrow_schema(column_types):
+    fields = []
+    for col_name, data_type in column_types.items():
+        arrow_type = ARROW_TYPE_MAP.get(data_type, 'string')
+        fields.append(pa.field(col_name, getattr(pa, arrow_type)()))
+    return pa.schema(fields)
+
+
+def write_sidecar(file_descriptor, chunks, column_types):
+    """
+    Write data frame chunks of a profiled file to an Arrow IPC sidecar next
+    to the csv and record its location and format version on the descriptor
+    """
+    if not is_available():
+        return file_descriptor
+
+    schema = get_arrow_schema(column_types)
+    return _write_batches(file_descriptor, schema, _to_batches(chunks, schema, column_types))
+
+
+def append_sidecar(file_descriptor, previous_sidecar_path, previous_records, chunks, column_types):
+    """
+    Write the sidecar of a file rows were appended to from the record batches
+    of previous_sidecar_path, memory mapped and copied as they are, followed by
+    data frame chunks of the appended rows. Returns None without writing unless
+    the previous sidecar holds the previous_records rows before them with the
+    same column types
+    """
+    if not is_available():
+        return None
+
+    schema = get_arrow_schema(column_types)
+    with pa.memory_map(previous_sidecar_path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        previous_batches = [reader.get_batch(i) for i in range(reader.num_record_batches)]
+        if not reader.schema.equals(schema) or sum(b.num_rows for b in previous_batches) != previous_records:
+            return None
+        return _write_batches(
+            file_descriptor,
+            schema,
+            itertools.chain(previous_batches, _to_batches(chunks, schema, column_types))
+        )
+
+
+def _to_batches(chunks, schema, column_types):
+    for chunk in chunks:
+        chunk = _to_schema_types(chunk[schema.names], column_types)
+        yield pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def _write_batches(file_descriptor, schema, batches):
+    sidecar_path = get_sidecar_path(file_descriptor.local_file_path)
+    tmp_path = sidecar_path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    # Readers never see a partly written sidecar
+    os.replace(tmp_path, sidecar_path)
+
+    file_descriptor.sidecar_path = sidecar_path
+    file_descriptor.sidecar_format_version = SIDECAR_FORMAT_VERSION
+    return file_descriptor
+
+
+def iter_sidecar_chunks(sidecar_path, offset=0, limit=None, columns=None):
+    """
+    Memory map the sidecar and yield data frames for rows offset to
+    offset + limit, indexed from 0 at offset. Record batches before
+    the offset are skipped using their row counts only, columns other
+    than those asked for are never converted
+    """
+    end = None if limit is None else offset + limit
+    with pa.memory_map(sidecar_path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        batch_start = 0
+        for i in range(reader.num_record_batches):
+            batch = _select(reader.get_batch(i), columns)
+            batch_end = batch_start + batch.num_rows
+            if batch_end <= offset:
+                batch_start = batch_end
+                continue
+            if end is not None and batch_start >= end:
+                break
+
+            slice_start = max(offset - batch_start, 0)
+            slice_end = batch.num_rows if end is None else min(end - batch_start, batch.num_rows)
+            chunk = batch.slice(slice_start, slice_end - slice_start).to_pandas(
+                types_mapper=_pandas_types_mapper
+            )
+            chunk.index = pd.RangeIndex(
+                batch_start + slice_start - offset,
+                batch_start + slice_end - offset
+            )
+            yield chunk
+            batch_start = batch_end
+
+
+def iter_sidecar_rows(sidecar_path, rows, columns=None):
+    """
+    Memory map the sidecar and yield data frames of the sorted rows asked
+    for, indexed by row number. Record batches without any are skipped
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    with pa.memory_map(sidecar_path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        batch_start = 0
+        for i in range(reader.num_record_batches):
+            if batch_start > rows[-1]:
+                break
+            batch = _select(reader.get_batch(i), columns)
+            batch_end = batch_start + batch.num_rows
+            first, last = np.searchsorted(rows, [batch_start, batch_end])
+            if last > first:
+                batch_rows = rows[first:last]
+                chunk = batch.take(pa.array(batch_rows - batch_start)).to_pandas(types_mapper=_pandas_types_mapper)
+                chunk.index = pd.Index(batch_rows)
+                yield chunk
+            batch_start = batch_end
+
+
+def _select(batch, columns):
+    return batch if columns is None else batch.select(columns)
+
+
+def _to_schema_types(chunk, column_types):
+    for col_name, data_type in column_types.items():
+        if data_type == ColumnDataType.BOOLEAN:
+            chunk[col_name] = chunk[col_name].astype('boolean')
+        elif data_type == ColumnDataType.INTEGER:
+            chunk[col_name] = chunk[col_name].astype('Int64')
+    return chunk
+
+
+def _pandas_types_mapper(arrow_type):
+    # Keep nullable integers and booleans instead of falling back to floats / objects
+    if arrow_type == pa.int64():
+        return pd.Int64Dtype()
+    if arrow_type == pa.bool_():
+        return pd.BooleanDtype()
+    return None
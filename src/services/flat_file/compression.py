@@ -0,0 +1,185 @@
+import io
+import os
+import bz2
+import gzip
+import queue
+import threading
+import contextlib
+from enum import Enum
+
+try:
+    import zstandard
+except ImportError: # zstandard is optional, .zst files can not be read without it
+    zstandard = None
+
+DECOMPRESS_BLOCK_SIZE = 1024 * 1024 # Bytes decompressed at a time
+MAX_DECOMPRESSED_BLOCKS = 8 # Blocks decompressed ahead of the reader
+
+
+class FileCompression(str, Enum):
+    GZIP = "GZIP"
+    ZSTD = "ZSTD"
+    BZIP2 = "BZIP2"
+
+
+# Leading bytes of each format
+MAGIC_BYTES = {
+    FileCompression.GZIP: b'\x1f\x8b',
+    FileCompression.ZSTD: b'\x28\xb5\x2f\xfd',
+    FileCompression.BZIP2: b'BZh'
+}
+
+FILE_EXTENSIONS = {
+    FileCompression.GZIP: ['.gz', '.gzip'],
+    FileCompression.ZSTD: ['.zst', '.zstd'],
+    FileCompression.BZIP2: ['.bz2']
+}
+COMPRESSED_EXTENSIONS = [extension for extensions in FILE_EXTENSIONS.values() for extension in extensions]
+
+
+def detect_compression_bytes(header):
+    """FileCompression the leading bytes of a file start with, None for plain files"""
+    for compression, magic in MAGIC_BYTES.items():
+        if header.startswith(magic):
+            return compression
+    return None
+
+
+def detect_compression(file_path):
+    """FileCompression of a file by its magic bytes, whatever its name"""
+    with open(file_path, 'rb') as f:
+        return detect_compression_bytes(f.read(4))
+
+
+def open_compressed(fileobj, compression):
+    """Binary file object reading the decompressed bytes of fileobj"""
+    compression = FileCompression(compression)
+    if compression == FileCompression.GZIP:
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    if compression == FileCompression.BZIP2:
+        return bz2.BZ2File(fileobj, mode='rb')
+    if zstandard is None:
+        raise ValueError('ZSTD compressed files require zstandard to be installed')
+    # Files written by parallel compressors hold several frames
+    return zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True, closefd=False)
+
+
+class DecompressedStream(io.RawIOBase):
+    """
+    Decompressed bytes of a compressed binary file object. A background thread
+    decompresses blocks ahead of the reader into a bounded queue; zlib, bz2 and
+    zstandard release the GIL so decompression runs alongside csv parsing.
+    uncompressed_size counts the bytes read, it is the size of the decompressed
+    file once the stream is read to its end
+    close_fileobj: Close fileobj along with the stream
+    """
+    def __init__(self, fileobj, compression, close_fileobj=False, block_size=DECOMPRESS_BLOCK_SIZE,
+                 max_blocks=MAX_DECOMPRESSED_BLOCKS):
+        self.fileobj = fileobj
+        self.close_fileobj = close_fileobj
+        self.compression = FileCompression(compression)
+        self.reader = open_compressed(fileobj, self.compression)
+        self.block_size = block_size
+        self.blocks = queue.Queue(maxsize=max_blocks)
+        self.current = b''
+        self.eof = False
+        self.stopped = threading.Event()
+        self.uncompressed_size = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self.current) == 0:
+            if self.eof:
+                return 0
+            block = self.blocks.get()
+            if block is None:
+                self.eof = True
+                return 0
+            if isinstance(block, Exception):
+                self.eof = True
+                raise block
+            self.current = block
+
+        size = min(len(buffer), len(self.current))
+        buffer[:size] = self.current[:size]
+        self.current = self.current[size:]
+        self.uncompressed_size += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            # Unblock the thread if it is waiting on a full queue
+            self.stopped.set()
+            while self.thread.is_alive():
+                try:
+                    self.blocks.get_nowait()
+                except queue.Empty:
+                    self.thread.join(0.01)
+            self.reader.close()
+            if self.close_fileobj:
+                self.fileobj.close()
+        super().close()
+
+    def _run(self):
+        try:
+            while not self.stopped.is_set():
+                block = self.reader.read(self.block_size)
+                if not block:
+                    break
+                self._put(block)
+            self._put(None)
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+
+def open_decompressed(file_path, compression):
+    """Buffered DecompressedStream of a compressed file, closing it closes the file"""
+    fileobj = open(file_path, 'rb')
+    try:
+        return io.BufferedReader(DecompressedStream(fileobj, compression, close_fileobj=True))
+    except Exception:
+        fileobj.close()
+        raise
+
+
+class CsvSource:
+    """
+    A csv file that may be compressed. open yields what pd.read_csv reads it
+    from: the path itself for plain files, a decompressing stream for
+    compressed files. uncompressed_size is the size of the csv once a stream
+    has been read to its end, the file size for plain files
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.compression = detect_compression(file_path)
+        self.uncompressed_size = os.path.getsize(file_path) if self.compression is None else None
+
+    @contextlib.contextmanager
+    def open(self):
+        if self.compression is None:
+            yield self.file_path
+            return
+        stream = open_decompressed(self.file_path, self.compression)
+        try:
+            yield stream
+            if stream.raw.eof:
+                self.uncompressed_size = stream.raw.uncompressed_size
+        finally:
+            stream.close()
+
+
+def open_csv(file_path):
+    """Context manager yielding what pd.read_csv reads the csv at file_path from, see CsvSource"""
+    return CsvSource(file_path).open()
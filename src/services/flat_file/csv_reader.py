@@ -0,0 +1,144 @@
+import dataclasses
+from enum import Enum
+
+import pandas as pd
+
+from services.flat_file.compression import CsvSource
+
+try:
+    import pyarrow
+except ImportError: # pyarrow is optional, the C engine is used without it
+    pyarrow = None
+
+SAMPLE_ROWS = 10000 # Rows read to find the column types of a two phase read
+
+# pandas parses these as booleans when reading a csv
+CSV_TRUE_VALUES = ['True', 'TRUE', 'true']
+CSV_FALSE_VALUES = ['False', 'FALSE', 'false']
+CSV_BOOLEAN_VALUES = CSV_TRUE_VALUES + CSV_FALSE_VALUES
+
+# Values pandas reads as nulls by default
+CSV_NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+
+
+class CsvEngine(str, Enum):
+    C = "C" # pandas C parser, single threaded
+    PYARROW = "PYARROW" # pyarrow parser, multithreaded. Always a two phase read
+
+
+@dataclasses.dataclass
+class CsvReaderOptions:
+    """
+    How FlatFile reads a csv into a data frame. The defaults read it the way
+    pd.read_csv does with no arguments
+    engine: CsvEngine parsing the file
+    arrow_strings: Hold text columns as Arrow backed strings instead of objects
+    usecols: Names or positions of the only columns to read
+    two_phase: Read sample_rows first and use the types pandas finds for them as
+    explicit dtypes of the full read. The full file is read again the default way
+    if a value does not fit its sample type
+    """
+    engine: CsvEngine = CsvEngine.C
+    arrow_strings: bool = False
+    usecols: list = None
+    two_phase: bool = False
+    sample_rows: int = SAMPLE_ROWS
+
+    def __post_init__(self):
+        self.engine = CsvEngine(self.engine)
+        if self.engine == CsvEngine.PYARROW and pyarrow is None:
+            raise ValueError('The PYARROW engine requires pyarrow to be installed')
+        if self.arrow_strings and pyarrow is None:
+            raise ValueError('arrow_strings requires pyarrow to be installed')
+
+
+def read_csv(file_path, options=None):
+    """
+    Read a csv into a data frame with the reader options, see CsvReaderOptions.
+    file_path may be a CsvSource, compressed files are decompressed as they are
+    read, see services.flat_file.compression
+    """
+    options = CsvReaderOptions() if options is None else options
+    csv_source = file_path if isinstance(file_path, CsvSource) else CsvSource(file_path)
+    # Type inference of the pyarrow engine differs from pandas (ie. timestamps), it needs explicit dtypes
+    if options.two_phase or options.engine == CsvEngine.PYARROW:
+        df = _read_two_phase(csv_source, options)
+    else:
+        df = _read(csv_source, usecols=options.usecols)
+    return _to_arrow_strings(df) if options.arrow_strings else df
+
+
+def _read(csv_source, **kwargs):
+    with csv_source.open() as source:
+        return pd.read_csv(source, **kwargs)
+
+
+def get_sample_dtypes(df, engine=CsvEngine.C, arrow_strings=False):
+    """
+    Explicit dtypes for the columns of a sample read by pandas. Integers are
+    read as nullable Int64 since the full file may have nulls the sample did
+    not. Columns with no values or mixed values in the sample are left to
+    type inference
+    """
+    dtypes = {}
+    for col_name, dtype in df.dtypes.items():
+        inferred_type = pd.api.types.infer_dtype(df[col_name], skipna=True)
+        if inferred_type == 'empty':
+            continue
+        if dtype.kind in 'iu':
+            dtypes[col_name] = 'Int64'
+        elif dtype.kind == 'f':
+            dtypes[col_name] = 'float64'
+        elif inferred_type == 'boolean':
+            # pyarrow reads more values as booleans than pandas does (ie. 1 / 0)
+            dtypes[col_name] = 'boolean' if engine == CsvEngine.C else str
+        elif inferred_type == 'string':
+            dtypes[col_name] = 'string[pyarrow]' if arrow_strings else str
+    return dtypes
+
+
+def _read_two_phase(csv_source, options):
+    sample_df = _read(csv_source, usecols=options.usecols, nrows=options.sample_rows)
+    if len(sample_df.index) < options.sample_rows:
+        # The sample is the whole file
+        return sample_df
+    dtypes = get_sample_dtypes(sample_df, options.engine, options.arrow_strings)
+
+    try:
+        df = _read(
+            csv_source,
+            engine='pyarrow' if options.engine == CsvEngine.PYARROW else 'c',
+            usecols=options.usecols,
+            dtype=dtypes
+        )
+    except (ValueError, TypeError):
+        # A value did not fit the type of its sample
+        return _read(csv_source, usecols=options.usecols)
+
+    if options.engine == CsvEngine.PYARROW:
+        for col_name, dtype in dtypes.items():
+            if dtype in (str, 'string[pyarrow]'):
+                # pyarrow never reads text columns as nulls
+                df[col_name] = df[col_name].mask(df[col_name].isin(CSV_NA_VALUES))
+                if pd.api.types.infer_dtype(sample_df[col_name], skipna=True) == 'boolean':
+                    df[col_name] = _to_boolean(df[col_name])
+    return df
+
+
+def _to_boolean(col_values):
+    """Booleans if every value is a csv boolean, the text otherwise the way pandas reads them"""
+    values = col_values.dropna()
+    if not values.isin(CSV_BOOLEAN_VALUES).all():
+        return col_values
+    return col_values.isin(CSV_TRUE_VALUES).astype('boolean').mask(col_values.isna())
+
+
+def _to_arrow_strings(df):
+    for col_name, dtype in df.dtypes.items():
+        # Object columns also hold booleans with nulls
+        if dtype == object and pd.api.types.infer_dtype(df[col_name], skipna=True) == 'string':
+            df[col_name] = df[col_name].astype('string[pyarrow]')
+    return df
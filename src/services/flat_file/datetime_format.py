@@ -0,0 +1,82 @@
+import warnings
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+DATETIME_FORMAT_SAMPLE_SIZE = 50
+
+# strftime directives and the matching Redshift DATEFORMAT / TIMEFORMAT tokens
+STRFTIME_TO_STRING_FORMAT = [
+    ('%Y', 'YYYY'),
+    ('%y', 'YY'),
+    ('%m', 'MM'),
+    ('%d', 'DD'),
+    ('%H', 'HH24'),
+    ('%I', 'HH12'),
+    ('%M', 'MI'),
+    ('%S', 'SS'),
+    ('%f', 'US'),
+    ('%p', 'AM'),
+    ('%z', 'TZH:TZM'),
+]
+
+
+def to_string_format(strftime_format):
+    """Convert a strftime format (%Y-%m-%d) to the string_format notation (YYYY-MM-DD)"""
+    if strftime_format is None:
+        return None
+    string_format = strftime_format
+    for directive, token in STRFTIME_TO_STRING_FORMAT:
+        string_format = string_format.replace(directive, token)
+    return string_format
+
+
+def to_strftime_format(string_format):
+    """Convert a string_format (YYYY-MM-DD) back to a strftime format (%Y-%m-%d)"""
+    if string_format is None:
+        return None
+    strftime_format = string_format
+    # Longest tokens first so YYYY is not read as two YY
+    for directive, token in sorted(STRFTIME_TO_STRING_FORMAT, key=lambda x: -len(x[1])):
+        strftime_format = strftime_format.replace(token, directive)
+    return strftime_format
+
+
+def format_has_time(strftime_format):
+    return '%H' in strftime_format or '%I' in strftime_format
+
+
+def get_sample(df_col, sample_size=DATETIME_FORMAT_SAMPLE_SIZE):
+    """
+    Values evenly spaced through the column, the same ones on every run
+    so a file is always given the same formats
+    """
+    if len(df_col.index) <= sample_size:
+        return df_col
+    return df_col.iloc[np.linspace(0, len(df_col.index) - 1, sample_size).astype(np.int64)]
+
+
+def guess_datetime_formats(df_col, sample_size=DATETIME_FORMAT_SAMPLE_SIZE):
+    """
+    Guess the datetime format of a sample of the column values and
+    return the formats found, most common first
+    """
+    df_col = get_sample(df_col, sample_size)
+
+    format_counts = Counter()
+    with warnings.catch_warnings():
+        # guess_datetime_format warns when it guesses a day first format
+        warnings.simplefilter('ignore')
+        for v in df_col:
+            strftime_format = guess_datetime_format(v)
+            if strftime_format is not None:
+                format_counts[strftime_format] += 1
+    return [strftime_format for strftime_format, _ in format_counts.most_common()]
+
+
+def parse_with_format(df_col, strftime_format):
+    """Return a boolean mask of the values that parse with the format"""
+    parsed = pd.to_datetime(df_col, format=strftime_format, errors='coerce')
+    return parsed.notna()
@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRECISION = 14
+MIN_PRECISION = 11 # The rank bits (64 - precision) must fit exactly in a float64
+MAX_PRECISION = 18
+
+HASH_BITS = 64
+
+
+class HyperLogLog(object):
+    """
+    HyperLogLog distinct value estimator.
+
+    Uses 2^precision one byte registers, so memory is fixed regardless of the
+    number of values added. The relative standard error of count() is
+    1.04 / sqrt(2^precision), ie. ~0.81% for the default precision of 14
+    (16KB per column); roughly 95% of estimates fall within twice that.
+    Sketches built from separate chunks or files can be merged with no loss
+    of accuracy as long as they share the same precision.
+    """
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        if precision < MIN_PRECISION or precision > MAX_PRECISION:
+            raise ValueError('HyperLogLog precision must be between {0} and {1}'.format(
+                MIN_PRECISION, MAX_PRECISION
+            ))
+        self.precision = precision
+        self.register_count = 1 << precision
+        self.registers = np.zeros(self.register_count, dtype=np.uint8)
+
+    @property
+    def standard_error(self):
+        return 1.04 / math.sqrt(self.register_count)
+
+    def add_values(self, values):
+        """Add a Series (or array like) of values to the sketch"""
+        if len(values) == 0:
+            return self
+        hashes = pd.util.hash_pandas_object(pd.Series(values, copy=False), index=False).to_numpy()
+        rank_bits = HASH_BITS - self.precision
+
+        register_index = (hashes >> np.uint64(rank_bits)).astype(np.int64)
+        remaining = (hashes & np.uint64((1 << rank_bits) - 1)).astype(np.float64)
+        # frexp returns the bit length of each (exactly representable) value
+        _, bit_length = np.frexp(remaining)
+        rank = (rank_bits - bit_length + 1).astype(np.uint8)
+
+        np.maximum.at(self.registers, register_index, rank)
+        return self
+
+    def merge(self, other):
+        if self.precision != other.precision:
+            raise ValueError('Cannot merge HyperLogLog sketches with different precision')
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = self.register_count
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+
+        # Small range correction : linear counting while there are empty registers
+        zero_registers = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zero_registers > 0:
+            estimate = m * math.log(m / zero_registers)
+
+        return int(round(estimate))
+
+
+def estimate_distinct_from_sample(value_counts, total_values):
+    """
+    Estimate the distinct values of a column of total_values from the value
+    counts of a uniform sample of it with the GEE estimator (Charikar et al.):
+    values seen once in the sample are scaled by sqrt(total / sample size),
+    values seen more often are counted once. The ratio error is bounded by
+    sqrt(total / sample size)
+    """
+    sample_size = int(value_counts.sum())
+    if sample_size == 0:
+        return 0
+    if total_values <= sample_size:
+        return len(value_counts)
+
+    seen_once = int((value_counts == 1).sum())
+    seen_more = len(value_counts) - seen_once
+    estimate = math.sqrt(total_values / sample_size) * seen_once + seen_more
+    return int(round(min(estimate, total_values)))
@@ -1,22 +1,61 @@
 
+import io
 import os
 import re 
-from decimal import Decimal
+import copy
+import contextlib
+import uuid
+import dataclasses
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
 import pandas as pd
 from dateutil.parser import parse as duparse
 
-from services.flat_file.flat_file_descriptor import FlatFileDescriptor, ColumnDataType
+from services.flat_file.flat_file_descriptor import (
+    FlatFileDescriptor,
+    ColumnDescriptor,
+    ColumnDataType,
+    DistinctCountMethod,
+    StatAccuracy
+)
+from services.flat_file.column_statistics import ColumnStatistics
+from services.flat_file.column_kernel import (
+    PANDAS_TYPE_MAP,
+    summarize_column,
+    get_distinct_values,
+    get_precision_and_scale
+)
+from services.flat_file.csv_reader import (
+    CsvReaderOptions,
+    read_csv,
+    CSV_TRUE_VALUES,
+    CSV_BOOLEAN_VALUES
+)
+from services.flat_file.record_index_set import RecordIndexSet
+from services.flat_file.profile_metrics import ProfileMetrics, ProfileStage, measure
+from services.flat_file.preview_sample import PreviewSample
+from services.flat_file.memory_budget import MemoryBudget
+from services.flat_file.compression import (
+    CsvSource, DecompressedStream, open_csv, detect_compression, detect_compression_bytes
+)
+from services.flat_file.profile_state import ProfileState, read_profile_state, write_profile_state, is_appended
+from services.flat_file.distinct_counter import (
+    HyperLogLog,
+    DEFAULT_PRECISION as DEFAULT_HLL_PRECISION,
+    estimate_distinct_from_sample
+)
+from services.flat_file.datetime_format import (
+    DATETIME_FORMAT_SAMPLE_SIZE,
+    get_sample,
+    guess_datetime_formats,
+    parse_with_format,
+    format_has_time,
+    to_string_format
+)
 from services.datasources.redshift.redshift_column_converter import FlatFileToRedshiftConverter
 
-PANDAS_TYPE_MAP = {
-    'string': ColumnDataType.STRING, 
-    'boolean': ColumnDataType.BOOLEAN,
-    'Int64': ColumnDataType.INTEGER,
-    'Float64': ColumnDataType.NUMERIC
-}
-
 RE_TRUE_STRING = re.compile(r'^(t(rue)?|yes)$', re.I)
 RE_FALSE_STRING = re.compile(r'^(f(alse)?|no)$', re.I)
 RE_DATETIME_INVALID_STRING = re.compile(r'[^0123456789ZT\:\/\-\s]', re.I)
@@ -24,25 +63,111 @@ MIN_DATETIME_STRING_LENGTH = 6 # We set this to 6 to ignore 5 digit dates : Days
 
 RECORD_INDEX_COL_NAME = '_record_index'
 
+# Files up to this size count distinct values exactly unless a method is requested
+EXACT_DISTINCT_MAX_FILE_SIZE = 64 * 1024 * 1024
+
+# Parallel profiling splits the columns into this many batches per worker
+BATCHES_PER_WORKER = 4
+
+# Rows per chunk when a file is profiled from a stream
+STREAM_CHUNK_SIZE = 100000
+
+# Share of the sampled rows a preview type may fail on, with 95% confidence, is below 3 / n
+PREVIEW_CONFIDENCE_RULE = 3
+
+# Data frames shared with forked workers so column data is never pickled
+_SHARED_DATA_FRAMES = {}
+
 ### Main DataProfiler class / entry point
 
 class FlatFile(object):
 
-    def __init__(self, file_path, original_file_name=None):
+    def __init__(self, file_path, original_file_name=None, chunk_size=None,
+                 distinct_method=None, hll_precision=DEFAULT_HLL_PRECISION, workers=None, stream=None,
+                 preview=False, csv_reader=None, incremental=False, previous_descriptor=None, memory_budget=None):
+        """
+        chunk_size: When set the file is profiled in chunks of chunk_size rows
+        and the data frame is only loaded if records are requested
+        distinct_method: DistinctCountMethod used for distinct_values, defaults to
+        EXACT for files up to EXACT_DISTINCT_MAX_FILE_SIZE and HYPERLOGLOG above
+        hll_precision: HyperLogLog precision, see services.flat_file.distinct_counter
+        workers: When greater than 1 batches of columns are profiled across a
+        pool of this many processes
+        stream: Binary file object the csv is parsed from, in chunks, while
+        file_path is still being written. See services.flat_file.stream_profiler
+        preview: Profile the first block and random byte ranges of the file only,
+        the descriptor is marked is_approximate. See services.flat_file.preview_sample
+        csv_reader: CsvReaderOptions (engine, Arrow strings, column projection, two phase
+        read) used when the whole file is read, see services.flat_file.csv_reader
+        incremental: Profile in chunks and keep the column statistics next to the file
+        so rows appended later can be profiled on their own, see services.flat_file.profile_state
+        previous_descriptor: Descriptor (or JsonDb dict) of an incremental profile of the
+        file, only the rows appended since are parsed and merged into its statistics.
+        The descriptor keeps its unique_id and version is incremented
+        memory_budget: Bytes profiling may hold. Files too large to profile whole are
+        read in chunks sized to the budget, and column statistics that outgrow their
+        share switch to bounded structures, listed in ColumnDescriptor.downgraded_stats.
+        See services.flat_file.memory_budget
+        Files and streams compressed with gzip, zstd or bzip2 are detected by their magic
+        bytes and decompressed as they are parsed. They have no random access so previews
+        and appended rows are profiled in full, see services.flat_file.compression
+        """
+        self.file_path = file_path
         self.data_frame = None 
-        self.file_descriptor = self._get_descriptor_for_file(file_path, original_file_name=original_file_name)
+        self.csv_reader = CsvReaderOptions() if csv_reader is None else csv_reader
+        self.hll_precision = hll_precision
+        self.workers = workers
+        self.compression = None if stream is not None or not os.path.isfile(file_path) else detect_compression(file_path)
+        self.incremental = (incremental or previous_descriptor is not None) and self.compression is None
+        self.memory_budget = None if memory_budget is None else MemoryBudget(memory_budget)
+        # Time and memory of each stage, attached to the descriptor
+        self.metrics = ProfileMetrics()
+        if stream is not None:
+            # The file size is not known until the stream ends
+            self.distinct_method = DistinctCountMethod(distinct_method or DistinctCountMethod.HYPERLOGLOG)
+            self.file_descriptor = self._get_descriptor_for_file_chunked(
+                file_path,
+                chunk_size or STREAM_CHUNK_SIZE,
+                original_file_name=original_file_name,
+                stream=stream
+            )
+        else:
+            self.distinct_method = FlatFile._get_distinct_method(file_path, distinct_method)
+            if previous_descriptor is not None:
+                self.file_descriptor = self._get_descriptor_for_appended_file(
+                    file_path,
+                    previous_descriptor,
+                    chunk_size or self._get_chunk_size(file_path),
+                    original_file_name=original_file_name
+                )
+            elif preview and self.compression is None:
+                self.file_descriptor = self._get_descriptor_for_file_preview(file_path, original_file_name=original_file_name)
+            elif chunk_size is None and not incremental and self._fits_in_memory(file_path):
+                self.file_descriptor = self._get_descriptor_for_file(file_path, original_file_name=original_file_name)
+            else:
+                self.file_descriptor = self._get_descriptor_for_file_chunked(
+                    file_path,
+                    chunk_size or self._get_chunk_size(file_path),
+                    original_file_name=original_file_name
+                )
+        self.file_descriptor.memory_budget = memory_budget
+        self.file_descriptor.metrics = self.metrics.finish()
 
     def _get_descriptor_for_file(self, file_path, original_file_name=None):
 
         # Enforce any file size checks here
         file_size = self._get_file_size(file_path)
 
-        self.data_frame = pd.read_csv(file_path)
+        csv_source = CsvSource(file_path)
+        with self.metrics.measure(ProfileStage.READ_CSV):
+            self.data_frame = read_csv(csv_source, self.csv_reader)
         total_records = len(self.data_frame.index)
         
         file_descriptor = FlatFileDescriptor(
             file_path,
             file_size=file_size,
+            compression=csv_source.compression,
+            uncompressed_size=csv_source.uncompressed_size,
             total_records=total_records,
             original_file_name=original_file_name
         )
@@ -50,24 +175,323 @@ class FlatFile(object):
         self.file_descriptor = FlatFile._get_column_list(
             file_descriptor,        
             self.data_frame,
-            total_records
+            total_records,
+            distinct_method=self.distinct_method,
+            hll_precision=self.hll_precision,
+            workers=self.workers,
+            metrics=self.metrics
         )
 
         # Calculate DDL 
-        ddl = self._get_ddl(self.file_descriptor)
+        with self.metrics.measure(ProfileStage.DDL):
+            ddl = self._get_ddl(self.file_descriptor)
         self.file_descriptor.ddl = ddl
 
         # Add a custome index field to the result set
         self.data_frame[RECORD_INDEX_COL_NAME] = self.data_frame.index + 1
         return self.file_descriptor
 
+    def _get_descriptor_for_file_chunked(self, file_path, chunk_size, original_file_name=None, stream=None):
+
+        if stream is None and self.compression is not None:
+            # Decompressed once as a stream rather than by every worker
+            FlatFile._get_file_size(file_path)
+            with open(file_path, 'rb') as compressed_file:
+                return self._get_descriptor_for_file_chunked(
+                    file_path, chunk_size, original_file_name=original_file_name, stream=compressed_file
+                )
+
+        if stream is not None:
+            compression = detect_compression_bytes(stream.peek(4)[:4]) if hasattr(stream, 'peek') else None
+            if compression is not None:
+                stream = io.BufferedReader(DecompressedStream(stream, compression))
+            try:
+                # Columns are read from the stream, they can not be split across workers
+                batch_results = [FlatFile._get_column_batch_chunked(
+                    file_path, chunk_size, None, self.distinct_method, self.hll_precision, stream=stream,
+                    keep_statistics=self.incremental, memory_budget=self.memory_budget
+                )]
+                if len(batch_results[0][1]) == 0:
+                    raise AssertionError('Dataframe requires column names')
+                file_descriptor = self._get_descriptor_from_batches(file_path, batch_results, original_file_name)
+                if compression is not None:
+                    file_descriptor.compression = compression
+                    file_descriptor.uncompressed_size = stream.raw.uncompressed_size
+                return file_descriptor
+            finally:
+                if compression is not None:
+                    stream.close()
+
+        column_names = list(pd.read_csv(file_path, nrows=0).columns)
+        if len(column_names) == 0:
+            raise AssertionError('Dataframe requires column names')
+
+        positions = list(range(len(column_names)))
+        if FlatFile._use_workers(self.workers, column_names):
+            batch_results = FlatFile._map_column_batches(
+                self.workers,
+                FlatFile._get_column_batch_chunked,
+                [
+                    (
+                        file_path, chunk_size, batch, self.distinct_method, self.hll_precision, None,
+                        self.incremental, self.memory_budget, len(column_names)
+                    )
+                    for batch in FlatFile._get_column_batches(positions, self.workers)
+                ]
+            )
+        else:
+            batch_results = [FlatFile._get_column_batch_chunked(
+                file_path, chunk_size, None, self.distinct_method, self.hll_precision,
+                keep_statistics=self.incremental, memory_budget=self.memory_budget
+            )]
+        return self._get_descriptor_from_batches(file_path, batch_results, original_file_name)
+
+    def _get_descriptor_from_batches(self, file_path, batch_results, original_file_name=None):
+
+        # Enforce any file size checks here
+        file_size = self._get_file_size(file_path)
+
+        total_records = batch_results[0][0]
+        file_descriptor = FlatFileDescriptor(
+            file_path,
+            file_size=file_size,
+            uncompressed_size=file_size,
+            total_records=total_records,
+            original_file_name=original_file_name
+        )
+        for _, columns, metrics, _ in batch_results:
+            for col_desc in columns:
+                file_descriptor.add_column_descriptor(col_desc)
+            self.metrics.merge(metrics)
+        self.file_descriptor = file_descriptor
+
+        # Calculate DDL 
+        with self.metrics.measure(ProfileStage.DDL):
+            ddl = self._get_ddl(self.file_descriptor)
+        self.file_descriptor.ddl = ddl
+
+        if self.incremental:
+            column_stats = [stats for _, _, _, batch_stats in batch_results for stats in batch_stats]
+            state = ProfileState(
+                [stats.column_name for stats in column_stats],
+                column_stats,
+                profiled_size=file_size,
+                total_records=total_records
+            )
+            with self.metrics.measure(ProfileStage.PROFILE_STATE):
+                write_profile_state(self.file_descriptor, state)
+        return self.file_descriptor
+
+    def _get_descriptor_for_appended_file(self, file_path, previous_descriptor, chunk_size, original_file_name=None):
+        """
+        Parse only the rows appended to the file since the previous profile and
+        merge them into its statistics. Files without kept statistics, or that
+        changed other than by an append, are profiled again in full
+        """
+        if dataclasses.is_dataclass(previous_descriptor):
+            previous_descriptor = dataclasses.asdict(previous_descriptor)
+        if original_file_name is None:
+            original_file_name = previous_descriptor.get('original_file_name')
+
+        with self.metrics.measure(ProfileStage.PROFILE_STATE):
+            state = read_profile_state(previous_descriptor.get('profile_state_path'))
+        if state is None or not is_appended(state, file_path):
+            file_descriptor = self._get_descriptor_for_file_chunked(file_path, chunk_size, original_file_name=original_file_name)
+        else:
+            file_size = self._get_file_size(file_path)
+            if self.memory_budget is not None:
+                # Statistics kept without a budget are held to the one given now
+                state_limit = self.memory_budget.get_column_state_limit(len(state.column_stats))
+                for stats in state.column_stats:
+                    stats.set_state_limit(state_limit)
+            FlatFile._update_profile_state(state, file_path, file_size, chunk_size, metrics=self.metrics)
+
+            file_descriptor = FlatFileDescriptor(
+                file_path,
+                file_size=file_size,
+                uncompressed_size=file_size,
+                total_records=state.total_records,
+                original_file_name=original_file_name
+            )
+            for stats in state.column_stats:
+                file_descriptor.add_column_descriptor(
+                    FlatFile._get_column_descriptor_from_statistics(stats, state.total_records)
+                )
+
+            # Calculate DDL 
+            with self.metrics.measure(ProfileStage.DDL):
+                file_descriptor.ddl = self._get_ddl(file_descriptor)
+            with self.metrics.measure(ProfileStage.PROFILE_STATE):
+                write_profile_state(file_descriptor, state)
+
+        file_descriptor.unique_id = previous_descriptor.get('unique_id') or file_descriptor.unique_id
+        file_descriptor.version = (previous_descriptor.get('version') or 1) + 1
+        self.file_descriptor = file_descriptor
+        return self.file_descriptor
+
+    @staticmethod
+    def _update_profile_state(state, file_path, file_size, chunk_size, metrics=None):
+        """Update the statistics of a ProfileState with the rows after its profiled_size"""
+        if file_size > state.profiled_size:
+            with open(file_path, 'rb') as f:
+                f.seek(state.profiled_size)
+                # The appended rows have no header, columns are named as they were profiled
+                reader = pd.read_csv(
+                    f,
+                    dtype=str,
+                    chunksize=chunk_size,
+                    header=None,
+                    names=state.column_names,
+                    index_col=False
+                )
+                while True:
+                    with measure(metrics, ProfileStage.READ_CSV):
+                        chunk = next(reader, None)
+                    if chunk is None:
+                        break
+                    # Record indexes carry on from the profiled rows
+                    chunk.index = chunk.index + state.total_records
+                    FlatFile._update_column_statistics(state.column_stats, chunk, metrics=metrics)
+
+        with measure(metrics, ProfileStage.DATETIME_RECHECK):
+            FlatFile._check_unchecked_datetime_chunks(file_path, chunk_size, state.column_stats)
+        state.total_records = state.column_stats[0].total_records if len(state.column_stats) > 0 else 0
+        state.profiled_size = file_size
+        return state
+
+    def _get_descriptor_for_file_preview(self, file_path, original_file_name=None):
+
+        # Enforce any file size checks here
+        file_size = self._get_file_size(file_path)
+
+        with self.metrics.measure(ProfileStage.PREVIEW_SAMPLE):
+            sample = PreviewSample(file_path)
+            df = None if sample.is_complete else sample.get_data_frame()
+        if df is None:
+            # Small files are read whole in less time than it takes to sample them
+            return self._get_descriptor_for_file(file_path, original_file_name=original_file_name)
+
+        sampled_records = len(df.index)
+        total_records = sample.estimate_records(sampled_records)
+        if len(df.columns) == 0:
+            raise AssertionError('Dataframe requires column names')
+
+        column_stats = [ColumnStatistics(column_name) for column_name in df.columns]
+        FlatFile._update_column_statistics(column_stats, df, metrics=self.metrics)
+
+        file_descriptor = FlatFileDescriptor(
+            file_path,
+            file_size=file_size,
+            total_records=total_records,
+            original_file_name=original_file_name,
+            is_approximate=True,
+            sampled_records=sampled_records
+        )
+        for position, stats in enumerate(column_stats):
+            col_desc = FlatFile._get_column_descriptor_from_statistics(stats, sampled_records)
+            col_desc = FlatFile._scale_preview_column(col_desc, df.iloc[:, position], total_records)
+            file_descriptor.add_column_descriptor(col_desc)
+        self.file_descriptor = file_descriptor
+
+        # Calculate DDL 
+        with self.metrics.measure(ProfileStage.DDL):
+            ddl = self._get_ddl(self.file_descriptor)
+        self.file_descriptor.ddl = ddl
+        return self.file_descriptor
+
+    @staticmethod
+    def _scale_preview_column(col_desc, col_values, total_records):
+        """Scale the statistics of a column of sampled rows to the estimated total_records"""
+        sampled_records = col_desc.total_records
+        sampled_values = col_values.dropna()
+        scale = (total_records / sampled_records) if sampled_records > 0 else 0
+
+        col_desc.total_records = total_records
+        col_desc.non_null_values = int(round(col_desc.non_null_values * scale))
+        col_desc.distinct_values = estimate_distinct_from_sample(
+            sampled_values.value_counts(),
+            col_desc.non_null_values
+        )
+        col_desc.distinct_ratio = (col_desc.distinct_values / total_records) if total_records > 0 else 0.00
+        col_desc.distinct_method = DistinctCountMethod.SAMPLE
+        col_desc.distinct_standard_error = None
+
+        # Row numbers of the sample are not row numbers in the file
+        for field_details in (col_desc.original_type, col_desc.potential_type):
+            if field_details is not None:
+                field_details.invalid_record_index = RecordIndexSet()
+
+        # Text holds any value, other types could still fail on a row that was not sampled
+        if col_desc.original_type.data_type == ColumnDataType.STRING and col_desc.potential_type is None:
+            col_desc.confidence = 1.0
+        elif len(sampled_values.index) == 0:
+            col_desc.confidence = 0.0
+        else:
+            col_desc.confidence = max(0.0, 1.0 - PREVIEW_CONFIDENCE_RULE / len(sampled_values.index))
+
+        col_desc.set_stat_accuracy(StatAccuracy.ESTIMATED)
+        return col_desc
+
     def get_file_descriptor(self):
         return self.file_descriptor
 
+    @staticmethod
+    def copy_file_descriptor(file_descriptor, file_path, original_file_name=None):
+        """
+        Reuse the profile of a file with identical content for another file.
+        The copy gets a new unique_id, file names and DDL
+        """
+        columns = copy.deepcopy(file_descriptor.columns)
+        new_descriptor = FlatFileDescriptor(
+            file_path,
+            original_file_name=original_file_name,
+            file_size=file_descriptor.file_size,
+            compression=file_descriptor.compression,
+            uncompressed_size=file_descriptor.uncompressed_size,
+            content_hash=file_descriptor.content_hash,
+            total_records=file_descriptor.total_records,
+            columns=columns,
+            # Identical content so the sidecar can be shared
+            sidecar_path=file_descriptor.sidecar_path,
+            sidecar_format_version=file_descriptor.sidecar_format_version,
+            row_index_path=file_descriptor.row_index_path,
+            row_index_format_version=file_descriptor.row_index_format_version
+        )
+        new_descriptor.ddl = FlatFile._get_ddl(new_descriptor)
+        return new_descriptor
+
     def get_records(self):
+        if self.data_frame is None:
+            self.data_frame = read_csv(self.file_path, self.csv_reader)
+            self.data_frame[RECORD_INDEX_COL_NAME] = self.data_frame.index + 1
         df = self.data_frame.replace({np.nan: None})
         return df.to_dict('records')
 
+    def _fits_in_memory(self, file_path):
+        if self.memory_budget is None:
+            return True
+        # The size of a compressed file is not known until it is decompressed
+        return self.compression is None and self.memory_budget.fits_in_memory(file_path)
+
+    def _get_chunk_size(self, file_path):
+        if self.memory_budget is None:
+            return STREAM_CHUNK_SIZE
+        return self.memory_budget.get_chunk_size(file_path)
+
+    @staticmethod
+    def _new_distinct_sketch(distinct_method, hll_precision=DEFAULT_HLL_PRECISION):
+        if distinct_method == DistinctCountMethod.HYPERLOGLOG:
+            return HyperLogLog(hll_precision)
+        return None
+
+    @staticmethod
+    def _get_distinct_method(file_path, distinct_method=None):
+        if distinct_method is not None:
+            return DistinctCountMethod(distinct_method)
+        if FlatFile._get_file_size(file_path) > EXACT_DISTINCT_MAX_FILE_SIZE:
+            return DistinctCountMethod.HYPERLOGLOG
+        return DistinctCountMethod.EXACT
+
     @staticmethod
     def _get_ddl(file_descriptor):
         table = FlatFileToRedshiftConverter.redshift_table_from_flatfile(
@@ -85,74 +509,418 @@ class FlatFile(object):
 
 
     @staticmethod
-    def _get_column_list(file_descriptor, df, total_records):
+    def _get_column_list(file_descriptor, df, total_records,
+                         distinct_method=DistinctCountMethod.EXACT, hll_precision=DEFAULT_HLL_PRECISION,
+                         workers=None, metrics=None):
         if (df.columns is None or len(df.columns) == 0):
             raise AssertionError('Dataframe requires column names')
 
-        pandas_converted_types = dict(df.convert_dtypes().dtypes)
-
-        value_counts = dict(df.notnull().sum())
-        distinct_counts = dict(df.nunique())
-
-        column_list = list(df.columns)
-        for col_name in column_list:
-            col_desc = file_descriptor.add_column(col_name)
-            col_desc.total_records = total_records
-            col_desc.non_null_values = value_counts[col_name] if col_name in value_counts else 0
-
-            # Distinct Value Counts
-            if col_name in distinct_counts:
-                distinct_count = distinct_counts[col_name]                
-                distinct_ratio = (distinct_count / total_records) if total_records > 0 else 0.00
-                col_desc.distinct_values = distinct_count
-                col_desc.distinct_ratio = distinct_ratio
-
-            # Drop Null and Duplicate Values
-            col_values_df = df[col_name].dropna().drop_duplicates()
-            row_count = len(col_values_df.index)
-
-            # Generic Value Types : String, Integer, Decimal, Boolean
-            if col_name in pandas_converted_types:
-                pandas_type = str(pandas_converted_types[col_name])
-                local_field_type = ColumnDataType.STRING if pandas_type not in PANDAS_TYPE_MAP else PANDAS_TYPE_MAP[pandas_type]
-                column_data_type = ColumnDataType.UNKNOWN if row_count == 0 else local_field_type
-                col_desc.add_original_type(column_data_type)
+        positions = list(range(len(df.columns)))
+        if FlatFile._use_workers(workers, df.columns):
+            # Forked workers read the columns from _SHARED_DATA_FRAMES, other
+            # start methods are sent only the columns in their batch
+            share_key = str(uuid.uuid4())
+            share_data_frame = FlatFile._get_worker_context().get_start_method() == 'fork'
+            if share_data_frame:
+                _SHARED_DATA_FRAMES[share_key] = df
+            try:
+                batch_results = FlatFile._map_column_batches(
+                    workers,
+                    FlatFile._get_column_batch,
+                    [
+                        (
+                            share_key if share_data_frame else [df.iloc[:, p] for p in batch],
+                            batch, total_records, distinct_method, hll_precision
+                        )
+                        for batch in FlatFile._get_column_batches(positions, workers)
+                    ]
+                )
+            finally:
+                _SHARED_DATA_FRAMES.pop(share_key, None)
+        else:
+            batch_results = [FlatFile._get_column_batch(
+                [df.iloc[:, p] for p in positions], positions, total_records, distinct_method, hll_precision
+            )]
+
+        for columns, batch_metrics in batch_results:
+            for col_desc in columns:
+                file_descriptor.add_column_descriptor(col_desc)
+            if metrics is not None:
+                metrics.merge(batch_metrics)
+        return file_descriptor
+
+    @staticmethod
+    def _get_column_batch(columns, positions, total_records, distinct_method, hll_precision):
+        """
+        Profile a batch of columns, columns is a list of Series or a _SHARED_DATA_FRAMES key.
+        Returns the column descriptors and the ProfileMetrics of the batch
+        """
+        if isinstance(columns, str):
+            df = _SHARED_DATA_FRAMES[columns]
+            columns = [df.iloc[:, p] for p in positions]
+        metrics = ProfileMetrics()
+        col_descs = [
+            FlatFile._get_column_descriptor(col_values, total_records, distinct_method, hll_precision, metrics=metrics)
+            for col_values in columns
+        ]
+        return col_descs, metrics
+
+    @staticmethod
+    def _get_column_descriptor(col_values, total_records,
+                               distinct_method=DistinctCountMethod.EXACT, hll_precision=DEFAULT_HLL_PRECISION,
+                               metrics=None):
+        # Single pass over the rows, see services.flat_file.column_kernel
+        sketch = FlatFile._new_distinct_sketch(distinct_method, hll_precision)
+        with measure(metrics, ProfileStage.COLUMN_SUMMARY, col_values.name):
+            summary = summarize_column(col_values, distinct_sketch=sketch)
+
+        col_desc = ColumnDescriptor(col_values.name)
+        col_desc.total_records = total_records
+        col_desc.non_null_values = summary.non_null_values
+
+        # Distinct Value Counts
+        if sketch is not None:
+            distinct_count = sketch.count()
+            col_desc.distinct_standard_error = sketch.standard_error
+        else:
+            distinct_count = summary.distinct_count
+        col_desc.distinct_values = distinct_count
+        col_desc.distinct_ratio = (distinct_count / total_records) if total_records > 0 else 0.00
+        col_desc.distinct_method = distinct_method
+
+        col_desc.add_original_type(summary.data_type)
+
+        # Max Values
+        if summary.data_type == ColumnDataType.INTEGER:
+            col_desc.original_type.max_value = summary.max_value
+        elif summary.data_type == ColumnDataType.STRING:
+            col_desc.original_type.max_length = summary.max_length
+            col_desc.original_type.precision = summary.max_length
+
+        # Sample Records
+        col_desc.sample_values = summary.sample_values
+
+        # Infer Data Types 
+        with measure(metrics, ProfileStage.TYPE_INFERENCE, col_values.name):
+            col_desc = FlatFile._infer_datatype(col_desc, summary)
+        return FlatFile._set_stat_accuracy(col_desc)
+
+    @staticmethod
+    def _get_column_batch_chunked(file_path, chunk_size, positions, distinct_method, hll_precision, stream=None,
+                                  keep_statistics=False, memory_budget=None, column_count=None):
+        """
+        Profile a batch of columns reading the file in chunks, only the columns
+        in the batch are parsed, positions None profiles every column. When a
+        stream is given the csv is parsed from it instead of file_path, which
+        must be complete once the stream ends. Compressed files are decompressed
+        as they are read. A MemoryBudget is shared between
+        the column_count columns of the file, by default the columns read.
+        Returns the total records, column descriptors, the ProfileMetrics of the batch
+        and, with keep_statistics, the ColumnStatistics of each column (else None)
+        """
+        metrics = ProfileMetrics()
+        column_stats = None
+        with open_csv(file_path) if stream is None else contextlib.nullcontext(stream) as source:
+            # Read raw strings so every chunk can be typed the way pandas would type the full file
+            reader = pd.read_csv(
+                source,
+                dtype=str,
+                chunksize=chunk_size,
+                usecols=positions
+            )
+            while True:
+                with metrics.measure(ProfileStage.READ_CSV):
+                    chunk = next(reader, None)
+                if chunk is None:
+                    break
+                if column_stats is None:
+                    state_limit = None
+                    if memory_budget is not None:
+                        state_limit = memory_budget.get_column_state_limit(column_count or len(chunk.columns))
+                    column_stats = [
+                        ColumnStatistics(
+                            column_name,
+                            distinct_sketch=FlatFile._new_distinct_sketch(distinct_method, hll_precision),
+                            # Used if exact distinct values outgrow the state_limit
+                            hll_precision=DEFAULT_HLL_PRECISION if hll_precision is None else hll_precision,
+                            state_limit=state_limit
+                        )
+                        for column_name in chunk.columns
+                    ]
+                FlatFile._update_column_statistics(column_stats, chunk, metrics=metrics)
+        column_stats = [] if column_stats is None else column_stats
+
+        with metrics.measure(ProfileStage.DATETIME_RECHECK):
+            FlatFile._check_unchecked_datetime_chunks(file_path, chunk_size, column_stats, file_positions=positions)
+
+        total_records = column_stats[0].total_records if len(column_stats) > 0 else 0
+        columns = [
+            FlatFile._get_column_descriptor_from_statistics(stats, total_records)
+            for stats in column_stats
+        ]
+        return total_records, columns, metrics, (column_stats if keep_statistics else None)
+
+    @staticmethod
+    def _use_workers(workers, column_names):
+        return workers is not None and workers > 1 and len(column_names) > 1
+
+    @staticmethod
+    def _get_column_batches(positions, workers):
+        """Split column positions into contiguous batches so results keep the column order"""
+        batch_count = min(len(positions), workers * BATCHES_PER_WORKER)
+        return [batch.tolist() for batch in np.array_split(np.array(positions), batch_count)]
+
+    @staticmethod
+    def _get_worker_context():
+        if 'fork' in multiprocessing.get_all_start_methods():
+            return multiprocessing.get_context('fork')
+        return multiprocessing.get_context()
+
+    @staticmethod
+    def _map_column_batches(workers, fn, batch_args):
+        """Run fn for each batch across a process pool, results are in batch order"""
+        with ProcessPoolExecutor(max_workers=workers, mp_context=FlatFile._get_worker_context()) as executor:
+            futures = [executor.submit(fn, *args) for args in batch_args]
+            return [future.result() for future in futures]
+
+    @staticmethod
+    def _update_column_statistics(column_stats, chunk, metrics=None):
+        """Update the running statistics of each column with a chunk of raw csv strings"""
+        chunk_start = chunk.index[0] if len(chunk.index) > 0 else 0
+        for position, stats in enumerate(column_stats):
+            col_values = chunk.iloc[:, position]
+            with measure(metrics, ProfileStage.COLUMN_STATISTICS, stats.column_name):
+                chunk_type, new_values_df = FlatFile._update_chunk_column_statistics(stats, col_values)
+            if chunk_type is None:
+                continue
+
+            # Datetime checks only apply to text, other chunks are checked
+            # later if the column ends up as a STRING
+            if chunk_type == ColumnDataType.STRING:
+                with measure(metrics, ProfileStage.TYPE_INFERENCE, stats.column_name):
+                    potential_types, parse_failures, formats = FlatFile._get_datetime_parse_results(
+                        new_values_df, known_formats=stats.datetime_formats
+                    )
+                stats.datetime_types.update(potential_types)
+                stats.add_datetime_parse_failures(parse_failures)
+                stats.datetime_formats.update(formats)
             else:
-                raise AssertionError("Data Type {0} not found in Map".format(pandas_type))
+                stats.datetime_unchecked_chunks.append((chunk_start, chunk_start + len(chunk.index)))
 
-            # Find Max Values
-            col_desc = FlatFile._get_max_column_values(col_desc, col_values_df)
+        return column_stats
 
-            # Fetch Sample Records
-            sample_size = 5 if row_count > 5 else row_count
-            if sample_size > 0:
-                sample_values_df = col_values_df.sample(n=sample_size)
-                sample_values = sample_values_df.tolist()
-                col_desc.sample_values = sample_values
-                
-            # Infer Data Types 
-            col_desc = FlatFile._infer_datatype(col_desc, col_values_df)
+    @staticmethod
+    def _update_chunk_column_statistics(stats, col_values):
+        """
+        Update the statistics of a column with its values in a chunk. Returns the
+        type of the chunk and its values not seen before, None if every value is null
+        """
+        stats.total_records += len(col_values.index)
 
-        return file_descriptor
+        # Drop Null and Duplicate Values
+        non_null_values, col_values_df = get_distinct_values(col_values)
+        stats.non_null_values += non_null_values
+        if len(col_values_df.index) == 0:
+            return None, None
+
+        chunk_type, typed_values = FlatFile._get_chunk_column_type(col_values_df)
+        stats.add_type_vote(chunk_type)
+
+        max_length = int(col_values_df.str.len().max())
+        stats.max_length = max_length if stats.max_length is None else max(stats.max_length, max_length)
+
+        if chunk_type in (ColumnDataType.INTEGER, ColumnDataType.NUMERIC):
+            FlatFile._update_numeric_statistics(stats, chunk_type, typed_values)
+
+        new_values_df = stats.add_distinct_values(col_values_df)
+        stats.add_sample_values(new_values_df)
+        return chunk_type, new_values_df
 
     @staticmethod
-    def _get_max_column_values(col_desc, df_col):
-        if col_desc.original_type.data_type == ColumnDataType.INTEGER:
-            # Fetch Max Value of Integer field
-            max_value = df_col.max()
-            max_value = int(max_value)
-            col_desc.original_type.max_value = max_value
-            
-        elif col_desc.original_type.data_type == ColumnDataType.STRING:
-            # Fetch MAX length of String Column Fields
-            max_length = df_col.map(len).max()
-            col_desc.original_type.max_length = int(max_length)
-            col_desc.original_type.precision = int(max_length)
+    def _get_chunk_column_type(col_values_df):
+        """
+        Type a column of non null raw csv strings the same way
+        read_csv followed by convert_dtypes would
+        """
+        if col_values_df.isin(CSV_BOOLEAN_VALUES).all():
+            return ColumnDataType.BOOLEAN, None
+        try:
+            typed_values = pd.to_numeric(col_values_df)
+        except (ValueError, TypeError):
+            return ColumnDataType.STRING, None
+
+        pandas_type = str(typed_values.convert_dtypes().dtype)
+        if pandas_type not in PANDAS_TYPE_MAP:
+            return ColumnDataType.STRING, None
+        return PANDAS_TYPE_MAP[pandas_type], typed_values
+
+    @staticmethod
+    def _update_numeric_statistics(stats, chunk_type, typed_values):
+        stats.has_float_values = stats.has_float_values or typed_values.dtype.kind == 'f'
+        if chunk_type == ColumnDataType.INTEGER:
+            max_value = int(typed_values.max())
+            stats.max_value = max_value if stats.max_value is None else max(stats.max_value, max_value)
+            # The largest digit counts of an integer column are at its extremes
+            typed_values = pd.Series([typed_values.min(), typed_values.max()])
+
+        # Numeric columns are read as floats so measure them the same way
+        precision, scale = FlatFile._get_precision_and_scale(typed_values.astype('float64'))
+        stats.precision = int(precision) if stats.precision is None else max(stats.precision, int(precision))
+        stats.scale = int(scale) if stats.scale is None else max(stats.scale, int(scale))
 
+    @staticmethod
+    def _check_unchecked_datetime_chunks(file_path, chunk_size, column_stats, file_positions=None,
+                                         string_columns=None):
+        """
+        Columns that widened to STRING after chunks of another type still need
+        those chunks checked for datetime values, re-read only those columns.
+        file_positions maps column_stats to the column positions in the file.
+        string_columns: Names of columns checked as STRING whatever their type in
+        this file, ie. columns that are STRING once merged with other files
+        """
+        file_positions = list(range(len(column_stats))) if file_positions is None else file_positions
+        string_columns = set() if string_columns is None else set(string_columns)
+        positions = [
+            position for position, stats in enumerate(column_stats)
+            if (stats.data_type == ColumnDataType.STRING or stats.column_name in string_columns)
+            and len(stats.datetime_unchecked_chunks) > 0
+        ]
+        if len(positions) == 0:
+            return column_stats
+
+        seen_values = {position: set() for position in positions}
+        usecols = [file_positions[position] for position in positions]
+        # Rows after the last unchecked chunk are not read
+        nrows = max(stop for position in positions for _, stop in column_stats[position].datetime_unchecked_chunks)
+        with open_csv(file_path) as source:
+            reader = pd.read_csv(source, dtype=str, chunksize=chunk_size, usecols=usecols, nrows=nrows)
+            for chunk in reader:
+                for i, position in enumerate(positions):
+                    stats = column_stats[position]
+                    unchecked_mask = FlatFile._get_row_ranges_mask(chunk.index, stats.datetime_unchecked_chunks)
+                    if not unchecked_mask.any():
+                        continue
+                    col_values_df = chunk.iloc[:, i][unchecked_mask].dropna().drop_duplicates()
+                    seen = seen_values[position]
+                    col_values_df = col_values_df[~col_values_df.isin(seen)]
+                    seen.update(col_values_df)
+
+                    potential_types, parse_failures, formats = FlatFile._get_datetime_parse_results(
+                        col_values_df, known_formats=stats.datetime_formats
+                    )
+                    stats.datetime_types.update(potential_types)
+                    stats.add_datetime_parse_failures(parse_failures)
+                    stats.datetime_formats.update(formats)
+
+        for position in positions:
+            column_stats[position].datetime_unchecked_chunks = []
+        return column_stats
+
+    @staticmethod
+    def _get_row_ranges_mask(index, row_ranges):
+        """Rows of a chunk index that fall in any of the (start, stop) row ranges"""
+        mask = np.zeros(len(index), dtype=bool)
+        if len(index) == 0:
+            return mask
+        chunk_start, chunk_stop = index[0], index[-1] + 1
+        for start, stop in row_ranges:
+            if start < chunk_stop and stop > chunk_start:
+                mask |= (index >= start) & (index < stop)
+        return mask
+
+    @staticmethod
+    def _get_column_descriptor_from_statistics(stats, total_records):
+        col_desc = ColumnDescriptor(stats.column_name)
+        col_desc.total_records = total_records
+        col_desc.non_null_values = stats.non_null_values
+
+        # Distinct Value Counts
+        distinct_count = FlatFile._get_distinct_count(stats)
+        distinct_ratio = (distinct_count / total_records) if total_records > 0 else 0.00
+        col_desc.distinct_values = distinct_count
+        col_desc.distinct_ratio = distinct_ratio
+        if stats.distinct_sketch is not None:
+            col_desc.distinct_method = DistinctCountMethod.HYPERLOGLOG
+            col_desc.distinct_standard_error = stats.distinct_sketch.standard_error
+
+        column_data_type = stats.data_type
+        col_desc.add_original_type(column_data_type)
+
+        # Max Values
+        if column_data_type == ColumnDataType.INTEGER:
+            col_desc.original_type.max_value = stats.max_value
+        elif column_data_type == ColumnDataType.STRING:
+            col_desc.original_type.max_length = stats.max_length
+            col_desc.original_type.precision = stats.max_length
+
+        # Sample Records
+        if len(stats.sample_values) > 0:
+            col_desc.sample_values = FlatFile._convert_statistics_values(
+                stats, stats.sample_values
+            ).tolist()
+
+        # Infer Data Types
+        col_desc = FlatFile._infer_datatype_from_statistics(col_desc, stats)
+        col_desc = FlatFile._set_stat_accuracy(col_desc)
+
+        # Statistics switched to bounded structures to fit a memory budget
+        col_desc.downgraded_stats = sorted(stats.downgraded_stats)
+        col_desc.set_stat_accuracy(StatAccuracy.ESTIMATED, stats=col_desc.downgraded_stats)
+        return col_desc
+
+    @staticmethod
+    def _set_stat_accuracy(col_desc):
+        col_desc.set_stat_accuracy(StatAccuracy.EXACT)
+        if col_desc.distinct_method != DistinctCountMethod.EXACT:
+            col_desc.set_stat_accuracy(StatAccuracy.ESTIMATED, stats=['distinct_values', 'distinct_ratio'])
         return col_desc
 
     @staticmethod
-    def _infer_datatype(column_description, df_col):
+    def _convert_statistics_values(stats, values):
+        """Convert raw csv strings to the values pandas would hold for the column"""
+        values = pd.Series(list(values), dtype=object)
+        if stats.data_type == ColumnDataType.BOOLEAN:
+            return values.isin(CSV_TRUE_VALUES)
+        if stats.data_type in (ColumnDataType.INTEGER, ColumnDataType.NUMERIC):
+            values = pd.to_numeric(values)
+            # Integer columns with nulls are held as floats by pandas
+            if stats.has_float_values or stats.non_null_values < stats.total_records:
+                values = values.astype('float64')
+        return values
+
+    @staticmethod
+    def _get_distinct_count(stats):
+        # Sketches count distinct raw strings
+        if stats.distinct_sketch is not None or stats.data_type in (ColumnDataType.STRING, ColumnDataType.UNKNOWN):
+            return stats.distinct_count
+        # Different strings can hold the same typed value ie. 1 and 1.0
+        return int(FlatFile._convert_statistics_values(stats, stats.distinct_set).nunique())
+
+    @staticmethod
+    def _infer_datatype(column_description, summary):
+
+        if column_description.original_type.data_type == ColumnDataType.STRING:
+
+            # Check for potential Boolean Values 
+            if FlatFile._is_string_boolean(column_description):
+                column_description.potential_type = column_description.add_potential_type(ColumnDataType.BOOLEAN)
+            else:
+                # Check for potential Date Formats
+                dt_type, parse_failures, string_format = FlatFile._string_datetime_type(summary.distinct_values)
+                FlatFile._add_datetime_potential_type(column_description, dt_type, parse_failures, string_format)
+
+        elif column_description.original_type.data_type == ColumnDataType.INTEGER:
+            if FlatFile._is_integer_boolean(column_description):
+                column_description.potential_type = column_description.add_potential_type(ColumnDataType.BOOLEAN)
+            
+        elif column_description.original_type.data_type == ColumnDataType.NUMERIC:
+            column_description.original_type.precision = summary.precision
+            column_description.original_type.scale = summary.scale
+
+        return column_description
+
+    @staticmethod
+    def _infer_datatype_from_statistics(column_description, stats):
 
         if column_description.original_type.data_type == ColumnDataType.STRING:
 
@@ -161,25 +929,32 @@ class FlatFile(object):
                 column_description.potential_type = column_description.add_potential_type(ColumnDataType.BOOLEAN)
             else:
                 # Check for potential Date Formats
-                dt_type, parse_failures = FlatFile._string_datetime_type(df_col)
-                if dt_type is not None:
-                    if dt_type == 'DATETIME':
-                        column_description.potential_type = column_description.add_potential_type(ColumnDataType.DATETIME)
-                    else:
-                        column_description.potential_type = column_description.add_potential_type(ColumnDataType.DATE)
-                    column_description.potential_type.invalid_record_index = parse_failures
+                dt_type, parse_failures, string_format = FlatFile._resolve_datetime_type(
+                    stats.datetime_types, stats.datetime_parse_failures, stats.datetime_formats
+                )
+                FlatFile._add_datetime_potential_type(column_description, dt_type, parse_failures, string_format)
 
         elif column_description.original_type.data_type == ColumnDataType.INTEGER:
             if FlatFile._is_integer_boolean(column_description):
                 column_description.potential_type = column_description.add_potential_type(ColumnDataType.BOOLEAN)
             
         elif column_description.original_type.data_type == ColumnDataType.NUMERIC:
-            precision, scale = FlatFile._get_precision_and_scale(df_col)
-            column_description.original_type.precision = precision
-            column_description.original_type.scale = scale
+            column_description.original_type.precision = stats.precision
+            column_description.original_type.scale = stats.scale
 
         return column_description
 
+    @staticmethod
+    def _add_datetime_potential_type(column_description, dt_type, parse_failures, string_format=None):
+        if dt_type is not None:
+            if dt_type == 'DATETIME':
+                column_description.potential_type = column_description.add_potential_type(ColumnDataType.DATETIME)
+            else:
+                column_description.potential_type = column_description.add_potential_type(ColumnDataType.DATE)
+            column_description.potential_type.invalid_record_index = parse_failures
+            column_description.potential_type.string_format = string_format
+        return column_description
+
 
     @staticmethod
     def _is_integer_boolean(column_description):
@@ -211,26 +986,7 @@ class FlatFile(object):
     # Numeric helper methods
     @staticmethod
     def _get_precision_and_scale(df_col, sample_size=None):
-        """
-        Given a numeric column convert to a naive Decimal
-        and calculate the maximum precision and scale of the 
-        dataset. 
-        Precision:  Total Digits
-        Scale :     Total number of digits after the decimal
-        """
-        df = df_col.copy()
-        decimal_tuple = df.map(FlatFile._convert_float_to_decimal_tuple)
-
-        max_precision = decimal_tuple.map(lambda x: len(x.digits)).max()
-        max_scale = decimal_tuple.map(lambda x: abs(x.exponent)).max()
-
-        return max_precision, max_scale
-
-    @staticmethod
-    def _convert_float_to_decimal_tuple(val):
-        val_str = str(val)
-        val_d = Decimal(val_str)
-        return val_d.as_tuple()
+        return get_precision_and_scale(df_col, sample_size=sample_size)
 
     # Datetime parsing helper methods 
         
@@ -238,33 +994,112 @@ class FlatFile(object):
     def _string_datetime_type(df_col, sample_size=None):
         val_count = len(df_col.index)
         if val_count == 0:
-            return False
+            return None, None, None
 
         if sample_size is not None:
-            sample_size = val_count if val_count < sample_size else sample_size
-            df_col = df_col.sample(n=sample_size)
-        
-        # For each Value in the Column : Attempt to parse it as a datetime
+            df_col = get_sample(df_col, sample_size)
+
+        potential_types, parse_failures, formats = FlatFile._get_datetime_parse_results(df_col)
+        return FlatFile._resolve_datetime_type(potential_types, parse_failures, formats)
+
+    @staticmethod
+    def _get_datetime_parse_results(df_col, known_formats=None):
+        """
+        Parse a column of strings as datetimes. Formats are guessed from a sample
+        and each is checked against the column with a single vectorized parse.
+        dateutil is only used for the values left over when a column mixes
+        formats (or has none that pandas recognises)
+        Returns the potential types, parse failure indexes and the formats that
+        matched, where None stands for values that needed dateutil
+        """
         potential_types = set([])
-        parse_failures = []
-        for i, v in df_col.items():
-            if FlatFile._is_potential_datetime(v):
-                dt_val, dt_type = FlatFile._try_parse_datetime(v)
-                if dt_val is not None:
-                    potential_types.add(dt_type)
-                else:
-                    # Not a valid Date
-                    parse_failures.append(i)
-            else:
-                # If this record is now a potential datetime but 
-                # we find additional records, treat it as a parse failure
-                parse_failures.append(i)
-    
+        matched_formats = set([])
+        if len(df_col.index) == 0:
+            return potential_types, RecordIndexSet(), matched_formats
+
+        parsed_mask = pd.Series(False, index=df_col.index)
+        remaining_df = df_col[FlatFile._potential_datetime_mask(df_col)]
+
+        # Formats matched by earlier chunks are tried first, only the values
+        # they leave are sampled to guess more formats
+        known_formats = [] if known_formats is None else [f for f in known_formats if f is not None]
+        for strftime_format in known_formats:
+            remaining_df = FlatFile._parse_datetime_format(
+                remaining_df, strftime_format, parsed_mask, potential_types, matched_formats
+            )
+
+        # A format used by few values may not be in the sample, the values left
+        # are sampled again until a sample has no format that matches them
+        tried_formats = set(known_formats)
+        while len(remaining_df.index) > 0:
+            remaining_count = len(remaining_df.index)
+            for strftime_format in guess_datetime_formats(remaining_df):
+                if len(remaining_df.index) == 0:
+                    break
+                if strftime_format not in tried_formats:
+                    tried_formats.add(strftime_format)
+                    remaining_df = FlatFile._parse_datetime_format(
+                        remaining_df, strftime_format, parsed_mask, potential_types, matched_formats
+                    )
+            if len(remaining_df.index) == remaining_count:
+                break
+
+        # Values no format matched are only failures once dateutil cannot parse them either
+        if len(remaining_df.index) > 0:
+            dateutil_types, dateutil_mask = FlatFile._dateutil_parse_results(
+                remaining_df, sample_only=len(matched_formats) == 0
+            )
+            if dateutil_mask.any():
+                matched_formats.add(None)
+                potential_types.update(dateutil_types)
+                parsed_mask[remaining_df.index[dateutil_mask]] = True
+
+        parse_failures = RecordIndexSet.from_indexes(df_col.index[~parsed_mask.to_numpy()])
+        return potential_types, parse_failures, matched_formats
+
+    @staticmethod
+    def _parse_datetime_format(remaining_df, strftime_format, parsed_mask, potential_types, matched_formats):
+        """Mark the values that parse with the format and return the ones left"""
+        if len(remaining_df.index) == 0:
+            return remaining_df
+        format_mask = parse_with_format(remaining_df, strftime_format)
+        if not format_mask.any():
+            return remaining_df
+        matched_formats.add(strftime_format)
+        potential_types.add('DATETIME' if format_has_time(strftime_format) else 'DATE')
+        parsed_mask[remaining_df.index[format_mask]] = True
+        return remaining_df[~format_mask]
+
+    @staticmethod
+    def _dateutil_parse_results(df_col, sample_only=False):
+        """
+        Parse each value with dateutil. With sample_only a sample is tried first
+        and the full column is only parsed if something in the sample is a date
+        """
+        if sample_only and len(df_col.index) > DATETIME_FORMAT_SAMPLE_SIZE:
+            sample_types, sample_mask = FlatFile._dateutil_parse_results(get_sample(df_col))
+            if not sample_mask.any():
+                return sample_types, pd.Series(False, index=df_col.index)
+
+        potential_types = set([])
+        parsed = []
+        for v in df_col:
+            dt_val, dt_type = FlatFile._try_parse_datetime(v)
+            if dt_val is not None:
+                potential_types.add(dt_type)
+            parsed.append(dt_val is not None)
+        return potential_types, pd.Series(parsed, index=df_col.index, dtype=bool)
+
+    @staticmethod
+    def _resolve_datetime_type(potential_types, parse_failures, formats=None):
         if len(potential_types) > 0:
             # If more than 1 date format is returned default to DATETIME 
             potential_type = 'DATETIME' if len(potential_types) > 1 else list(potential_types).pop()
-            return potential_type, parse_failures
-        return None, None
+            # A string format is only known if every value matched the same one
+            formats = set([]) if formats is None else formats
+            string_format = to_string_format(list(formats)[0]) if len(formats) == 1 else None
+            return potential_type, parse_failures, string_format
+        return None, None, None
                    
     @staticmethod
     def _try_parse_datetime(val):
@@ -279,6 +1114,8 @@ class FlatFile(object):
             return None, None
         except ValueError: 
             return None, None
+        except OverflowError: # Digits dateutil reads as a year or day too large for a date
+            return None, None
     
     @staticmethod
     def _date_has_time_component(val):
@@ -290,6 +1127,12 @@ class FlatFile(object):
                 return True 
         return False 
 
+    @staticmethod
+    def _potential_datetime_mask(df_col):
+        """Vectorized _is_potential_datetime"""
+        df_col = df_col.astype(str)
+        return (df_col.str.len() >= MIN_DATETIME_STRING_LENGTH) & ~df_col.str.contains(RE_DATETIME_INVALID_STRING)
+
     @staticmethod
     def _is_potential_datetime(val):
         if len(val) < MIN_DATETIME_STRING_LENGTH:
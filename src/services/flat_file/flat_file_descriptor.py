@@ -4,6 +4,10 @@ import pathlib
 
 from enum import Enum
 
+from services.flat_file.record_index_set import RecordIndexSet
+from services.flat_file.profile_metrics import ProfileMetrics
+from services.flat_file.compression import FileCompression, COMPRESSED_EXTENSIONS
+
 
 class ColumnDataType(str, Enum): # Declaring as a subsclass of string so we json json serialize this
     STRING = "STRING",
@@ -14,6 +18,30 @@ class ColumnDataType(str, Enum): # Declaring as a subsclass of string so we json
     BOOLEAN = "BOOLEAN"
     UNKNOWN = "UNKNOWN"
 
+class DistinctCountMethod(str, Enum):
+    EXACT = "EXACT"
+    HYPERLOGLOG = "HYPERLOGLOG" # Estimated, see services.flat_file.distinct_counter for the error bound
+    SAMPLE = "SAMPLE" # Estimated from a sample of rows, see estimate_distinct_from_sample
+
+class StatAccuracy(str, Enum):
+    EXACT = "EXACT"
+    ESTIMATED = "ESTIMATED"
+
+# ColumnDescriptor statistics listed in ColumnDescriptor.stat_accuracy
+COLUMN_STATS = [
+    'total_records',
+    'non_null_values',
+    'distinct_values',
+    'distinct_ratio',
+    'data_type',
+    'max_length',
+    'max_value',
+    'precision',
+    'scale',
+    'string_format',
+    'invalid_record_index'
+]
+
 # Column Definitions
 @dataclasses.dataclass 
 class ColumnFieldDetails:
@@ -24,7 +52,7 @@ class ColumnFieldDetails:
     max_length: int = 0 
     max_value: int = 0
     string_format: str = None # String representation of the field format (ie. YYYY-MM-DD, ##.00)
-    invalid_record_index: list[any] = dataclasses.field(default_factory=list) # Store index reference to any rows that would fail parsing to the data_type
+    invalid_record_index: RecordIndexSet = dataclasses.field(default_factory=RecordIndexSet) # Store index reference to any rows that would fail parsing to the data_type
 
 @dataclasses.dataclass
 class ColumnDescriptor:
@@ -38,6 +66,11 @@ class ColumnDescriptor:
     non_null_values: int = 0
     distinct_values: int = 0
     distinct_ratio: float = 0.00
+    distinct_method: DistinctCountMethod = DistinctCountMethod.EXACT
+    distinct_standard_error: float = 0.00 # Relative standard error of distinct_values, None when unknown
+    confidence: float = 1.0 # Confidence that the types hold for every row, below 1 for preview profiles
+    stat_accuracy: dict[str, StatAccuracy] = dataclasses.field(default_factory=dict) # COLUMN_STATS name to StatAccuracy
+    downgraded_stats: list[str] = dataclasses.field(default_factory=list) # COLUMN_STATS estimated to fit FlatFileDescriptor.memory_budget
 
 
     def add_original_type(self, column_data_type):
@@ -48,6 +81,10 @@ class ColumnDescriptor:
         self.potential_type = ColumnFieldDetails(column_data_type)
         return self.potential_type
 
+    def set_stat_accuracy(self, accuracy, stats=COLUMN_STATS):
+        for stat in stats:
+            self.stat_accuracy[stat] = StatAccuracy(accuracy)
+
     @property
     def column_type_display(self) -> str:
         """Return a text friendly description of the data type"""
@@ -75,10 +112,23 @@ class FlatFileDescriptor:
     file_display_name: str = None
     unique_id: str = None
     version: int = 1
-    file_size: int = None
+    is_approximate: bool = False # Preview profile of a sample of the file, replaced by the exact profile
+    sampled_records: int = None # Records the preview profile read
+    file_size: int = None # Bytes on disk, compressed for compressed files
+    compression: FileCompression = None # Compression detected by magic bytes, None for plain csv files
+    uncompressed_size: int = None # Bytes of the csv once decompressed
+    content_hash: str = None # sha256 of the file content
     total_records: int = 0
     columns: list[ColumnDescriptor] = dataclasses.field(default_factory=list)
     ddl: str = None
+    sidecar_path: str = None # Typed columnar copy of the file, see services.flat_file.columnar_sidecar
+    sidecar_format_version: int = None
+    row_index_path: str = None # Byte offsets of every Nth row of the csv, see services.flat_file.row_index
+    row_index_format_version: int = None
+    profile_state_path: str = None # Mergeable column statistics for incremental profiles, see services.flat_file.profile_state
+    profiled_size: int = None # Bytes of the file profile_state_path covers, appended rows are profiled from here
+    memory_budget: int = None # Bytes profiling was limited to, see services.flat_file.memory_budget
+    metrics: ProfileMetrics = None # Time and memory of each profiling stage, see services.flat_file.profile_metrics
 
     def __post_init__(self):
         self.unique_id = str(uuid.uuid4())
@@ -90,6 +140,9 @@ class FlatFileDescriptor:
 
     def add_column(self, column_name: str):
         column = ColumnDescriptor(column_name)
+        return self.add_column_descriptor(column)
+
+    def add_column_descriptor(self, column: ColumnDescriptor):
         next_position = len(self.columns)
         column.ordinal_position = next_position
         self.columns.append(column)
@@ -97,8 +150,14 @@ class FlatFileDescriptor:
 
     def parse_filename(self, file_path):
         path_details = pathlib.Path(file_path)        
+        # ie. feed.csv.gz is the feed table with a .csv.gz extension
+        stem = path_details.stem
+        suffix = path_details.suffix
+        if suffix.lower() in COMPRESSED_EXTENSIONS and pathlib.Path(stem).suffix != '':
+            suffix = pathlib.Path(stem).suffix + suffix
+            stem = pathlib.Path(stem).stem
         return [
             path_details.name, 
-            path_details.suffix,
-            path_details.stem
+            suffix,
+            stem
         ]
@@ -0,0 +1,390 @@
+import io
+import os
+import json
+import base64
+import binascii
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+from common.utils.json_encoder import dumps
+from services.flat_file.flat_file_descriptor import ColumnDataType
+from services.flat_file.flat_file import RECORD_INDEX_COL_NAME
+from services.flat_file import columnar_sidecar
+from services.flat_file.record_index_set import RecordIndexSet
+from services.flat_file.row_index import read_row_index
+from services.flat_file.compression import open_csv
+
+READ_CHUNK_SIZE = 10000
+ROWS_PAGE_SIZE = 100000 # Rows of a RecordIndexSet expanded at a time by find_rows
+
+# Columns that must keep their csv text even when a chunk looks numeric
+TEXT_DATA_TYPES = [
+    ColumnDataType.STRING,
+    ColumnDataType.DATE,
+    ColumnDataType.DATETIME,
+    ColumnDataType.UNKNOWN
+]
+
+
+class FlatFileReader(object):
+    """
+    Read pages of records from a profiled file without profiling it again.
+    The column types of the descriptor are applied to each chunk so every
+    page holds the same types no matter which rows it contains.
+    Rows are read from the columnar sidecar when there is one, the csv otherwise.
+    The csv is parsed from the nearest row of its row index (see
+    services.flat_file.row_index) rather than from its first row.
+    Only the columns asked for are read, find_rows reads the columns of
+    its filters alone
+    """
+
+    def __init__(self, file_path, column_types=None, chunk_size=READ_CHUNK_SIZE,
+                 sidecar_path=None, sidecar_format_version=None, row_index_path=None, row_index_format_version=None):
+        self.file_path = file_path
+        self.column_types = {} if column_types is None else column_types
+        self.chunk_size = chunk_size
+        self.sidecar_path = sidecar_path
+        self.sidecar_format_version = sidecar_format_version
+        self.row_index_path = row_index_path
+        self.row_index_format_version = row_index_format_version
+        self._row_index = None
+
+    @staticmethod
+    def from_descriptor(file_descriptor, chunk_size=READ_CHUNK_SIZE):
+        """Build a reader from a FlatFileDescriptor or the descriptor dict stored in the JsonDb"""
+        if dataclasses.is_dataclass(file_descriptor):
+            file_descriptor = {
+                'local_file_path': file_descriptor.local_file_path,
+                'sidecar_path': file_descriptor.sidecar_path,
+                'sidecar_format_version': file_descriptor.sidecar_format_version,
+                'row_index_path': file_descriptor.row_index_path,
+                'row_index_format_version': file_descriptor.row_index_format_version,
+                'columns': [
+                    {'column_name': c.column_name, 'original_type': dataclasses.asdict(c.original_type)}
+                    for c in file_descriptor.columns if c.original_type is not None
+                ]
+            }
+
+        column_types = {}
+        for column in file_descriptor['columns']:
+            original_type = column.get('original_type') or {}
+            data_type = original_type.get('data_type')
+            if data_type is not None:
+                column_types[column['column_name']] = ColumnDataType(data_type)
+        return FlatFileReader(
+            file_descriptor['local_file_path'],
+            column_types,
+            chunk_size=chunk_size,
+            sidecar_path=file_descriptor.get('sidecar_path'),
+            sidecar_format_version=file_descriptor.get('sidecar_format_version'),
+            row_index_path=file_descriptor.get('row_index_path'),
+            row_index_format_version=file_descriptor.get('row_index_format_version')
+        )
+
+    def has_sidecar(self):
+        return columnar_sidecar.has_sidecar(self.sidecar_path, self.sidecar_format_version)
+
+    def write_sidecar(self, file_descriptor):
+        """Write the typed columnar sidecar of the csv and record it on the descriptor"""
+        return columnar_sidecar.write_sidecar(
+            file_descriptor,
+            self._iter_csv_chunks(),
+            self.column_types
+        )
+
+    def append_sidecar(self, file_descriptor, previous_sidecar_path, previous_records, byte_offset):
+        """
+        Write the sidecar of a file rows were appended to after byte_offset, only
+        those rows are parsed and the previous_records rows before them are copied
+        from previous_sidecar_path. Returns None without writing when it can not be
+        reused, see columnar_sidecar.append_sidecar
+        """
+        return columnar_sidecar.append_sidecar(
+            file_descriptor,
+            previous_sidecar_path,
+            previous_records,
+            self._iter_csv_chunks_after(byte_offset),
+            self.column_types
+        )
+
+    def get_row_index(self):
+        """The RowIndex of the csv, None if it has none"""
+        if self._row_index is None and self.row_index_path is not None:
+            self._row_index = read_row_index(self.row_index_path, self.row_index_format_version)
+        return self._row_index
+
+    def iter_chunks(self, offset=0, limit=None, rows=None, columns=None):
+        """
+        Yield data frames of at most chunk_size records starting at row offset.
+        rows: Sorted row numbers (from 0) to read instead, ie. a page of a RecordIndexSet
+        columns: Names of the only columns to read, in the order to return them
+        """
+        if rows is not None:
+            if len(rows) == 0:
+                return
+            offset = 0
+            if self.has_sidecar():
+                chunks = columnar_sidecar.iter_sidecar_rows(self.sidecar_path, rows, columns=columns)
+            else:
+                chunks = self._iter_csv_rows(rows, columns=columns)
+        elif limit is not None and limit <= 0:
+            return
+        elif self.has_sidecar():
+            chunks = columnar_sidecar.iter_sidecar_chunks(self.sidecar_path, offset=offset, limit=limit, columns=columns)
+        else:
+            chunks = self._iter_csv_chunks(offset=offset, limit=limit, columns=columns)
+
+        for chunk in chunks:
+            chunk[RECORD_INDEX_COL_NAME] = chunk.index + offset + 1
+            yield chunk
+
+    def iter_text_chunks(self, offset=0, limit=None):
+        """
+        Yield data frames of at most chunk_size records starting at row offset
+        holding the csv text of every column, nulls as NaN. The csv is always
+        read since the sidecar only holds typed values
+        """
+        if limit is not None and limit <= 0:
+            return
+        for chunk in self._iter_csv_chunks(offset=offset, limit=limit, dtype=str):
+            chunk[RECORD_INDEX_COL_NAME] = chunk.index + offset + 1
+            yield chunk
+
+    def find_rows(self, filters, rows=None):
+        """
+        RecordIndexSet of the rows (from 0) that match every RecordFilter.
+        Only the columns of the filters are read and each is evaluated on a
+        whole chunk at a time.
+        rows: RecordIndexSet of the only rows to check, ie. the invalid rows of a column
+        """
+        columns = list(dict.fromkeys(f.column_name for f in filters))
+        matches = RecordIndexSet()
+        for chunk in self._iter_chunks_of_rows(rows, columns):
+            mask = np.ones(len(chunk.index), dtype=bool)
+            for record_filter in filters:
+                mask &= record_filter.get_mask(chunk[record_filter.column_name])
+            # _record_index counts from 1
+            matches.add_indexes(chunk[RECORD_INDEX_COL_NAME].to_numpy(dtype=np.int64)[mask] - 1)
+        return matches
+
+    def _iter_chunks_of_rows(self, rows, columns):
+        """Chunks of the rows of a RecordIndexSet, every row if it is None"""
+        if rows is None:
+            yield from self.iter_chunks(columns=columns)
+            return
+        if rows.count == 0:
+            return
+
+        if self.has_sidecar() or self.get_row_index() is not None:
+            # Rows are read in pages so the set is never expanded whole
+            for offset in range(0, rows.count, ROWS_PAGE_SIZE):
+                yield from self.iter_chunks(rows=rows.page(offset=offset, limit=ROWS_PAGE_SIZE), columns=columns)
+            return
+
+        # Without either the csv is read once up to the last row, each chunk
+        # takes the rows of the runs that overlap it
+        for chunk in self.iter_chunks(limit=int(rows.starts[-1] + rows.lengths[-1]), columns=columns):
+            chunk_start = int(chunk.index[0])
+            chunk_rows = rows.between(chunk_start, chunk_start + len(chunk.index))
+            if len(chunk_rows) > 0:
+                yield chunk.iloc[chunk_rows - chunk_start]
+
+    def _iter_csv_rows(self, rows, columns=None):
+        """Chunks of the rows asked for, indexed by row number"""
+        rows = np.asarray(rows, dtype=np.int64)
+        row_index = self.get_row_index()
+        if row_index is None:
+            # Every row up to the last asked for is parsed
+            chunks = self._iter_csv_chunks(limit=int(rows[-1]) + 1, columns=columns)
+            yield from _select_rows(chunks, rows)
+            return
+
+        # The byte ranges of the intervals of the index holding rows are parsed
+        # as one csv, consecutive intervals as one range
+        interval = row_index.interval
+        blocks = np.unique(np.minimum(rows // interval, len(row_index.offsets) - 1))
+        ranges = []
+        run_starts = [] # First row of each range
+        run_positions = [] # Its position in the rows parsed
+        position = 0
+        for run in np.split(blocks, np.flatnonzero(np.diff(blocks) != 1) + 1):
+            first_block, last_block = int(run[0]), int(run[-1])
+            # The last interval runs to the end of the file, rows appended since the index included
+            end = int(row_index.offsets[last_block + 1]) if last_block + 1 < len(row_index.offsets) else None
+            ranges.append((int(row_index.offsets[first_block]), end))
+            run_starts.append(first_block * interval)
+            run_positions.append(position)
+            position += (last_block - first_block + 1) * interval
+
+        run_starts = np.array(run_starts, dtype=np.int64)
+        runs = np.searchsorted(run_starts, rows, side='right') - 1
+        positions = rows - run_starts[runs] + np.array(run_positions, dtype=np.int64)[runs]
+        with open(self.file_path, 'rb') as f:
+            chunks = self._read_csv_chunks(
+                io.BufferedReader(_ByteRanges(f, ranges)),
+                0,
+                int(positions[-1]) + 1,
+                self._get_dtype(columns),
+                columns,
+                header=None,
+                names=self._get_column_names(),
+                index_col=False,
+                usecols=columns
+            )
+            yield from _select_rows(chunks, positions, rows)
+
+    def _get_column_names(self):
+        return list(pd.read_csv(self.file_path, nrows=0).columns)
+
+    def _get_dtype(self, columns=None):
+        dtype = {}
+        for col_name, data_type in self.column_types.items():
+            if columns is not None and col_name not in columns:
+                continue
+            if data_type in TEXT_DATA_TYPES:
+                dtype[col_name] = str
+            elif data_type == ColumnDataType.INTEGER:
+                # Parsed as nullable integers, never through floats which round past 2^53
+                dtype[col_name] = 'Int64'
+            elif data_type == ColumnDataType.NUMERIC:
+                dtype[col_name] = 'float64'
+        return dtype
+
+    def _iter_csv_chunks(self, offset=0, limit=None, columns=None, dtype=None):
+        """Chunks of rows offset to offset + limit, indexed from 0 at offset, dtype defaults to the column types"""
+        dtype = self._get_dtype(columns) if dtype is None else dtype
+        row_index = self.get_row_index() if offset > 0 else None
+        if row_index is None:
+            with open_csv(self.file_path) as source:
+                yield from self._read_csv_chunks(source, offset, limit, dtype, columns, usecols=columns)
+            return
+
+        byte_offset, skip = row_index.locate(offset)
+        column_names = self._get_column_names()
+        with open(self.file_path, 'rb') as f:
+            f.seek(byte_offset)
+            yield from self._read_csv_chunks(
+                f, skip, limit, dtype, columns, header=None, names=column_names, index_col=False, usecols=columns
+            )
+
+    def _iter_csv_chunks_after(self, byte_offset):
+        """Chunks of the rows after byte_offset, which must be the start of a row"""
+        if byte_offset >= os.path.getsize(self.file_path):
+            return
+        column_names = self._get_column_names()
+        with open(self.file_path, 'rb') as f:
+            f.seek(byte_offset)
+            yield from self._read_csv_chunks(
+                f, 0, None, self._get_dtype(), header=None, names=column_names, index_col=False
+            )
+
+    def _read_csv_chunks(self, source, skip, limit, dtype, columns=None, **kwargs):
+        """
+        Chunks of the csv after its first skip rows. Rows are counted the way
+        pandas numbers them, so a value with a line break is one row; chunks
+        before the first row kept are parsed and dropped, memory does not grow
+        with skip
+        """
+        reader = pd.read_csv(
+            source,
+            dtype=dtype,
+            nrows=None if limit is None else skip + limit,
+            chunksize=self.chunk_size,
+            **kwargs
+        )
+        for chunk in reader:
+            if len(chunk.index) == 0 or chunk.index[-1] < skip:
+                continue
+            if chunk.index[0] < skip:
+                chunk = chunk.iloc[skip - chunk.index[0]:]
+            chunk.index = chunk.index - skip
+            if columns is not None:
+                # usecols keeps the order of the file
+                chunk = chunk[columns]
+            yield chunk
+
+    def iter_records(self, offset=0, limit=None, rows=None, columns=None):
+        for chunk in self.iter_chunks(offset=offset, limit=limit, rows=rows, columns=columns):
+            # Replace missing values (NaN / NA) with None
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for record in chunk.to_dict('records'):
+                yield record
+
+    def iter_ndjson(self, offset=0, limit=None, rows=None, columns=None):
+        """Yield one JSON document per line"""
+        for record in self.iter_records(offset=offset, limit=limit, rows=rows, columns=columns):
+            yield dumps(record) + '\n'
+
+    def iter_json(self, offset=0, limit=None, rows=None, columns=None):
+        """Yield a JSON array of records in pieces"""
+        yield '['
+        separator = ''
+        for record in self.iter_records(offset=offset, limit=limit, rows=rows, columns=columns):
+            yield separator + dumps(record)
+            separator = ',\n'
+        yield ']\n'
+
+
+class _ByteRanges(io.RawIOBase):
+    """Readable concatenation of (start, end) byte ranges of a file, an end of None reads to its end"""
+
+    def __init__(self, f, ranges):
+        self.f = f
+        self.ranges = list(ranges)
+        self.position = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self.ranges) > 0:
+            start, end = self.ranges[0]
+            if self.position is None:
+                self.f.seek(start)
+                self.position = start
+            size = len(buffer) if end is None else min(len(buffer), end - self.position)
+            read = self.f.readinto(memoryview(buffer)[:size]) if size > 0 else 0
+            if read:
+                self.position += read
+                return read
+            self.ranges.pop(0)
+            self.position = None
+        return 0
+
+
+def _select_rows(chunks, positions, row_numbers=None):
+    """
+    The rows at the sorted positions of chunks indexed by position, indexed
+    by their row_numbers (the positions without them). Each chunk only
+    bisects the positions that fall in its range
+    """
+    row_numbers = positions if row_numbers is None else row_numbers
+    for chunk in chunks:
+        if len(chunk.index) == 0:
+            continue
+        chunk_start = int(chunk.index[0])
+        first, last = np.searchsorted(positions, [chunk_start, chunk_start + len(chunk.index)])
+        if last == first:
+            continue
+        chunk = chunk.iloc[positions[first:last] - chunk_start].copy()
+        chunk.index = pd.Index(row_numbers[first:last])
+        yield chunk
+
+
+def encode_cursor(offset):
+    """Opaque pagination cursor for the record at offset"""
+    cursor = json.dumps({'offset': offset}).encode('utf-8')
+    return base64.urlsafe_b64encode(cursor).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        offset = int(value['offset'])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise ValueError('Invalid cursor {0}'.format(cursor))
+    if offset < 0:
+        raise ValueError('Invalid cursor {0}'.format(cursor))
+    return offset
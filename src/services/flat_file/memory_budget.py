@@ -0,0 +1,66 @@
+import os
+import dataclasses
+
+from services.flat_file.compression import detect_compression, open_decompressed
+
+MIN_MEMORY_BUDGET = 64 * 1024 * 1024
+CHUNK_SHARE = 0.5 # Share of the budget for the chunk being profiled, the rest holds column statistics
+MIN_CHUNK_SIZE = 1000 # Rows
+MAX_CHUNK_SIZE = 1000000
+ROW_SAMPLE_SIZE = 1024 * 1024 # Bytes read from the start of the file to measure its rows
+VALUE_OVERHEAD = 57 # Bytes pandas holds per text value on top of its characters (str object and pointer)
+WORKING_COPIES = 3 # Copies of a column alive while it is profiled (raw, factorized, typed)
+
+
+@dataclasses.dataclass
+class MemoryBudget:
+    """
+    Bytes profiling a file may hold. Files whose data frame fits are read
+    whole, larger files are read in chunks sized to CHUNK_SHARE of the budget
+    and the rest is split between the statistics of the columns. Column
+    statistics over their share switch to bounded structures, see
+    ColumnStatistics.state_limit
+    """
+    limit: int
+
+    def __post_init__(self):
+        if self.limit < MIN_MEMORY_BUDGET:
+            raise ValueError('Memory budget must be at least {0} bytes'.format(MIN_MEMORY_BUDGET))
+
+    def fits_in_memory(self, file_path):
+        """True if the whole file can be profiled as one data frame"""
+        row_size, rows = estimate_rows(file_path)
+        return row_size * rows * WORKING_COPIES <= self.limit
+
+    def get_chunk_size(self, file_path):
+        """
+        Rows per chunk. Parallel workers each read the chunk for their own
+        columns so together they hold about one chunk
+        """
+        row_size, _ = estimate_rows(file_path)
+        chunk_size = int(self.limit * CHUNK_SHARE / (row_size * WORKING_COPIES))
+        return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, chunk_size))
+
+    def get_column_state_limit(self, column_count):
+        """Bytes the statistics of each column may hold"""
+        return int(self.limit * (1 - CHUNK_SHARE) / max(1, column_count))
+
+
+def estimate_rows(file_path, sample_size=ROW_SAMPLE_SIZE):
+    """
+    Estimated bytes a row of the file takes once read by pandas and the
+    rows in the file, measured on the first sample_size bytes. Rows of a
+    compressed file are measured decompressed but counted from its
+    compressed size, too few
+    """
+    file_size = os.path.getsize(file_path)
+    compression = detect_compression(file_path)
+    with open(file_path, 'rb') if compression is None else open_decompressed(file_path, compression) as f:
+        header = f.readline()
+        sample = f.read(sample_size)
+    columns = header.count(b',') + 1
+    # The last line of the sample may be cut short
+    rows = max(1, sample.count(b'\n'))
+    raw_row_size = len(sample) / rows if len(sample) > 0 else max(1, len(header))
+    row_size = raw_row_size + columns * VALUE_OVERHEAD
+    return row_size, int((file_size - len(header)) / raw_row_size)
@@ -0,0 +1,72 @@
+import io
+import os
+import random
+
+import pandas as pd
+
+PREVIEW_HEAD_SIZE = 1024 * 1024 # Bytes read from the start of the file
+PREVIEW_RANGE_COUNT = 16 # Random byte ranges read after the head
+PREVIEW_RANGE_SIZE = 64 * 1024
+
+
+class PreviewSample:
+    """
+    Rows read from the first block and random byte ranges of a csv.
+    Ranges start after the first line break in them and run on to the
+    next line break so only whole rows are kept. Rows with quoted line
+    breaks cut by a range are dropped when they fail to parse
+    """
+    def __init__(self, file_path, head_size=PREVIEW_HEAD_SIZE, range_count=PREVIEW_RANGE_COUNT,
+                 range_size=PREVIEW_RANGE_SIZE, seed=None):
+        self.file_path = file_path
+        self.file_size = os.path.getsize(file_path)
+        self.data_size = 0 # Bytes of the rows read, the header excluded
+        self.data_body_size = 0 # Bytes of the file after the header
+        self.is_complete = False
+        self.data = self._read(head_size, range_count, range_size, random.Random(seed))
+
+    def get_data_frame(self):
+        """Sampled rows as raw csv strings"""
+        return pd.read_csv(io.BytesIO(self.data), dtype=str, on_bad_lines='skip')
+
+    def estimate_records(self, sampled_records):
+        """Records in the file at the average row size of the sample"""
+        if self.is_complete or self.data_size == 0:
+            return sampled_records
+        return int(round(sampled_records * self.data_body_size / self.data_size))
+
+    def _read(self, head_size, range_count, range_size, rng):
+        with open(self.file_path, 'rb') as f:
+            header = f.readline()
+            self.data_body_size = self.file_size - len(header)
+            if self.file_size <= head_size + range_count * range_size:
+                self.is_complete = True
+                body = f.read()
+                self.data_size = len(body)
+                return header + body
+
+            head = self._read_rows(f, len(header), head_size)
+            head_end = len(header) + len(head)
+            blocks = [head]
+
+            # Non overlapping ranges after the head, in file order
+            range_starts = sorted(rng.sample(range(head_end, self.file_size - range_size), range_count))
+            next_start = head_end
+            for range_start in range_starts:
+                range_start = max(range_start, next_start)
+                f.seek(range_start)
+                if range_start > next_start:
+                    # Skip the row the range starts in
+                    f.readline()
+                block = self._read_rows(f, f.tell(), range_size)
+                next_start = f.tell()
+                blocks.append(block)
+
+        self.data_size = sum(len(block) for block in blocks)
+        return header + b''.join(block if block.endswith(b'\n') else block + b'\n' for block in blocks)
+
+    @staticmethod
+    def _read_rows(f, start, size):
+        """Read size bytes from start and on to the end of the row"""
+        f.seek(start)
+        return f.read(size) + f.readline()
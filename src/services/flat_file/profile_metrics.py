@@ -0,0 +1,144 @@
+import sys
+import time
+import logging
+import resource
+import contextlib
+import dataclasses
+import tracemalloc
+from enum import Enum
+
+from common.utils.json_encoder import dumps
+
+LOGGER = logging.getLogger(__name__)
+LOG_MAX_COLUMNS = 5 # Slowest columns written to the log, the descriptor keeps every column
+
+
+class ProfileStage(str, Enum):
+    READ_CSV = "read_csv" # Parsing the csv (or the chunks of it) into data frames
+    PREVIEW_SAMPLE = "preview_sample" # Reading the byte ranges of a preview
+    COLUMN_SUMMARY = "column_summary" # Null, distinct, type, max and sample statistics of a column
+    COLUMN_STATISTICS = "column_statistics" # The same for a chunk of a column
+    TYPE_INFERENCE = "type_inference" # Boolean and datetime checks
+    DATETIME_RECHECK = "datetime_recheck" # Chunks re-read for columns that widened to STRING
+    DDL = "ddl"
+    PROFILE_CACHE = "profile_cache" # Copying the profile of an identical upload
+    SIDECAR = "sidecar" # Writing the columnar sidecar
+    ROW_INDEX = "row_index" # Finding the byte offsets of rows for random access
+    PROFILE_STATE = "profile_state" # Reading and writing the statistics kept for incremental profiles
+
+
+@dataclasses.dataclass
+class StageMetrics:
+    """
+    Time and memory of a stage. peak_allocated is only measured while
+    tracemalloc is tracing, rss_growth is how far the process peak RSS rose
+    """
+    calls: int = 0
+    wall_time: float = 0.0 # Seconds
+    cpu_time: float = 0.0 # Seconds of CPU used by the thread running the stage
+    peak_allocated: int = None # Bytes
+    rss_growth: int = 0 # Bytes
+
+    def add(self, other):
+        self.calls += other.calls
+        self.wall_time += other.wall_time
+        self.cpu_time += other.cpu_time
+        if other.peak_allocated is not None:
+            self.peak_allocated = max(self.peak_allocated or 0, other.peak_allocated)
+        self.rss_growth += other.rss_growth
+        return self
+
+
+@dataclasses.dataclass
+class ProfileMetrics:
+    """
+    Per stage, and per column and stage, time and memory of a profile run.
+    Stages are measured with measure(), which must not be nested. Metrics of
+    work done in other processes (ie. column batches) are combined with merge
+    """
+    wall_time: float = 0.0 # Seconds from the start of the profile to finish()
+    cpu_time: float = 0.0 # Total CPU seconds of the measured stages, across processes
+    stages: dict[str, StageMetrics] = dataclasses.field(default_factory=dict)
+    columns: dict[str, dict[str, StageMetrics]] = dataclasses.field(default_factory=dict)
+
+    def __post_init__(self):
+        self._started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def measure(self, stage, column_name=None):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            start_allocated = tracemalloc.get_traced_memory()[0]
+        start_rss = _get_peak_rss()
+        start_cpu = time.thread_time()
+        start_wall = time.perf_counter()
+        try:
+            yield
+        finally:
+            stage_metrics = StageMetrics(
+                calls=1,
+                wall_time=time.perf_counter() - start_wall,
+                cpu_time=time.thread_time() - start_cpu,
+                peak_allocated=(tracemalloc.get_traced_memory()[1] - start_allocated) if tracing else None,
+                rss_growth=_get_peak_rss() - start_rss
+            )
+            self.add(ProfileStage(stage).value, stage_metrics, column_name)
+
+    def add(self, stage, stage_metrics, column_name=None):
+        self.stages.setdefault(stage, StageMetrics()).add(stage_metrics)
+        self.cpu_time += stage_metrics.cpu_time
+        if column_name is not None:
+            column_stages = self.columns.setdefault(column_name, {})
+            column_stages.setdefault(stage, StageMetrics()).add(stage_metrics)
+
+    def merge(self, other):
+        for stage, stage_metrics in other.stages.items():
+            self.stages.setdefault(stage, StageMetrics()).add(stage_metrics)
+        self.cpu_time += other.cpu_time
+        for column_name, column_stages in other.columns.items():
+            for stage, stage_metrics in column_stages.items():
+                self.columns.setdefault(column_name, {}).setdefault(stage, StageMetrics()).add(stage_metrics)
+        return self
+
+    def finish(self):
+        self.wall_time = time.perf_counter() - self._started
+        return self
+
+    def get_log_record(self, max_columns=LOG_MAX_COLUMNS):
+        """Totals, stages and the slowest columns as a dict of plain values"""
+        column_times = {
+            column_name: sum(stage_metrics.wall_time for stage_metrics in column_stages.values())
+            for column_name, column_stages in self.columns.items()
+        }
+        slowest = sorted(column_times.items(), key=lambda item: -item[1])[:max_columns]
+        return {
+            'wall_time': round(self.wall_time, 6),
+            'cpu_time': round(self.cpu_time, 6),
+            'stages': {
+                stage: {name: round(value, 6) if isinstance(value, float) else value
+                        for name, value in dataclasses.asdict(stage_metrics).items()}
+                for stage, stage_metrics in self.stages.items()
+            },
+            'slowest_columns': {column_name: round(wall_time, 6) for column_name, wall_time in slowest}
+        }
+
+
+def measure(metrics, stage, column_name=None):
+    """metrics.measure, or nothing if metrics is None"""
+    if metrics is None:
+        return contextlib.nullcontext()
+    return metrics.measure(stage, column_name)
+
+
+def log_metrics(metrics, **context):
+    """Write the metrics as a single structured log line, context adds fields such as the file id"""
+    if metrics is None or not LOGGER.isEnabledFor(logging.INFO):
+        return
+    LOGGER.info(dumps(dict(event='profile_metrics', **context, **metrics.get_log_record())))
+
+
+def _get_peak_rss():
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
@@ -0,0 +1,84 @@
+import os
+import pickle
+import hashlib
+import pathlib
+import dataclasses
+
+from services.flat_file.column_statistics import ColumnStatistics
+from services.flat_file.compression import detect_compression
+
+PROFILE_STATE_EXTENSION = '.profile'
+PROFILE_STATE_FORMAT_VERSION = 2 # Pickled ProfileState, bumped when ColumnStatistics fields change
+TAIL_CHECK_SIZE = 64 * 1024 # Bytes before the profiled size hashed to tell an append from a rewrite
+
+
+@dataclasses.dataclass
+class ProfileState:
+    """
+    Mergeable statistics of the first profiled_size bytes of a file, kept
+    so rows appended later can be profiled without reading those bytes again
+    """
+    column_names: list[str]
+    column_stats: list[ColumnStatistics]
+    profiled_size: int = 0 # Bytes of the file the statistics cover, always a whole number of rows
+    total_records: int = 0
+    tail_hash: str = None # sha256 of the TAIL_CHECK_SIZE bytes before profiled_size
+    format_version: int = PROFILE_STATE_FORMAT_VERSION
+
+
+def get_profile_state_path(file_path):
+    return str(pathlib.Path(file_path).with_suffix(PROFILE_STATE_EXTENSION))
+
+
+def get_tail_hash(file_path, size):
+    with open(file_path, 'rb') as f:
+        f.seek(max(0, size - TAIL_CHECK_SIZE))
+        return hashlib.sha256(f.read(size - f.tell())).hexdigest()
+
+
+def is_appended(state, file_path):
+    """
+    True if the file still starts with the bytes the state was built from,
+    checked on the last TAIL_CHECK_SIZE of them so the check does not grow
+    with the file. Rows must end with a line break for the tail to be parsed
+    on its own. Compressed files are never appended to, their rows can not be
+    read from an offset
+    """
+    if not os.path.isfile(file_path) or os.path.getsize(file_path) < state.profiled_size:
+        return False
+    if detect_compression(file_path) is not None:
+        return False
+    with open(file_path, 'rb') as f:
+        f.seek(max(0, state.profiled_size - 1))
+        if f.read(1) != b'\n':
+            return False
+    return get_tail_hash(file_path, state.profiled_size) == state.tail_hash
+
+
+def write_profile_state(file_descriptor, state):
+    """
+    Write the state next to the csv and record its location and the bytes
+    it covers on the descriptor
+    """
+    state_path = get_profile_state_path(file_descriptor.local_file_path)
+    state.tail_hash = get_tail_hash(file_descriptor.local_file_path, state.profiled_size)
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'wb') as state_file:
+        pickle.dump(state, state_file, protocol=pickle.HIGHEST_PROTOCOL)
+    # A profile running at the same time never reads a partly written state
+    os.replace(tmp_path, state_path)
+
+    file_descriptor.profile_state_path = state_path
+    file_descriptor.profiled_size = state.profiled_size
+    return file_descriptor
+
+
+def read_profile_state(state_path):
+    """The ProfileState written to state_path, None if there is none of the current format"""
+    if state_path is None or not os.path.isfile(state_path):
+        return None
+    with open(state_path, 'rb') as state_file:
+        state = pickle.load(state_file)
+    if getattr(state, 'format_version', None) != PROFILE_STATE_FORMAT_VERSION:
+        return None
+    return state
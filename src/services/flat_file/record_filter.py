@@ -0,0 +1,111 @@
+import operator
+import dataclasses
+from enum import Enum
+
+import numpy as np
+
+from services.flat_file.flat_file_descriptor import ColumnDataType
+from services.flat_file.csv_reader import CSV_TRUE_VALUES, CSV_FALSE_VALUES
+
+
+class FilterOperator(str, Enum):
+    EQ = "eq"
+    GT = "gt"
+    GTE = "gte"
+    LT = "lt"
+    LTE = "lte"
+    NULL = "null"
+    NOT_NULL = "notnull"
+    INVALID = "invalid" # Row is in the invalid_record_index of the column, see FlatFileDataResource
+
+COMPARISONS = {
+    FilterOperator.EQ: operator.eq,
+    FilterOperator.GT: operator.gt,
+    FilterOperator.GTE: operator.ge,
+    FilterOperator.LT: operator.lt,
+    FilterOperator.LTE: operator.le
+}
+
+NUMERIC_DATA_TYPES = [ColumnDataType.INTEGER, ColumnDataType.NUMERIC]
+
+# Column types an invalid filter takes the invalid_record_index of, ie. owner:invalid:original
+INVALID_RECORD_TYPES = ['potential', 'original']
+
+
+@dataclasses.dataclass
+class RecordFilter:
+    """
+    Condition on the values of a column, written column:operator[:value]
+    ie. srcport:gte:1024, owner:null or bool_col_1:eq:true. Values are
+    compared as the original_type of the column, DATE and DATETIME as their
+    csv text so ISO formats compare in date order. Null values never match a
+    comparison
+    """
+    column_name: str
+    operator: FilterOperator
+    value: any = None
+
+    def get_mask(self, values):
+        """Boolean array of the values of a data frame column that match"""
+        is_null = values.isna().to_numpy(dtype=bool)
+        if self.operator == FilterOperator.NULL:
+            return is_null
+        if self.operator == FilterOperator.NOT_NULL:
+            return ~is_null
+
+        mask = np.zeros(len(values), dtype=bool)
+        not_null = ~is_null
+        if not_null.any():
+            compare = COMPARISONS[self.operator]
+            mask[not_null] = np.asarray(compare(values[not_null].to_numpy(), self.value), dtype=bool)
+        return mask
+
+
+def parse_filter(value, column_types):
+    """
+    RecordFilter of a column:operator[:value] string. column_types maps the
+    column names of the file to their ColumnDataType. Column names may hold
+    colons, the longest that matches is used
+    """
+    column_names = sorted(
+        (c for c in column_types.keys() if value.startswith(c + ':')), key=len, reverse=True
+    )
+    if len(column_names) == 0:
+        raise ValueError('filter {0} must start with a column of the file, ie. column:eq:value'.format(value))
+    column_name = column_names[0]
+
+    filter_operator, separator, filter_value = value[len(column_name) + 1:].partition(':')
+    try:
+        filter_operator = FilterOperator(filter_operator)
+    except ValueError:
+        raise ValueError('filter operator must be one of {0}'.format(', '.join(o.value for o in FilterOperator)))
+
+    if filter_operator == FilterOperator.INVALID:
+        filter_value = filter_value if separator else INVALID_RECORD_TYPES[0]
+        if filter_value not in INVALID_RECORD_TYPES:
+            raise ValueError('invalid filter type must be one of {0}'.format(', '.join(INVALID_RECORD_TYPES)))
+        return RecordFilter(column_name, filter_operator, filter_value)
+    if filter_operator not in COMPARISONS:
+        return RecordFilter(column_name, filter_operator)
+    if not separator:
+        raise ValueError('filter {0} needs a value, ie. {1}:{2}:value'.format(value, column_name, filter_operator.value))
+    return RecordFilter(column_name, filter_operator, _to_column_type(filter_value, column_types[column_name]))
+
+
+def _to_column_type(value, data_type):
+    if data_type == ColumnDataType.INTEGER:
+        try:
+            # Integers past 2^53 are compared exactly, other numbers as floats
+            return int(value)
+        except ValueError:
+            pass
+    if data_type in NUMERIC_DATA_TYPES:
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError('filter value {0} must be a number'.format(value))
+    if data_type == ColumnDataType.BOOLEAN:
+        if value not in CSV_TRUE_VALUES + CSV_FALSE_VALUES:
+            raise ValueError('filter value {0} must be true or false'.format(value))
+        return value in CSV_TRUE_VALUES
+    return value
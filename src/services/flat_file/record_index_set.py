@@ -0,0 +1,205 @@
+import zlib
+import base64
+
+import numpy as np
+
+ENCODING_RUNS = 'runs'
+ENCODING_BITMAP = 'bitmap'
+MAX_BITMAP_SPAN = 64 * 1024 * 1024 # Rows, larger spans are always written as runs
+POWERS_OF_TEN = 10 ** np.arange(1, 19, dtype=np.int64) # Bounds of the digit counts of run values
+
+
+class RecordIndexSet(object):
+    """
+    Sorted set of record indexes held as runs of consecutive indexes (two
+    numpy arrays of run starts and lengths) instead of one list entry per
+    record. Counting, membership and paging work on the runs, the indexes
+    are only expanded for the page asked for.
+
+    Serialized (see __json__) as whichever is shorter of
+    runs:   {"encoding": "runs", "count": n, "runs": [gap, length, ...]}
+            where gap is the distance from the end of the previous run
+    bitmap: {"encoding": "bitmap", "count": n, "start": first index, "bits": "..."}
+            where bits is the base64 of the zlib compressed packed bits from start
+    """
+
+    def __init__(self, starts=None, lengths=None):
+        self.starts = np.zeros(0, dtype=np.int64) if starts is None else np.asarray(starts, dtype=np.int64)
+        self.lengths = np.zeros(0, dtype=np.int64) if lengths is None else np.asarray(lengths, dtype=np.int64)
+        self._run_ends = None # Cumulative lengths, built for paging
+        self._ends = None # End of each run, built for between
+
+    @staticmethod
+    def from_indexes(indexes):
+        """Build a set from record indexes in any order"""
+        values = np.unique(np.asarray(indexes, dtype=np.int64))
+        if len(values) == 0:
+            return RecordIndexSet()
+        breaks = np.flatnonzero(np.diff(values) != 1) + 1
+        starts = values[np.concatenate(([0], breaks))]
+        ends = values[np.concatenate((breaks - 1, [len(values) - 1]))] + 1
+        return RecordIndexSet(starts, ends - starts)
+
+    @staticmethod
+    def from_serializable(value):
+        """Read the serialized form, or a plain list of indexes as stored by older descriptors"""
+        if value is None:
+            return RecordIndexSet()
+        if isinstance(value, RecordIndexSet):
+            return value
+        if isinstance(value, (list, tuple, np.ndarray)):
+            return RecordIndexSet.from_indexes(value)
+
+        encoding = value.get('encoding')
+        if encoding == ENCODING_RUNS:
+            runs = np.asarray(value['runs'], dtype=np.int64).reshape(-1, 2)
+            gaps, lengths = runs[:, 0], runs[:, 1]
+            # Each start is the gap after the end of the previous run
+            ends_before = np.concatenate(([0], np.cumsum(gaps + lengths)[:-1]))
+            return RecordIndexSet(ends_before + gaps, lengths)
+        if encoding == ENCODING_BITMAP:
+            packed = np.frombuffer(zlib.decompress(base64.b64decode(value['bits'])), dtype=np.uint8)
+            return RecordIndexSet.from_indexes(np.flatnonzero(np.unpackbits(packed)) + value['start'])
+        raise ValueError('Unknown record index encoding {0}'.format(encoding))
+
+    @property
+    def count(self):
+        return int(self.lengths.sum())
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for start, length in zip(self.starts.tolist(), self.lengths.tolist()):
+            yield from range(start, start + length)
+
+    def __contains__(self, index):
+        run = int(np.searchsorted(self.starts, index, side='right')) - 1
+        return run >= 0 and index < self.starts[run] + self.lengths[run]
+
+    def __eq__(self, other):
+        if not isinstance(other, RecordIndexSet):
+            return NotImplemented
+        return np.array_equal(self.starts, other.starts) and np.array_equal(self.lengths, other.lengths)
+
+    def __repr__(self):
+        return 'RecordIndexSet(count={0}, runs={1})'.format(self.count, len(self.starts))
+
+    def add_indexes(self, indexes):
+        """Add record indexes in any order"""
+        return self.update(RecordIndexSet.from_indexes(indexes))
+
+    def update(self, other):
+        """Add the indexes of another set, merging overlapping and adjacent runs"""
+        if len(other.starts) == 0:
+            return self
+        starts = np.concatenate((self.starts, other.starts))
+        ends = np.concatenate((self.starts + self.lengths, other.starts + other.lengths))
+        order = np.argsort(starts, kind='stable')
+        starts, ends = starts[order], ends[order]
+
+        max_ends = np.maximum.accumulate(ends)
+        new_run = np.concatenate(([True], starts[1:] > max_ends[:-1]))
+        run_positions = np.flatnonzero(new_run)
+        self.starts = starts[run_positions]
+        self.lengths = np.maximum.reduceat(ends, run_positions) - self.starts
+        self._run_ends = None
+        self._ends = None
+        return self
+
+    def intersection(self, other):
+        """A new set of the indexes in both sets"""
+        if len(self.starts) == 0 or len(other.starts) == 0:
+            return RecordIndexSet()
+        # Every run of the result starts and ends on a boundary of a run of either set
+        bounds = np.unique(np.concatenate((
+            self.starts, self.starts + self.lengths, other.starts, other.starts + other.lengths
+        )))
+        firsts = bounds[:-1]
+        kept = self._contains_all(firsts) & other._contains_all(firsts)
+        starts = firsts[kept]
+        return RecordIndexSet().update(RecordIndexSet(starts, bounds[1:][kept] - starts))
+
+    def _contains_all(self, indexes):
+        runs = np.searchsorted(self.starts, indexes, side='right') - 1
+        ends = (self.starts + self.lengths)[np.maximum(runs, 0)]
+        return (runs >= 0) & (indexes < ends)
+
+    def shift(self, offset):
+        """A copy with every index moved by offset, ie. rows of a file after others"""
+        return RecordIndexSet(self.starts + offset, self.lengths.copy())
+
+    def page(self, offset=0, limit=None):
+        """The indexes from position offset to offset + limit, in order"""
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError('offset and limit must be 0 or greater')
+        if self._run_ends is None:
+            self._run_ends = np.cumsum(self.lengths)
+
+        end = self.count if limit is None else min(self.count, offset + limit)
+        if offset >= end:
+            return []
+        first = int(np.searchsorted(self._run_ends, offset, side='right'))
+        last = int(np.searchsorted(self._run_ends, end, side='left')) + 1
+        # Positions of the first and last runs are trimmed to the page
+        run_positions = self._run_ends[first:last] - self.lengths[first:last]
+        skipped = np.maximum(offset - run_positions, 0)
+        lengths = np.minimum(self._run_ends[first:last], end) - run_positions - skipped
+        return _expand(self.starts[first:last] + skipped, lengths).tolist()
+
+    def between(self, start, stop):
+        """The indexes from start up to stop as an array, only the runs overlapping the range are expanded"""
+        if self._ends is None:
+            self._ends = self.starts + self.lengths
+        first = int(np.searchsorted(self._ends, start, side='right'))
+        last = int(np.searchsorted(self.starts, stop, side='left'))
+        if last <= first:
+            return np.zeros(0, dtype=np.int64)
+        starts = np.maximum(self.starts[first:last], start)
+        return _expand(starts, np.minimum(self._ends[first:last], stop) - starts)
+
+    def to_list(self):
+        return self.page()
+
+    def __json__(self):
+        runs = self._runs_form()
+        if len(self.starts) == 0:
+            return runs
+        span = int(self.starts[-1] + self.lengths[-1] - self.starts[0])
+        if span > MAX_BITMAP_SPAN:
+            return runs
+        # Digits and a separator for each value of the runs
+        runs_size = int(np.searchsorted(POWERS_OF_TEN, runs['runs'], side='right').sum()) + 2 * len(runs['runs'])
+        # Base64 characters of the packed bits before compression, the bitmap is
+        # only built for sets dense enough that it is likely to be shorter
+        if (span + 7) // 8 * 4 // 3 >= runs_size:
+            return runs
+        bitmap = self._bitmap_form(span)
+        return bitmap if len(bitmap['bits']) < runs_size else runs
+
+    def _runs_form(self):
+        ends_before = np.concatenate(([0], (self.starts + self.lengths)[:-1])) if len(self.starts) > 0 else self.starts
+        runs = np.column_stack((self.starts - ends_before, self.lengths)).ravel()
+        return {'encoding': ENCODING_RUNS, 'count': self.count, 'runs': runs.tolist()}
+
+    def _bitmap_form(self, span):
+        start = int(self.starts[0])
+        # Runs never touch so each start and end marks a single change
+        changes = np.zeros(span + 1, dtype=np.int8)
+        changes[self.starts - start] = 1
+        changes[self.starts + self.lengths - start] = -1
+        bits = np.cumsum(changes[:-1], dtype=np.int8).astype(np.uint8)
+        packed = zlib.compress(np.packbits(bits).tobytes())
+        return {
+            'encoding': ENCODING_BITMAP,
+            'count': self.count,
+            'start': start,
+            'bits': base64.b64encode(packed).decode('ascii')
+        }
+
+
+def _expand(starts, lengths):
+    """The indexes of runs as one array"""
+    # Each index is the start of its run plus its position in the run
+    run_offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + np.arange(int(lengths.sum()), dtype=np.int64) - run_offsets
@@ -0,0 +1,198 @@
+import os
+import pathlib
+import dataclasses
+
+import numpy as np
+
+from services.flat_file.compression import detect_compression_bytes
+from services.flat_file.profile_state import get_tail_hash
+
+ROW_INDEX_EXTENSION = '.rowindex'
+ROW_INDEX_FORMAT_VERSION = 1 # npz of the byte offsets of every interval th row
+ROW_INDEX_INTERVAL = 1000 # Rows between offsets, rows in between are found by parsing from the offset before them
+SCAN_BLOCK_SIZE = 4 * 1024 * 1024 # Bytes read at a time when building the index of a saved file
+
+QUOTE = ord('"')
+NEWLINE = ord('\n')
+CARRIAGE_RETURN = ord('\r')
+
+
+@dataclasses.dataclass
+class RowIndex:
+    """
+    Byte offsets where data rows 0, interval, 2 * interval... of a csv start.
+    Covers the first size bytes of the file, which hold total_records whole rows
+    """
+    offsets: np.ndarray
+    interval: int = ROW_INDEX_INTERVAL
+    total_records: int = 0
+    size: int = 0
+    tail_hash: str = None # sha256 of the bytes before size, see services.flat_file.profile_state
+
+    def locate(self, row):
+        """Byte offset to parse from to reach row, and the rows to skip once there"""
+        block = min(row // self.interval, len(self.offsets) - 1)
+        return int(self.offsets[block]), row - block * self.interval
+
+
+class RowIndexBuilder:
+    """
+    Find the offsets of a RowIndex in csv bytes written to it block by block,
+    ie. as a consumer of LocalFileService.save_file_stream. Line breaks in
+    quoted values do not end rows, nor do blank lines since pandas skips them.
+    Compressed bytes are not indexed, see services.flat_file.compression
+    previous: RowIndex of the start of the file, blocks written carry on after its size
+    """
+    def __init__(self, interval=ROW_INDEX_INTERVAL, previous=None):
+        self.interval = interval
+        self.offsets = []
+        self.position = 0 # Bytes written
+        self.row_ends = 0 # Line breaks that ended a row, the first ends the header
+        self.last_end = -1 # Position of the last of them
+        self.last_byte = None
+        self.in_quotes = False
+        self.is_compressed = False
+        self.is_aborted = False
+        if previous is not None:
+            self.interval = previous.interval
+            self.offsets = [previous.offsets]
+            self.position = previous.size
+            self.row_ends = previous.total_records + 1
+            self.last_end = previous.size - 1
+            self.last_byte = NEWLINE
+
+    def write(self, block):
+        if self.position == 0 and detect_compression_bytes(block[:4]) is not None:
+            self.is_compressed = True
+        if self.is_compressed or len(block) == 0:
+            self.position += len(block)
+            return
+
+        data = np.frombuffer(block, dtype=np.uint8)
+        is_newline = data == NEWLINE
+        if self.in_quotes or b'"' in block:
+            # A line break is inside a quoted value when an odd number of quotes come before it
+            quotes = np.cumsum(data == QUOTE, dtype=np.int64) + self.in_quotes
+            is_newline &= (quotes & 1) == 0
+            self.in_quotes = bool(quotes[-1] & 1)
+        ends = np.flatnonzero(is_newline)
+
+        # Line breaks right after a row end, or after its carriage return, are blank lines
+        previous_ends = np.concatenate(([self.last_end - self.position], ends[:-1]))
+        before = np.concatenate(([self.last_byte if self.last_byte is not None else 0], data))[ends]
+        blank = (ends - previous_ends == 1) | ((ends - previous_ends == 2) & (before == CARRIAGE_RETURN))
+        ends = ends[~blank] + self.position
+
+        # Data row r starts after the line break ending row r - 1, the header for row 0
+        row_numbers = np.arange(self.row_ends, self.row_ends + len(ends))
+        indexed = row_numbers % self.interval == 0
+        if indexed.any():
+            self.offsets.append(ends[indexed] + 1)
+
+        if len(ends) > 0:
+            self.last_end = int(ends[-1])
+        self.row_ends += len(ends)
+        self.last_byte = int(data[-1])
+        self.position += len(block)
+
+    def close(self):
+        pass
+
+    def abort(self, error=None):
+        self.is_aborted = True
+
+    def get_row_index(self, file_path=None):
+        """
+        The RowIndex of the whole rows written, None for compressed or aborted
+        files. file_path is the file written, its tail_hash lets the index be
+        carried on once rows are appended, see build_row_index
+        """
+        if self.is_compressed or self.is_aborted or self.row_ends == 0:
+            return None
+        size = self.last_end + 1
+        offsets = np.concatenate(self.offsets) if len(self.offsets) > 0 else np.zeros(0, dtype=np.int64)
+        return RowIndex(
+            offsets.astype(np.int64),
+            interval=self.interval,
+            total_records=self.row_ends - 1,
+            size=size,
+            tail_hash=None if file_path is None else get_tail_hash(file_path, size)
+        )
+
+
+def build_row_index(file_path, previous=None, interval=ROW_INDEX_INTERVAL, block_size=SCAN_BLOCK_SIZE):
+    """
+    RowIndex of a saved csv, None if it is compressed. The bytes a previous
+    index covers are not scanned again if the file only had rows appended
+    """
+    if previous is not None and not _is_appended(previous, file_path):
+        previous = None
+    builder = RowIndexBuilder(interval=interval, previous=previous)
+    with open(file_path, 'rb') as f:
+        if previous is not None:
+            f.seek(previous.size)
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            builder.write(block)
+            if builder.is_compressed:
+                return None
+    return builder.get_row_index(file_path)
+
+
+def _is_appended(row_index, file_path):
+    if row_index.tail_hash is None or os.path.getsize(file_path) < row_index.size:
+        return False
+    return get_tail_hash(file_path, row_index.size) == row_index.tail_hash
+
+
+def get_row_index_path(file_path):
+    return str(pathlib.Path(file_path).with_suffix(ROW_INDEX_EXTENSION))
+
+
+def has_row_index(row_index_path, row_index_format_version):
+    """True if a row index of the current format version can be read"""
+    return (
+        row_index_path is not None
+        and row_index_format_version == ROW_INDEX_FORMAT_VERSION
+        and os.path.isfile(row_index_path)
+    )
+
+
+def write_row_index(file_descriptor, row_index):
+    """Write the index next to the csv and record its location and format version on the descriptor"""
+    if row_index is None:
+        return file_descriptor
+
+    row_index_path = get_row_index_path(file_descriptor.local_file_path)
+    tmp_path = row_index_path + '.tmp'
+    with open(tmp_path, 'wb') as index_file:
+        np.savez(
+            index_file,
+            offsets=row_index.offsets,
+            interval=row_index.interval,
+            total_records=row_index.total_records,
+            size=row_index.size,
+            tail_hash=np.array(row_index.tail_hash or '')
+        )
+    # Readers never see a partly written index
+    os.replace(tmp_path, row_index_path)
+
+    file_descriptor.row_index_path = row_index_path
+    file_descriptor.row_index_format_version = ROW_INDEX_FORMAT_VERSION
+    return file_descriptor
+
+
+def read_row_index(row_index_path, row_index_format_version=ROW_INDEX_FORMAT_VERSION):
+    """The RowIndex written to row_index_path, None if there is none of the current format"""
+    if not has_row_index(row_index_path, row_index_format_version):
+        return None
+    with np.load(row_index_path, allow_pickle=False) as index_file:
+        return RowIndex(
+            index_file['offsets'],
+            interval=int(index_file['interval']),
+            total_records=int(index_file['total_records']),
+            size=int(index_file['size']),
+            tail_hash=str(index_file['tail_hash']) or None
+        )
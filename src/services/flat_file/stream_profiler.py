@@ -0,0 +1,122 @@
+import io
+import queue
+import threading
+
+from services.flat_file.flat_file import FlatFile, STREAM_CHUNK_SIZE, EXACT_DISTINCT_MAX_FILE_SIZE
+from services.flat_file.flat_file_descriptor import DistinctCountMethod
+
+MAX_BUFFERED_BLOCKS = 16 # Blocks written ahead of the profiler before write blocks
+WRITE_POLL_INTERVAL = 0.5 # Seconds between checks that the profiler is still running
+
+
+class _BlockPipe(io.RawIOBase):
+    """Readable end of a bounded queue of byte blocks"""
+
+    def __init__(self, max_blocks):
+        self.blocks = queue.Queue(maxsize=max_blocks)
+        self.current = b''
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self.current) == 0:
+            if self.eof:
+                return 0
+            block = self.blocks.get()
+            if block is None:
+                self.eof = True
+                return 0
+            if isinstance(block, Exception):
+                raise block
+            self.current = block
+
+        size = min(len(buffer), len(self.current))
+        buffer[:size] = self.current[:size]
+        self.current = self.current[size:]
+        return size
+
+
+class StreamProfiler:
+    """
+    Profile a csv upload while it is written to disk. Each block written to
+    the profiler is handed to a background thread that parses it in chunks
+    with FlatFile, so the descriptor is ready shortly after the last block.
+    Use as a consumer of LocalFileService.save_file_stream
+    """
+    def __init__(self, file_path, original_file_name=None, expected_size=None,
+                 chunk_size=STREAM_CHUNK_SIZE, distinct_method=None, max_buffered_blocks=MAX_BUFFERED_BLOCKS, skip=None):
+        """
+        expected_size: Size of the upload when known (Content-Length), picks the
+        distinct count method the way FlatFile does from the file size
+        skip: Called with the first block, profiling never starts if it returns
+        True (ie. the upload may have a cached profile) and the descriptor is None
+        """
+        self.file_path = file_path
+        self.original_file_name = original_file_name
+        self.chunk_size = chunk_size
+        self.distinct_method = StreamProfiler._get_distinct_method(expected_size, distinct_method)
+        self.pipe = _BlockPipe(max_buffered_blocks)
+        self.flat_file = None
+        self.error = None
+        self.skip = skip
+        self.is_started = False
+        self.is_skipped = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def write(self, block):
+        if not self.is_started:
+            self.is_started = True
+            if self.skip is not None and isinstance(block, bytes) and self.skip(block):
+                self.is_skipped = True
+            else:
+                self.thread.start()
+        # Wait for room in the pipe unless the profiler has stopped
+        while self.thread.is_alive():
+            try:
+                self.pipe.blocks.put(block, timeout=WRITE_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        """The last block has been written and the file on disk is complete"""
+        self.write(None)
+
+    def abort(self, error=None):
+        """The upload failed, stop profiling"""
+        self.write(IOError('Upload aborted') if error is None else error)
+
+    def get_flat_file(self):
+        """Wait for the profile and return the FlatFile, raises the error profiling raised"""
+        if self.is_skipped:
+            return None
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.flat_file
+
+    def get_file_descriptor(self):
+        flat_file = self.get_flat_file()
+        return None if flat_file is None else flat_file.get_file_descriptor()
+
+    def _run(self):
+        try:
+            self.flat_file = FlatFile(
+                self.file_path,
+                original_file_name=self.original_file_name,
+                chunk_size=self.chunk_size,
+                distinct_method=self.distinct_method,
+                stream=io.BufferedReader(self.pipe)
+            )
+        except Exception as e:
+            self.error = e
+
+    @staticmethod
+    def _get_distinct_method(expected_size, distinct_method=None):
+        if distinct_method is not None:
+            return DistinctCountMethod(distinct_method)
+        if expected_size is None or expected_size > EXACT_DISTINCT_MAX_FILE_SIZE:
+            return DistinctCountMethod.HYPERLOGLOG
+        return DistinctCountMethod.EXACT
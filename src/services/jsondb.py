@@ -1,45 +1,103 @@
 import os
 import json
+import sqlite3
 
-from common.utils.json_encoder import EnhancedJSONEncoder
+from common.utils.json_encoder import dumps
 
+# Legacy whole file JSON store, migrated into the SQLite database on first use
 LOCAL_FILE_DIRECTORY = '/Users/jamesramsay/Repos/flat-file-manager/src/jsondb.json'
+LOCAL_DB_EXTENSION = '.sqlite'
+BUSY_TIMEOUT = 30 # Seconds a writer waits for the lock held by another process
+
+MIGRATED_META_KEY = 'migrated_json_file'
+
+
+def get_db_path(json_file_path):
+    return os.path.splitext(json_file_path)[0] + LOCAL_DB_EXTENSION
+
 
 class JsonDb:
-    def __init__(self, file_path=None):
+    """
+    Key value store of JSON documents backed by SQLite. Every key is read
+    and written on its own, writes are atomic and several processes can
+    share the database file. Documents of the old jsondb.json file are
+    copied into the database the first time it is opened
+    """
+    def __init__(self, file_path=None, json_file_path=None):
         self.db = None
-        self.file_path = LOCAL_FILE_DIRECTORY if file_path is None else file_path
+        self.json_file_path = LOCAL_FILE_DIRECTORY if json_file_path is None else json_file_path
+        self.file_path = get_db_path(self.json_file_path) if file_path is None else file_path
 
     def get_all(self):
-        result = []
-        f = self._get_file()
-        for key, val in f.items():
-            result.append(val)
-        return result
-        
+        rows = self._get_db().execute('SELECT val FROM documents ORDER BY id')
+        return [json.loads(val) for val, in rows]
+
     def get_by_key(self, key):
-        f = self._get_file()
-        if key in f:
-            return f[key]
+        row = self._get_db().execute('SELECT val FROM documents WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            return json.loads(row[0])
         raise AssertionError('Key {0} not in file'.format(key))
 
     def set_by_key(self, key, val):
-        f = self._get_file()
-        f[key] = val
-        self._write_file(f)
+        db = self._get_db()
+        with db:
+            db.execute(
+                'INSERT INTO documents (key, val) VALUES (?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET val = excluded.val',
+                (key, dumps(val))
+            )
 
-    def _get_file(self):
-        if self.db is None:
-            if os.path.isfile(self.file_path) == False:
-                with open(self.file_path, "w") as outfile:
-                    json.dump({}, outfile, cls=EnhancedJSONEncoder)
-            
-            with open(self.file_path) as json_file:
-                    data = json.load(json_file)
-                    self.db = data
+    def delete_by_key(self, key):
+        db = self._get_db()
+        with db:
+            db.execute('DELETE FROM documents WHERE key = ?', (key,))
 
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def _get_db(self):
+        if self.db is None:
+            db = sqlite3.connect(self.file_path, timeout=BUSY_TIMEOUT)
+            # Readers do not block the writer and the other way around
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS documents ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL UNIQUE, val TEXT NOT NULL)'
+            )
+            db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, val TEXT)')
+            self.db = db
+            self._migrate_json_file()
         return self.db
 
-    def _write_file(self, file_contents):
-        with open(self.file_path, "w") as outfile:
-            json.dump(file_contents, outfile, cls=EnhancedJSONEncoder)    
+    def _migrate_json_file(self):
+        """Copy the documents of the legacy jsondb.json, once per database"""
+        if not os.path.isfile(self.json_file_path):
+            return
+
+        db = self.db
+        if self._is_migrated():
+            return
+        with db:
+            # Take the write lock first so only one process migrates
+            db.execute('BEGIN IMMEDIATE')
+            if self._is_migrated():
+                return
+
+            with open(self.json_file_path) as json_file:
+                data = json.load(json_file)
+            # Keys written to the database since take precedence
+            db.executemany(
+                'INSERT OR IGNORE INTO documents (key, val) VALUES (?, ?)',
+                [(key, dumps(val)) for key, val in data.items()]
+            )
+            db.execute(
+                'INSERT INTO meta (key, val) VALUES (?, ?)',
+                (MIGRATED_META_KEY, os.path.abspath(self.json_file_path))
+            )
+
+    def _is_migrated(self):
+        row = self.db.execute('SELECT val FROM meta WHERE key = ?', (MIGRATED_META_KEY,)).fetchone()
+        return row is not None
@@ -0,0 +1,96 @@
+import copy
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+from common.utils.json_encoder import dumps
+
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_ENTRY_SIZE = 1024 * 1024 # Serialized descriptor bytes
+HEAD_SIZE = 64 * 1024 # Bytes at the start of a file hashed to tell if an upload may be cached before it is read
+
+
+def get_head_hash(head):
+    """sha256 of the first HEAD_SIZE bytes, head may be longer (ie. the first block of an upload)"""
+    return hashlib.sha256(head[:HEAD_SIZE]).hexdigest()
+
+
+def get_file_head_hash(file_path):
+    with open(file_path, 'rb') as f:
+        return get_head_hash(f.read(HEAD_SIZE))
+
+
+class ProfileCache:
+    """
+    In memory LRU cache of FlatFileDescriptors keyed by the content hash of the
+    uploaded file. Descriptors larger than max_entry_size once serialized are
+    not cached, the least recently used entry is evicted past max_entries.
+    The head hashes of cached files let an upload be matched from its first
+    block, before the content hash is known, see may_contain
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_entry_size=DEFAULT_MAX_ENTRY_SIZE):
+        self.max_entries = max_entries
+        self.max_entry_size = max_entry_size
+        self.entries = OrderedDict()
+        self.head_hashes = {} # Content hash to head hash
+        self.head_counts = Counter()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, content_hash):
+        """Return a copy of the cached descriptor or None"""
+        with self.lock:
+            if content_hash is None or content_hash not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(content_hash)
+            return copy.deepcopy(self.entries[content_hash])
+
+    def may_contain(self, head):
+        """True if a cached file starts with the same HEAD_SIZE bytes as head"""
+        head_hash = get_head_hash(head)
+        with self.lock:
+            return self.head_counts[head_hash] > 0
+
+    def set(self, content_hash, descriptor, head_hash=None):
+        """
+        Cache a copy of the descriptor, returns False if it is too large to cache.
+        head_hash: get_head_hash of the file, see may_contain
+        """
+        if self.max_entries <= 0 or content_hash is None:
+            return False
+        entry_size = len(dumps(descriptor))
+        if entry_size > self.max_entry_size:
+            return False
+
+        with self.lock:
+            self._remove_head_hash(content_hash)
+            self.entries[content_hash] = copy.deepcopy(descriptor)
+            self.entries.move_to_end(content_hash)
+            if head_hash is not None:
+                self.head_hashes[content_hash] = head_hash
+                self.head_counts[head_hash] += 1
+            while len(self.entries) > self.max_entries:
+                evicted_hash, _ = self.entries.popitem(last=False)
+                self._remove_head_hash(evicted_hash)
+                self.evictions += 1
+        return True
+
+    def _remove_head_hash(self, content_hash):
+        head_hash = self.head_hashes.pop(content_hash, None)
+        if head_hash is not None:
+            self.head_counts[head_hash] -= 1
+            if self.head_counts[head_hash] <= 0:
+                del self.head_counts[head_hash]
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
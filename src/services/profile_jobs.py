@@ -0,0 +1,134 @@
+import uuid
+import queue
+import threading
+import dataclasses
+from enum import Enum
+from datetime import datetime
+from collections import OrderedDict
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_QUEUED = 16
+DEFAULT_MAX_FINISHED = 1000 # Finished jobs kept for the status endpoint
+
+
+class JobStatus(str, Enum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+@dataclasses.dataclass
+class ProfileJob:
+    job_id: str
+    file_name: str = None
+    status: JobStatus = JobStatus.QUEUED
+    stage: str = None
+    progress: float = 0.0 # 0 - 1
+    file_id: str = None # unique_id of the descriptor once stored
+    error: str = None
+    created_at: str = None
+    started_at: str = None
+    finished_at: str = None
+
+    def set_progress(self, stage, progress):
+        self.stage = stage
+        self.progress = progress
+
+
+class ProfileJobQueue:
+    """
+    Bounded queue of profiling jobs run by a fixed number of worker threads.
+    A job is a callable taking its ProfileJob, it reports progress through
+    job.set_progress and returns the unique_id of the stored descriptor.
+    submit returns None when max_queued jobs are already waiting
+    """
+    def __init__(self, workers=DEFAULT_WORKERS, max_queued=DEFAULT_MAX_QUEUED, max_finished=DEFAULT_MAX_FINISHED):
+        if workers < 1:
+            raise ValueError('workers must be 1 or greater')
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.jobs = OrderedDict()
+        self.finished = OrderedDict()
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def submit(self, fn, file_name=None):
+        """Queue fn and return its ProfileJob, or None if the queue is full"""
+        job = ProfileJob(
+            job_id=str(uuid.uuid4()),
+            file_name=file_name,
+            created_at=self._now()
+        )
+        with self.lock:
+            self._start_workers()
+            try:
+                self.queue.put_nowait((job, fn))
+            except queue.Full:
+                return None
+            self.jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id):
+        """Return a copy of the job or None"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return None if job is None else dataclasses.replace(job)
+
+    def get_stats(self):
+        with self.lock:
+            counts = {status.value: 0 for status in JobStatus}
+            for job in self.jobs.values():
+                counts[job.status.value] += 1
+            return {
+                'workers': self.workers,
+                'max_queued': self.max_queued,
+                'jobs': counts
+            }
+
+    def _start_workers(self):
+        # Threads are started with the first job so idle apps and tests do not hold any
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(target=self._run_worker, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _run_worker(self):
+        while True:
+            job, fn = self.queue.get()
+            try:
+                self._run_job(job, fn)
+            finally:
+                self.queue.task_done()
+
+    def _run_job(self, job, fn):
+        with self.lock:
+            job.status = JobStatus.RUNNING
+            job.started_at = self._now()
+        try:
+            file_id = fn(job)
+        except Exception as e:
+            with self.lock:
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+                self._finish(job)
+            return
+
+        with self.lock:
+            job.file_id = file_id
+            job.status = JobStatus.DONE
+            job.set_progress('done', 1.0)
+            self._finish(job)
+
+    def _finish(self, job):
+        job.finished_at = self._now()
+        self.finished[job.job_id] = job
+        while len(self.finished) > self.max_finished:
+            job_id, _ = self.finished.popitem(last=False)
+            self.jobs.pop(job_id, None)
+
+    @staticmethod
+    def _now():
+        return str(datetime.now())
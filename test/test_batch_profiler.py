@@ -0,0 +1,78 @@
+import os
+import shutil
+import pathlib
+import tempfile
+import unittest
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.batch_profiler import BatchProfiler
+from services.flat_file.flat_file_descriptor import ColumnDataType, DistinctCountMethod
+from services.flat_file.record_index_set import RecordIndexSet
+
+
+class BatchProfilerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        self.test_file_path = '{0}/test_files/test_file_rwrwr.csv'.format(curr_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, file_name, text):
+        file_path = os.path.join(self.tmp_dir, file_name)
+        with open(file_path, 'w') as csv_file:
+            csv_file.write(text)
+        return file_path
+
+    def test_partitions_match_whole_file(self):
+        with open(self.test_file_path) as test_file:
+            lines = test_file.read().rstrip('\n').split('\n')
+        header, rows = lines[0], lines[1:]
+        part_size = len(rows) // 3 + 1
+        for i in range(3):
+            self._write('part_{0}.csv'.format(i), '\n'.join([header] + rows[i * part_size:(i + 1) * part_size]) + '\n')
+
+        batch = BatchProfiler.from_directory(self.tmp_dir, workers=2, distinct_method=DistinctCountMethod.EXACT)
+        merged = batch.get_file_descriptor()
+        whole = FlatFile(self.test_file_path).get_file_descriptor()
+
+        self.assertEqual(len(batch.get_file_descriptors()), 3)
+        self.assertEqual(merged.file_display_name, os.path.basename(self.tmp_dir))
+        self.assertEqual(merged.total_records, whole.total_records)
+        self.assertEqual(merged.ddl, whole.ddl.replace(whole.file_display_name, merged.file_display_name))
+        for merged_column, column in zip(merged.columns, whole.columns):
+            self.assertEqual(merged_column.column_name, column.column_name)
+            self.assertEqual(merged_column.column_type_display, column.column_type_display)
+            self.assertEqual(merged_column.non_null_values, column.non_null_values)
+            self.assertEqual(merged_column.distinct_values, column.distinct_values)
+
+    def test_types_widen_across_files(self):
+        first = self._write('a.csv', 'id,amount,code\n1,10,100\n2,20,200\n')
+        second = self._write('b.csv', 'id,amount,code,note\n3,30.25,2021-01-01,x\n4,40.5,2021-01-02,\n')
+        merged = BatchProfiler([first, second], table_name='orders', workers=1).get_file_descriptor()
+
+        columns = {column.column_name: column for column in merged.columns}
+        self.assertEqual(list(columns), ['id', 'amount', 'code', 'note'])
+        self.assertIn('"test_schema"."orders"', merged.ddl)
+        self.assertEqual(columns['amount'].original_type.data_type, ColumnDataType.NUMERIC)
+        self.assertEqual(columns['amount'].original_type.scale, 2)
+        self.assertEqual(columns['code'].original_type.data_type, ColumnDataType.STRING)
+        # Integers from the first file are checked as dates once the column is text
+        self.assertEqual(columns['code'].potential_type.data_type, ColumnDataType.DATE)
+        self.assertEqual(columns['code'].potential_type.invalid_record_index.to_list(), [0, 1])
+        # Rows of files without the column are nulls
+        self.assertEqual(columns['note'].total_records, 4)
+        self.assertEqual(columns['note'].non_null_values, 1)
+        self.assertEqual(columns['id'].distinct_method, DistinctCountMethod.HYPERLOGLOG)
+        self.assertEqual(columns['id'].distinct_values, 4)
+
+    def test_shift_record_index_set(self):
+        indexes = RecordIndexSet.from_indexes([0, 1, 5])
+        self.assertEqual(indexes.shift(10).to_list(), [10, 11, 15])
+        self.assertEqual(indexes.to_list(), [0, 1, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from services.flat_file.flat_file_descriptor import ColumnDataType
+from services.flat_file.column_statistics import ColumnStatistics
+from services.flat_file.column_kernel import get_distinct_values, summarize_column, reservoir_sample
+
+
+class ColumnKernelTestCase(unittest.TestCase):
+
+    def test_distinct_values_match_drop_duplicates(self):
+        rng = np.random.default_rng(0)
+        for col_values in [
+            pd.Series(rng.integers(0, 50, 1000)),
+            pd.Series(np.where(rng.random(1000) < 0.2, np.nan, rng.integers(0, 50, 1000))),
+            pd.Series(rng.choice(['a', 'b', None, 'c'], 1000), index=np.arange(1000) + 500),
+            pd.Series([None, None], dtype=object)
+        ]:
+            non_null_values, distinct_values = get_distinct_values(col_values)
+            expected = col_values.dropna().drop_duplicates()
+            self.assertEqual(non_null_values, int(col_values.notnull().sum()))
+            self.assertEqual(distinct_values.index.tolist(), expected.index.tolist())
+            self.assertEqual(distinct_values.tolist(), expected.tolist())
+
+    def test_summarize_column(self):
+        summary = summarize_column(pd.Series([1.5, None, 2.25, 1.5, 10.0], name='amount'))
+        self.assertEqual(summary.column_name, 'amount')
+        self.assertEqual((summary.total_records, summary.non_null_values, summary.distinct_count), (5, 4, 3))
+        self.assertEqual(summary.data_type, ColumnDataType.NUMERIC)
+        self.assertEqual((summary.precision, summary.scale), (3, 2))
+        self.assertEqual(sorted(summary.sample_values), [1.5, 2.25, 10.0])
+
+        summary = summarize_column(pd.Series(['ab', 'abcd', 'ab']))
+        self.assertEqual(summary.data_type, ColumnDataType.STRING)
+        self.assertEqual(summary.max_length, 4)
+
+        summary = summarize_column(pd.Series([np.nan, np.nan]))
+        self.assertEqual(summary.data_type, ColumnDataType.UNKNOWN)
+        self.assertEqual(summary.sample_values, [])
+
+    def test_reservoir_sample(self):
+        slots, positions = reservoir_sample(3, 0, sample_size=5)
+        self.assertEqual(slots.tolist(), [0, 1, 2])
+        self.assertEqual(positions.tolist(), [0, 1, 2])
+
+        # Every candidate is equally likely to be sampled
+        rng = np.random.default_rng(0)
+        counts = np.zeros(20)
+        for _ in range(4000):
+            stats = ColumnStatistics('col')
+            stats.add_sample_values(list(range(8)), rng=rng)
+            stats.add_sample_values(list(range(8, 20)), rng=rng)
+            self.assertEqual(len(stats.sample_values), 5)
+            counts[stats.sample_values] += 1
+        self.assertTrue(np.allclose(counts / 4000, 5 / 20, atol=0.04))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import json
+import shutil
+import pathlib
+import tempfile
+import unittest
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_reader import FlatFileReader
+from services.flat_file import columnar_sidecar
+from services.flat_file.record_filter import parse_filter
+from common.utils.json_encoder import EnhancedJSONEncoder
+
+
+@unittest.skipUnless(columnar_sidecar.is_available(), 'pyarrow is not installed')
+class ColumnarSidecarTestCase(unittest.TestCase):
+
+    def setUp(self):
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'test_file_rwrwr.csv')
+        shutil.copy('{0}/test_files/test_file_rwrwr.csv'.format(curr_dir), self.file_path)
+        self.descriptor = FlatFile(self.file_path).get_file_descriptor()
+        self.csv_reader = FlatFileReader.from_descriptor(self.descriptor, chunk_size=100)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _get_sidecar_reader(self):
+        self.csv_reader.write_sidecar(self.descriptor)
+        descriptor = json.loads(json.dumps(self.descriptor, cls=EnhancedJSONEncoder))
+        return FlatFileReader.from_descriptor(descriptor, chunk_size=100)
+
+    def test_sidecar_is_recorded(self):
+        reader = self._get_sidecar_reader()
+        self.assertTrue(os.path.isfile(self.descriptor.sidecar_path))
+        self.assertEqual(self.descriptor.sidecar_format_version, columnar_sidecar.SIDECAR_FORMAT_VERSION)
+        self.assertTrue(reader.has_sidecar())
+
+    def test_sidecar_records_match_csv(self):
+        reader = self._get_sidecar_reader()
+        for offset, limit in [(0, None), (250, 120), (2990, 100)]:
+            self.assertEqual(
+                list(reader.iter_records(offset=offset, limit=limit)),
+                list(self.csv_reader.iter_records(offset=offset, limit=limit))
+            )
+
+    def test_sidecar_columns_and_filters_match_csv(self):
+        reader = self._get_sidecar_reader()
+        filters = [parse_filter('int_col:lt:5000', reader.column_types), parse_filter('comment:null', reader.column_types)]
+        rows = reader.find_rows(filters)
+        self.assertEqual(rows, self.csv_reader.find_rows(filters))
+        self.assertGreater(rows.count, 0)
+        columns = ['comment', 'int_col']
+        self.assertEqual(
+            list(reader.iter_records(rows=rows.page(limit=50), columns=columns)),
+            list(self.csv_reader.iter_records(rows=rows.page(limit=50), columns=columns))
+        )
+
+    def test_fallback_to_csv(self):
+        reader = self._get_sidecar_reader()
+        os.remove(self.descriptor.sidecar_path)
+        self.assertFalse(reader.has_sidecar())
+        records = list(reader.iter_records(offset=10, limit=5))
+        self.assertEqual([r['_record_index'] for r in records], [11, 12, 13, 14, 15])
+
+    def test_old_format_version_is_not_read(self):
+        self._get_sidecar_reader()
+        self.descriptor.sidecar_format_version = columnar_sidecar.SIDECAR_FORMAT_VERSION - 1
+        reader = FlatFileReader.from_descriptor(self.descriptor)
+        self.assertFalse(reader.has_sidecar())
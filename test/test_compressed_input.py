@@ -0,0 +1,121 @@
+import io
+import os
+import bz2
+import gzip
+import shutil
+import pathlib
+import tempfile
+import unittest
+import dataclasses
+
+import zstandard
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_reader import FlatFileReader
+from services.flat_file.flat_file_descriptor import DistinctCountMethod
+from services.flat_file.stream_profiler import StreamProfiler
+from services.flat_file.compression import FileCompression, detect_compression, open_csv
+from services.file_services.local_file_service import LocalFileService
+
+
+COMPRESSORS = {
+    FileCompression.GZIP: gzip.compress,
+    FileCompression.ZSTD: lambda data: zstandard.ZstdCompressor().compress(data),
+    FileCompression.BZIP2: bz2.compress
+}
+
+
+class CompressedInputTestCase(unittest.TestCase):
+
+    def setUp(self):
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        self.test_file_path = '{0}/test_files/test_file_rwrwr.csv'.format(curr_dir)
+        with open(self.test_file_path, 'rb') as test_file:
+            self.data = test_file.read()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, file_name, data):
+        file_path = os.path.join(self.tmp_dir, file_name)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        return file_path
+
+    def _column_dicts(self, file_descriptor):
+        columns = []
+        for column in file_descriptor.columns:
+            col = dataclasses.asdict(column)
+            col.pop('sample_values')
+            columns.append(col)
+        return columns
+
+    def test_compressed_matches_plain(self):
+        for kwargs in ({}, {'chunk_size': 700}):
+            plain = FlatFile(self.test_file_path, distinct_method=DistinctCountMethod.EXACT, **kwargs).get_file_descriptor()
+            for compression, compress in COMPRESSORS.items():
+                with self.subTest(compression=compression, **kwargs):
+                    # Detected by magic bytes whatever the file is named
+                    file_path = self._write('feed.csv', compress(self.data))
+                    file_descriptor = FlatFile(
+                        file_path, distinct_method=DistinctCountMethod.EXACT, **kwargs
+                    ).get_file_descriptor()
+
+                    self.assertEqual(file_descriptor.compression, compression)
+                    self.assertEqual(file_descriptor.file_size, os.path.getsize(file_path))
+                    self.assertEqual(file_descriptor.uncompressed_size, len(self.data))
+                    self.assertEqual(file_descriptor.total_records, plain.total_records)
+                    self.assertEqual(self._column_dicts(file_descriptor), self._column_dicts(plain))
+        self.assertIsNone(plain.compression)
+        self.assertEqual(plain.uncompressed_size, plain.file_size)
+
+    def test_concatenated_members_and_frames(self):
+        # Parallel compressors (pigz, zstd -T) write several members or frames
+        half = self.data.index(b'\n', len(self.data) // 2) + 1
+        for compression in (FileCompression.GZIP, FileCompression.ZSTD):
+            compress = COMPRESSORS[compression]
+            file_path = self._write('parts.csv', compress(self.data[:half]) + compress(self.data[half:]))
+            with open_csv(file_path) as source:
+                self.assertEqual(source.read(), self.data)
+            self.assertEqual(FlatFile(file_path).get_file_descriptor().uncompressed_size, len(self.data))
+
+    def test_file_names(self):
+        file_path = self._write('upload.csv', gzip.compress(self.data))
+        file_descriptor = FlatFile(file_path, original_file_name='orders.csv.gz').get_file_descriptor()
+        self.assertEqual(file_descriptor.file_name, 'orders.csv.gz')
+        self.assertEqual(file_descriptor.file_extension, '.csv.gz')
+        self.assertEqual(file_descriptor.file_display_name, 'orders')
+        self.assertIn('"test_schema"."orders"', file_descriptor.ddl)
+
+    def test_no_random_access(self):
+        file_path = self._write('feed.csv.gz', gzip.compress(self.data))
+        preview = FlatFile(file_path, preview=True).get_file_descriptor()
+        self.assertFalse(preview.is_approximate)
+        incremental = FlatFile(file_path, incremental=True).get_file_descriptor()
+        self.assertIsNone(incremental.profile_state_path)
+
+        reader = FlatFileReader.from_descriptor(incremental, chunk_size=100)
+        records = list(reader.iter_records(offset=2990, limit=20))
+        self.assertEqual(len(records), incremental.total_records - 2990)
+        self.assertEqual(records[0]['_record_index'], 2991)
+
+    def test_compressed_upload_stream(self):
+        compressed = zstandard.ZstdCompressor().compress(self.data)
+        file_path = os.path.join(self.tmp_dir, 'upload.csv')
+        profiler = StreamProfiler(file_path, chunk_size=500, distinct_method=DistinctCountMethod.EXACT)
+        LocalFileService(self.tmp_dir).save_file_stream(
+            io.BytesIO(compressed), file_path, block_size=4096, consumers=[profiler]
+        )
+        streamed = profiler.get_file_descriptor()
+        plain = FlatFile(self.test_file_path, chunk_size=500, distinct_method=DistinctCountMethod.EXACT).get_file_descriptor()
+
+        self.assertEqual(detect_compression(file_path), FileCompression.ZSTD)
+        self.assertEqual(streamed.compression, FileCompression.ZSTD)
+        self.assertEqual(streamed.file_size, len(compressed))
+        self.assertEqual(streamed.uncompressed_size, len(self.data))
+        self.assertEqual(self._column_dicts(streamed), self._column_dicts(plain))
+
+
+if __name__ == "__main__":
+    unittest.main()
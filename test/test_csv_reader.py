@@ -0,0 +1,94 @@
+import os
+import json
+import shutil
+import pathlib
+import tempfile
+import unittest
+
+import pandas as pd
+
+from common.utils.json_encoder import dumps
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.csv_reader import CsvEngine, CsvReaderOptions, read_csv, get_sample_dtypes
+
+REPEAT_TEST_FILE = 3
+SAMPLE_ROWS = 100 # Smaller than the test file so the reads are two phase
+
+
+class CsvReaderTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        test_file_path = '{0}/test_files/test_file_rwrwr.csv'.format(curr_dir)
+        with open(test_file_path) as test_file:
+            lines = test_file.read().splitlines()
+
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.file_path = os.path.join(cls.tmp_dir, 'repeated.csv')
+        with open(cls.file_path, 'w') as repeated_file:
+            repeated_file.write(lines[0] + '\n')
+            for _ in range(REPEAT_TEST_FILE):
+                repeated_file.write('\n'.join(lines[1:]) + '\n')
+        cls.columns = lines[0].split(',')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def _get_columns(self, csv_reader):
+        descriptor = json.loads(dumps(FlatFile(self.file_path, csv_reader=csv_reader).get_file_descriptor()))
+        for column in descriptor['columns']:
+            # Sampled from the data frame so may come back in a different order
+            column.pop('sample_values')
+        return descriptor['columns']
+
+    def test_engines_profile_the_same(self):
+        expected = self._get_columns(None)
+        for options in [
+            CsvReaderOptions(two_phase=True, sample_rows=SAMPLE_ROWS),
+            CsvReaderOptions(engine=CsvEngine.PYARROW, sample_rows=SAMPLE_ROWS),
+            CsvReaderOptions(engine=CsvEngine.PYARROW, arrow_strings=True, sample_rows=SAMPLE_ROWS),
+            CsvReaderOptions(arrow_strings=True)
+        ]:
+            with self.subTest(options=options):
+                self.assertEqual(self._get_columns(options), expected)
+
+    def test_usecols(self):
+        usecols = self.columns[1:3]
+        for engine in CsvEngine:
+            with self.subTest(engine=engine):
+                df = read_csv(self.file_path, CsvReaderOptions(engine=engine, usecols=usecols, sample_rows=SAMPLE_ROWS))
+                self.assertEqual(list(df.columns), usecols)
+
+    def test_two_phase_falls_back(self):
+        file_path = os.path.join(self.tmp_dir, 'late_text.csv')
+        with open(file_path, 'w') as late_file:
+            late_file.write('id,amount\n')
+            for i in range(SAMPLE_ROWS * 2):
+                late_file.write('{0},{1}\n'.format(i, 'n/a amount' if i == SAMPLE_ROWS + 10 else i * 2))
+
+        expected = pd.read_csv(file_path)
+        for engine in CsvEngine:
+            with self.subTest(engine=engine):
+                df = read_csv(file_path, CsvReaderOptions(engine=engine, two_phase=True, sample_rows=SAMPLE_ROWS))
+                pd.testing.assert_frame_equal(df, expected)
+
+    def test_get_sample_dtypes(self):
+        df = pd.DataFrame({
+            'int': [1, 2, 3],
+            'float': [1.5, None, 2.0],
+            'bool': [True, False, True],
+            'text': ['a', 'b', None],
+            'empty': [None, None, None],
+            'mixed': ['a', 1, None]
+        })
+        self.assertEqual(get_sample_dtypes(df), {'int': 'Int64', 'float': 'float64', 'bool': 'boolean', 'text': str})
+        self.assertEqual(
+            get_sample_dtypes(df, CsvEngine.PYARROW, arrow_strings=True),
+            {'int': 'Int64', 'float': 'float64', 'bool': str, 'text': 'string[pyarrow]'}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
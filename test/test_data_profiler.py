@@ -1,18 +1,32 @@
 import unittest
 import pathlib
 
+import pandas as pd
 
-from flat_file import FlatFile
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_descriptor import ColumnDataType
 
 
 class DataProfilerTestCase(unittest.TestCase):
     
     def test_flat_file_descriptor(self):
         curr_dir = pathlib.Path(__file__).parent.resolve()
-        test_file_path = '{0}/test_files/test_file.csv'.format(curr_dir)
+        test_file_path = '{0}/test_files/test_file_rwrwr.csv'.format(curr_dir)
+        df = pd.read_csv(test_file_path)
 
-        f = FlatFile(test_file_path)
-        print(f.json())
+        fd = FlatFile(test_file_path).get_file_descriptor()
+        self.assertEqual(fd.file_name, 'test_file_rwrwr.csv')
+        self.assertEqual(fd.total_records, len(df.index))
+        self.assertEqual([c.column_name for c in fd.columns], list(df.columns))
+        self.assertEqual([c.ordinal_position for c in fd.columns], list(range(len(df.columns))))
+
+        columns = {c.column_name: c for c in fd.columns}
+        self.assertEqual(columns['int_col'].original_type.data_type, ColumnDataType.INTEGER)
+        self.assertEqual(columns['int_col'].original_type.max_value, int(df['int_col'].max()))
+        self.assertEqual(columns['host'].original_type.data_type, ColumnDataType.STRING)
+        self.assertEqual(columns['host'].distinct_values, df['host'].nunique())
+        self.assertEqual(columns['date_only'].potential_type.data_type, ColumnDataType.DATE)
+        self.assertIn('CREATE TABLE', fd.ddl)
         
 
 
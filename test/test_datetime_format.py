@@ -0,0 +1,55 @@
+import unittest
+
+import pandas as pd
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.datetime_format import to_string_format, to_strftime_format, get_sample
+
+
+class DatetimeFormatTestCase(unittest.TestCase):
+
+    def test_string_format_round_trip(self):
+        self.assertEqual(to_string_format('%Y-%m-%d %H:%M:%S'), 'YYYY-MM-DD HH24:MI:SS')
+        self.assertEqual(to_strftime_format('YYYY-MM-DD HH24:MI:SS'), '%Y-%m-%d %H:%M:%S')
+        self.assertEqual(to_strftime_format('MM/DD/YY'), '%m/%d/%y')
+
+    def test_single_format_column(self):
+        df_col = pd.Series(['2020-01-{0:02d}'.format(i) for i in range(1, 29)] + ['abc', '2020-02-30'])
+        dt_type, parse_failures, string_format = FlatFile._string_datetime_type(df_col)
+        self.assertEqual(dt_type, 'DATE')
+        self.assertEqual(string_format, 'YYYY-MM-DD')
+        self.assertEqual(parse_failures.to_list(), [28, 29])
+
+    def test_datetime_column(self):
+        df_col = pd.Series(['2020-01-01 10:{0:02d}'.format(i) for i in range(60)])
+        dt_type, parse_failures, string_format = FlatFile._string_datetime_type(df_col)
+        self.assertEqual(dt_type, 'DATETIME')
+        self.assertEqual(string_format, 'YYYY-MM-DD HH24:MI')
+        self.assertEqual(parse_failures.count, 0)
+
+    def test_minority_format_missed_by_the_sample(self):
+        values = ['2020-01-{0:02d}'.format(i % 28 + 1) for i in range(3000)]
+        # Every 100th value has another format, none of them in the format sample
+        sampled = set(get_sample(pd.Series(range(3000))).tolist())
+        minority = [i for i in range(7, 3000, 100) if i not in sampled]
+        for i in minority:
+            values[i] = '01/{0:02d}/2020'.format(i % 28 + 1)
+        values[11] = '2020-02-30'
+        df_col = pd.Series(values)
+
+        results = {FlatFile._string_datetime_type(df_col)[1].to_list() == [11] for _ in range(3)}
+        self.assertEqual(results, {True})
+        potential_types, parse_failures, formats = FlatFile._get_datetime_parse_results(df_col)
+        self.assertEqual(potential_types, {'DATE'})
+        self.assertEqual(formats, {'%Y-%m-%d', '%m/%d/%Y'})
+
+    def test_not_a_datetime_column(self):
+        df_col = pd.Series(['groucho-oregon', '1032051418', '61.131.218.218'])
+        self.assertEqual(FlatFile._string_datetime_type(df_col), (None, None, None))
+
+    def test_overflowing_digits_are_not_dates(self):
+        self.assertEqual(FlatFile._try_parse_datetime('-317240738288'), (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
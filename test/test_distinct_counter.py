@@ -0,0 +1,33 @@
+import unittest
+
+import pandas as pd
+
+from services.flat_file.distinct_counter import HyperLogLog
+
+
+class HyperLogLogTestCase(unittest.TestCase):
+
+    def test_count_within_error_bound(self):
+        values = pd.Series(range(200000)).astype(str)
+        sketch = HyperLogLog().add_values(values)
+        error = abs(sketch.count() - len(values)) / len(values)
+        self.assertLess(error, 3 * sketch.standard_error)
+
+    def test_small_counts_are_exact(self):
+        sketch = HyperLogLog().add_values(pd.Series(['a', 'b', 'c', 'a']))
+        self.assertEqual(sketch.count(), 3)
+
+    def test_merge_matches_single_sketch(self):
+        values = pd.Series(range(50000)).astype(str)
+        single = HyperLogLog().add_values(values)
+        merged = HyperLogLog().add_values(values[:30000])
+        merged.merge(HyperLogLog().add_values(values[20000:]))
+        self.assertEqual(single.count(), merged.count())
+
+    def test_invalid_precision(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(precision=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
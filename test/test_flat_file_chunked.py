@@ -0,0 +1,54 @@
+import unittest
+import pathlib
+import dataclasses
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_descriptor import ColumnDataType
+from services.flat_file.column_statistics import ColumnStatistics, widen_data_type
+
+
+class FlatFileChunkedTestCase(unittest.TestCase):
+
+    def setUp(self):
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        self.test_file_path = '{0}/test_files/test_file_rwrwr.csv'.format(curr_dir)
+
+    def _column_dicts(self, file_descriptor):
+        columns = []
+        for column in file_descriptor.columns:
+            col = dataclasses.asdict(column)
+            # Samples are random, compare them as a set only when every value is sampled
+            sample_values = col.pop('sample_values')
+            if len(sample_values) < 5:
+                col['sample_values'] = sorted(map(str, sample_values))
+            columns.append(col)
+        return columns
+
+    def test_chunked_descriptor_matches_full_read(self):
+        full = FlatFile(self.test_file_path).get_file_descriptor()
+        for chunk_size in [250, 1000, 100000]:
+            chunked = FlatFile(self.test_file_path, chunk_size=chunk_size).get_file_descriptor()
+            self.assertEqual(full.total_records, chunked.total_records)
+            self.assertEqual(full.ddl, chunked.ddl)
+            self.assertEqual(self._column_dicts(full), self._column_dicts(chunked))
+
+    def test_widen_data_type(self):
+        self.assertEqual(widen_data_type(None, ColumnDataType.INTEGER), ColumnDataType.INTEGER)
+        self.assertEqual(widen_data_type(ColumnDataType.INTEGER, ColumnDataType.NUMERIC), ColumnDataType.NUMERIC)
+        self.assertEqual(widen_data_type(ColumnDataType.DATE, ColumnDataType.DATETIME), ColumnDataType.DATETIME)
+        self.assertEqual(widen_data_type(ColumnDataType.BOOLEAN, ColumnDataType.INTEGER), ColumnDataType.STRING)
+
+    def test_column_statistics_merge(self):
+        a = ColumnStatistics('col', total_records=10, non_null_values=8, max_length=3)
+        a.add_type_vote(ColumnDataType.INTEGER)
+        b = ColumnStatistics('col', total_records=5, non_null_values=5, max_length=7)
+        b.add_type_vote(ColumnDataType.NUMERIC)
+        a.merge(b)
+        self.assertEqual(a.total_records, 15)
+        self.assertEqual(a.non_null_values, 13)
+        self.assertEqual(a.max_length, 7)
+        self.assertEqual(a.data_type, ColumnDataType.NUMERIC)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,7 @@
 import unittest
-from unittest.mock import patch
 
 
-from flat_file_descriptor import FlatFileDescriptor
+from services.flat_file.flat_file_descriptor import FlatFileDescriptor, ColumnDescriptor
 
 
 class FlatFileDescriptorTestCase(unittest.TestCase):
@@ -10,7 +9,20 @@ class FlatFileDescriptorTestCase(unittest.TestCase):
     def test_flat_file_descriptor(self):
         test_path = '/some/path/to/filename.csv'
         fd = FlatFileDescriptor(test_path)
-        print(fd)
+        self.assertEqual(fd.file_name, 'filename.csv')
+        self.assertEqual(fd.file_extension, '.csv')
+        self.assertEqual(fd.file_display_name, 'filename')
+        self.assertIsNotNone(fd.unique_id)
+
+        fd = FlatFileDescriptor(test_path, original_file_name='Upload Name.txt')
+        self.assertEqual(fd.file_name, 'Upload Name.txt')
+        self.assertEqual(fd.file_display_name, 'Upload Name')
+
+    def test_add_column(self):
+        fd = FlatFileDescriptor('/some/path/to/filename.csv')
+        fd.add_column('a')
+        fd.add_column_descriptor(ColumnDescriptor('b'))
+        self.assertEqual([(c.column_name, c.ordinal_position) for c in fd.columns], [('a', 0), ('b', 1)])
 
 
 
@@ -0,0 +1,49 @@
+import unittest
+import pathlib
+import dataclasses
+
+from services.flat_file.flat_file import FlatFile
+
+
+class FlatFileParallelTestCase(unittest.TestCase):
+
+    def setUp(self):
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        self.test_file_path = '{0}/test_files/test_file_rwrwr.csv'.format(curr_dir)
+
+    def _column_dicts(self, file_descriptor):
+        columns = []
+        for column in file_descriptor.columns:
+            col = dataclasses.asdict(column)
+            # Samples are random, compare them only when every value is sampled
+            sample_values = col.pop('sample_values')
+            if len(sample_values) < 5:
+                col['sample_values'] = sorted(map(str, sample_values))
+            columns.append(col)
+        return columns
+
+    def test_parallel_descriptor_matches_serial(self):
+        serial = FlatFile(self.test_file_path).get_file_descriptor()
+        parallel = FlatFile(self.test_file_path, workers=3).get_file_descriptor()
+        self.assertEqual(serial.ddl, parallel.ddl)
+        self.assertEqual(self._column_dicts(serial), self._column_dicts(parallel))
+        self.assertEqual(
+            [c.ordinal_position for c in parallel.columns],
+            list(range(len(serial.columns)))
+        )
+
+    def test_parallel_chunked_descriptor_matches_serial(self):
+        serial = FlatFile(self.test_file_path, chunk_size=1000).get_file_descriptor()
+        parallel = FlatFile(self.test_file_path, chunk_size=1000, workers=3).get_file_descriptor()
+        self.assertEqual(serial.total_records, parallel.total_records)
+        self.assertEqual(serial.ddl, parallel.ddl)
+        self.assertEqual(self._column_dicts(serial), self._column_dicts(parallel))
+
+    def test_column_batches_keep_order(self):
+        batches = FlatFile._get_column_batches(list(range(10)), 2)
+        self.assertEqual(sum(batches, []), list(range(10)))
+        self.assertEqual(len(batches), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
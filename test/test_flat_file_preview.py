@@ -0,0 +1,67 @@
+import os
+import shutil
+import pathlib
+import tempfile
+import unittest
+
+import pandas as pd
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_descriptor import StatAccuracy, DistinctCountMethod
+from services.flat_file.distinct_counter import estimate_distinct_from_sample
+
+REPEAT_TEST_FILE = 12 # ~5MB, larger than the preview reads
+
+
+class FlatFilePreviewTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        cls.test_file_path = '{0}/test_files/test_file_rwrwr.csv'.format(curr_dir)
+        with open(cls.test_file_path) as test_file:
+            lines = test_file.read().splitlines()
+
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.file_path = os.path.join(cls.tmp_dir, 'large.csv')
+        with open(cls.file_path, 'w') as large_file:
+            large_file.write(lines[0] + '\n')
+            for _ in range(REPEAT_TEST_FILE):
+                large_file.write('\n'.join(lines[1:]) + '\n')
+        cls.total_records = (len(lines) - 1) * REPEAT_TEST_FILE
+        cls.preview = FlatFile(cls.file_path, preview=True).get_file_descriptor()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def test_preview_is_approximate(self):
+        self.assertTrue(self.preview.is_approximate)
+        self.assertLess(self.preview.sampled_records, self.total_records)
+        self.assertAlmostEqual(self.preview.total_records / self.total_records, 1.0, delta=0.1)
+        for column in self.preview.columns:
+            self.assertEqual(column.distinct_method, DistinctCountMethod.SAMPLE)
+            self.assertTrue(all(a == StatAccuracy.ESTIMATED for a in column.stat_accuracy.values()))
+            self.assertGreaterEqual(column.confidence, 0.0)
+            self.assertLessEqual(column.confidence, 1.0)
+
+    def test_preview_types_match_exact_profile(self):
+        exact = FlatFile(self.test_file_path).get_file_descriptor()
+        self.assertFalse(exact.is_approximate)
+        for preview_col, exact_col in zip(self.preview.columns, exact.columns):
+            self.assertEqual(preview_col.column_type_display, exact_col.column_type_display)
+            self.assertEqual(exact_col.confidence, 1.0)
+            self.assertEqual(exact_col.stat_accuracy['data_type'], StatAccuracy.EXACT)
+
+    def test_small_files_are_profiled_exactly(self):
+        descriptor = FlatFile(self.test_file_path, preview=True).get_file_descriptor()
+        self.assertFalse(descriptor.is_approximate)
+        self.assertIsNone(descriptor.sampled_records)
+
+    def test_estimate_distinct_from_sample(self):
+        # Every value seen more than once is counted once
+        self.assertEqual(estimate_distinct_from_sample(pd.Series([5, 3, 2]), 1000), 3)
+        # Values seen once are scaled by sqrt(total / sample)
+        self.assertEqual(estimate_distinct_from_sample(pd.Series([1] * 100), 10000), 1000)
+        self.assertEqual(estimate_distinct_from_sample(pd.Series([1] * 100), 100), 100)
+        self.assertEqual(estimate_distinct_from_sample(pd.Series([], dtype=int), 100), 0)
@@ -0,0 +1,124 @@
+import json
+import shutil
+import tempfile
+import unittest
+import pathlib
+from unittest import mock
+
+import pandas as pd
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file import flat_file_reader
+from services.flat_file.flat_file_reader import FlatFileReader, encode_cursor, decode_cursor
+from services.flat_file.record_index_set import RecordIndexSet
+from services.flat_file.row_index import build_row_index, write_row_index
+from services.flat_file.record_filter import parse_filter
+from common.utils.json_encoder import EnhancedJSONEncoder
+
+
+class FlatFileReaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        test_file_path = '{0}/test_files/test_file_rwrwr.csv'.format(curr_dir)
+        self.df = pd.read_csv(test_file_path)
+        descriptor = FlatFile(test_file_path).get_file_descriptor()
+        # Readers are built from descriptors as stored in the JsonDb
+        self.descriptor = json.loads(json.dumps(descriptor, cls=EnhancedJSONEncoder))
+        self.reader = FlatFileReader.from_descriptor(self.descriptor, chunk_size=100)
+
+    def test_page_of_records(self):
+        records = list(self.reader.iter_records(offset=250, limit=120))
+        self.assertEqual(len(records), 120)
+        self.assertEqual(records[0]['_record_index'], 251)
+        self.assertEqual(records[-1]['_record_index'], 370)
+
+    def test_types_are_consistent_across_pages(self):
+        for record in self.reader.iter_records(offset=0, limit=1000):
+            if record['srcport'] is not None:
+                self.assertIsInstance(record['srcport'], int)
+            if record['postalcode'] is not None:
+                self.assertIsInstance(record['postalcode'], str)
+
+    def test_last_page(self):
+        records = list(self.reader.iter_records(offset=2990, limit=100))
+        self.assertEqual(len(records), self.descriptor['total_records'] - 2990)
+
+    def test_ndjson(self):
+        lines = list(self.reader.iter_ndjson(offset=0, limit=3))
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[2])['_record_index'], 3)
+
+    def test_json(self):
+        records = json.loads(''.join(self.reader.iter_json(offset=10, limit=5)))
+        self.assertEqual([r['_record_index'] for r in records], [11, 12, 13, 14, 15])
+
+    def test_columns(self):
+        records = list(self.reader.iter_records(offset=5, limit=3, columns=['srcport', 'host']))
+        self.assertEqual(list(records[0].keys()), ['srcport', 'host', '_record_index'])
+        self.assertEqual(records[0]['host'], self.df['host'][5])
+
+    def test_find_rows(self):
+        column_types = self.reader.column_types
+        filters = [parse_filter('srcport:gte:1024', column_types), parse_filter('locale:notnull', column_types)]
+        expected = self.df.index[(self.df['srcport'] >= 1024) & self.df['locale'].notna()]
+        for reader in (self.reader, FlatFileReader.from_descriptor(self.descriptor, chunk_size=1000)):
+            self.assertEqual(reader.find_rows(filters).to_list(), expected.tolist())
+
+        # Text columns compare as text, nulls never match
+        rows = self.reader.find_rows([parse_filter('proto:eq:UDP', column_types)])
+        self.assertEqual(rows.to_list(), self.df.index[self.df['proto'] == 'UDP'].tolist())
+        records = list(self.reader.iter_records(rows=rows.page(limit=10), columns=['proto']))
+        self.assertEqual({r['proto'] for r in records}, {'UDP'})
+
+        # Only the rows of a set are checked, read in pages when rows can be read directly
+        candidates = RecordIndexSet.from_indexes(list(range(100, 900)) + list(range(1500, 2999, 3)))
+        expected_rows = [row for row in expected.tolist() if row in candidates]
+        self.assertEqual(self.reader.find_rows(filters, rows=candidates).to_list(), expected_rows)
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            file_path = shutil.copy(self.descriptor['local_file_path'], tmp_dir)
+            descriptor = FlatFile(file_path).get_file_descriptor()
+            write_row_index(descriptor, build_row_index(file_path, interval=100))
+            indexed = FlatFileReader.from_descriptor(descriptor, chunk_size=100)
+            with mock.patch.object(flat_file_reader, 'ROWS_PAGE_SIZE', 250):
+                self.assertEqual(indexed.find_rows(filters, rows=candidates).to_list(), expected_rows)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        with self.assertRaises(ValueError):
+            parse_filter('srcport:gte:many', column_types)
+        with self.assertRaises(ValueError):
+            parse_filter('missing:null', column_types)
+
+    def test_integers_past_float_precision(self):
+        values = [12345678901234567, None, 9007199254740993, 9007199254740992]
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            file_path = '{0}/big.csv'.format(tmp_dir)
+            with open(file_path, 'w') as csv_file:
+                csv_file.write('id,big\n')
+                for i, value in enumerate(values):
+                    csv_file.write('{0},{1}\n'.format(i, '' if value is None else value))
+            descriptor = FlatFile(file_path).get_file_descriptor()
+            reader = FlatFileReader.from_descriptor(descriptor)
+            self.assertEqual([r['big'] for r in reader.iter_records()], values)
+
+            filters = [parse_filter('big:eq:9007199254740993', reader.column_types)]
+            self.assertEqual(reader.find_rows(filters).to_list(), [2])
+
+            reader.write_sidecar(descriptor)
+            sidecar = FlatFileReader.from_descriptor(descriptor)
+            if sidecar.has_sidecar():
+                self.assertEqual([r['big'] for r in sidecar.iter_records()], values)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_cursor(self):
+        self.assertEqual(decode_cursor(encode_cursor(1234)), 1234)
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+import dataclasses
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_descriptor import ColumnDataType
+from services.flat_file.profile_metrics import ProfileStage
+
+
+class IncrementalProfileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'feed.csv')
+        with open(self.file_path, 'w') as feed:
+            feed.write('id,amount,opened,active,code\n')
+            for i in range(1000):
+                feed.write('{0},{1},2021-01-{2:02d},yes,{0}\n'.format(i, i * 2, i % 28 + 1))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _append(self, start, stop):
+        # Decimal amounts, times on the dates and text codes widen every type
+        with open(self.file_path, 'a') as feed:
+            for i in range(start, stop):
+                feed.write('{0},{0}.5,2021-02-{1:02d} 10:00:00,no,X{0}\n'.format(i, i % 28 + 1))
+
+    def _column_dicts(self, file_descriptor):
+        columns = []
+        for column in file_descriptor.columns:
+            col = dataclasses.asdict(column)
+            col.pop('sample_values')
+            columns.append(col)
+        return columns
+
+    def test_appended_rows_match_full_profile(self):
+        first = FlatFile(self.file_path, incremental=True, chunk_size=300).get_file_descriptor()
+        self.assertEqual(first.profiled_size, os.path.getsize(self.file_path))
+        self.assertTrue(os.path.isfile(first.profile_state_path))
+
+        self._append(1000, 1500)
+        second = FlatFile(self.file_path, previous_descriptor=first, chunk_size=300).get_file_descriptor()
+        full = FlatFile(self.file_path).get_file_descriptor()
+
+        self.assertEqual(second.unique_id, first.unique_id)
+        self.assertEqual(second.version, 2)
+        self.assertEqual(second.total_records, 1500)
+        self.assertEqual(second.profiled_size, os.path.getsize(self.file_path))
+        self.assertEqual(second.ddl, full.ddl)
+        self.assertEqual(self._column_dicts(second), self._column_dicts(full))
+        self.assertEqual(second.columns[1].original_type.data_type, ColumnDataType.NUMERIC)
+        self.assertEqual(second.columns[2].potential_type.data_type, ColumnDataType.DATETIME)
+        # Only the appended rows were parsed: two chunks and the end of the file
+        self.assertEqual(second.metrics.stages[ProfileStage.READ_CSV].calls, 3)
+
+        # Descriptors as stored in the JsonDb work as well
+        self._append(1500, 1600)
+        third = FlatFile(self.file_path, previous_descriptor=dataclasses.asdict(second)).get_file_descriptor()
+        self.assertEqual(third.version, 3)
+        self.assertEqual(third.total_records, 1600)
+
+    def test_rewritten_file_is_profiled_in_full(self):
+        first = FlatFile(self.file_path, incremental=True).get_file_descriptor()
+        with open(self.file_path, 'w') as feed:
+            feed.write('id,name\n1,a\n2,b\n3,c\n' * 5)
+        second = FlatFile(self.file_path, previous_descriptor=first).get_file_descriptor()
+
+        self.assertEqual(second.version, 2)
+        self.assertEqual([c.column_name for c in second.columns], ['id', 'name'])
+        self.assertEqual(second.profiled_size, os.path.getsize(self.file_path))
+
+    def test_previous_profile_without_state(self):
+        first = FlatFile(self.file_path).get_file_descriptor()
+        self.assertIsNone(first.profile_state_path)
+        self._append(1000, 1010)
+        second = FlatFile(self.file_path, previous_descriptor=first).get_file_descriptor()
+
+        self.assertEqual(second.total_records, 1010)
+        self.assertIsNotNone(second.profile_state_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
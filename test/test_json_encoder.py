@@ -0,0 +1,53 @@
+import json
+import unittest
+import dataclasses
+
+import numpy as np
+
+from common.utils.json_encoder import EnhancedJSONEncoder, dumps, get_serialization_plan
+from services.flat_file.record_index_set import RecordIndexSet
+from services.flat_file.flat_file_descriptor import ColumnDataType, FlatFileDescriptor
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int
+
+    @property
+    def total(self):
+        return self.x + self.y
+
+
+class JsonEncoderTestCase(unittest.TestCase):
+
+    def test_dataclass_properties(self):
+        self.assertEqual(json.loads(json.dumps(Point(1, 2), cls=EnhancedJSONEncoder)), {'x': 1, 'y': 2, 'total': 3})
+        self.assertEqual(get_serialization_plan(Point), (('x', 'y'), ('total',)))
+
+    def test_numpy_values(self):
+        value = {'i': np.int64(3), 'f': np.float32(0.5), 'b': np.bool_(True), 'a': np.arange(3)}
+        expected = {'i': 3, 'f': 0.5, 'b': True, 'a': [0, 1, 2]}
+        self.assertEqual(json.loads(json.dumps(value, cls=EnhancedJSONEncoder)), expected)
+        self.assertEqual(json.loads(dumps(value)), expected)
+
+    def test_descriptor(self):
+        descriptor = FlatFileDescriptor('/a/b.csv', total_records=3)
+        column = descriptor.add_column('col')
+        column.add_original_type(ColumnDataType.INTEGER).invalid_record_index = RecordIndexSet.from_indexes([1, 2])
+
+        value = json.loads(dumps(descriptor))
+        self.assertEqual(value, json.loads(json.dumps(descriptor, cls=EnhancedJSONEncoder)))
+        self.assertEqual(value['columns'][0]['column_type_display'], 'INTEGER')
+        invalid_record_index = RecordIndexSet.from_serializable(value['columns'][0]['original_type']['invalid_record_index'])
+        self.assertEqual(invalid_record_index.to_list(), [1, 2])
+
+    def test_compact(self):
+        self.assertEqual(dumps({'a': [1, 2]}), '{"a":[1,2]}')
+        self.assertEqual(json.loads(dumps({'a': [1, 2]}, compact=False)), {'a': [1, 2]})
+
+    def test_not_serializable(self):
+        with self.assertRaises(TypeError):
+            json.dumps(object(), cls=EnhancedJSONEncoder)
+        with self.assertRaises(TypeError):
+            dumps(object())
@@ -0,0 +1,59 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+
+from services.jsondb import JsonDb, get_db_path
+
+
+def _set_keys(json_file_path, worker, count):
+    db = JsonDb(json_file_path=json_file_path)
+    for i in range(count):
+        db.set_by_key('{0}-{1}'.format(worker, i), {'worker': worker, 'i': i})
+    db.close()
+
+
+class JsonDbTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.json_file_path = os.path.join(self.tmp_dir, 'jsondb.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_set_and_get(self):
+        db = JsonDb(json_file_path=self.json_file_path)
+        db.set_by_key('a', {'value': 1})
+        db.set_by_key('b', {'value': 2})
+        db.set_by_key('a', {'value': 3})
+        self.assertEqual(db.get_by_key('a'), {'value': 3})
+        self.assertEqual(db.get_all(), [{'value': 3}, {'value': 2}])
+        with self.assertRaises(AssertionError):
+            db.get_by_key('c')
+        # Another connection sees the committed writes
+        self.assertEqual(JsonDb(json_file_path=self.json_file_path).get_by_key('b'), {'value': 2})
+
+    def test_migrate_json_file(self):
+        with open(self.json_file_path, 'w') as json_file:
+            json.dump({'a': {'value': 1}, 'b': {'value': 2}}, json_file)
+
+        db = JsonDb(json_file_path=self.json_file_path)
+        self.assertEqual(db.get_all(), [{'value': 1}, {'value': 2}])
+        self.assertTrue(os.path.isfile(get_db_path(self.json_file_path)))
+
+        # The json file is only migrated once
+        db.set_by_key('a', {'value': 3})
+        self.assertEqual(JsonDb(json_file_path=self.json_file_path).get_by_key('a'), {'value': 3})
+
+    def test_concurrent_writers(self):
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_set_keys, args=(self.json_file_path, w, 50)) for w in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(len(JsonDb(json_file_path=self.json_file_path).get_all()), 200)
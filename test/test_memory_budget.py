@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_descriptor import DistinctCountMethod, StatAccuracy
+from services.flat_file.column_statistics import ColumnStatistics
+from services.flat_file.record_index_set import RecordIndexSet
+from services.flat_file.distinct_counter import HyperLogLog
+from services.flat_file.memory_budget import MemoryBudget, MIN_MEMORY_BUDGET, MIN_CHUNK_SIZE
+
+
+class MemoryBudgetTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'tokens.csv')
+        with open(self.file_path, 'w') as csv_file:
+            csv_file.write('id,token\n')
+            for i in range(5000):
+                csv_file.write('{0},token_{0:08d}\n'.format(i))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_budget_below_minimum(self):
+        with self.assertRaises(ValueError):
+            MemoryBudget(MIN_MEMORY_BUDGET - 1)
+
+    def test_small_file_fits(self):
+        budget = MemoryBudget(MIN_MEMORY_BUDGET)
+        self.assertTrue(budget.fits_in_memory(self.file_path))
+        self.assertEqual(budget.get_column_state_limit(4), MIN_MEMORY_BUDGET // 8)
+        self.assertGreaterEqual(budget.get_chunk_size(self.file_path), MIN_CHUNK_SIZE)
+
+    def test_distinct_set_over_limit_downgrades(self):
+        stats = ColumnStatistics('token', state_limit=10000)
+        stats.add_distinct_values(pd.Series(['token_{0}'.format(i) for i in range(50)], dtype=object))
+        self.assertIsNone(stats.distinct_sketch)
+
+        stats.add_distinct_values(pd.Series(['token_{0}'.format(i) for i in range(1000)], dtype=object))
+        self.assertIsNotNone(stats.distinct_sketch)
+        self.assertEqual(len(stats.distinct_set), 0)
+        self.assertEqual(stats.downgraded_stats, {'distinct_values', 'distinct_ratio'})
+        self.assertAlmostEqual(stats.distinct_count, 1000, delta=50)
+
+    def test_downgrade_keeps_the_hll_precision(self):
+        stats = ColumnStatistics('token', state_limit=10000, hll_precision=12)
+        stats.add_distinct_values(pd.Series(['token_{0}'.format(i) for i in range(1000)], dtype=object))
+        self.assertEqual(stats.distinct_sketch.precision, 12)
+        # Merges with a column that started with a sketch of the same precision
+        other = ColumnStatistics('token', distinct_sketch=HyperLogLog(12))
+        other.add_distinct_values(pd.Series(['token_{0}'.format(i) for i in range(500, 1500)], dtype=object))
+        self.assertAlmostEqual(other.merge(stats).distinct_count, 1500, delta=100)
+
+    def test_limit_set_on_kept_statistics(self):
+        # Statistics kept without a budget, ie. by a previous profile of an appended file
+        stats = ColumnStatistics('token')
+        stats.add_distinct_values(pd.Series(['token_{0}'.format(i) for i in range(1000)], dtype=object))
+        stats.set_state_limit(1000000)
+        self.assertIsNone(stats.distinct_sketch)
+        self.assertGreater(stats.distinct_set_size, 0)
+        stats.set_state_limit(10000)
+        self.assertIsNotNone(stats.distinct_sketch)
+        self.assertIn('distinct_values', stats.downgraded_stats)
+
+    def test_parse_failures_over_limit_truncate(self):
+        stats = ColumnStatistics('opened', state_limit=160)
+        stats.add_datetime_parse_failures(RecordIndexSet.from_indexes(range(0, 100, 2)))
+        self.assertEqual(stats.datetime_parse_failures.to_list(), list(range(0, 20, 2)))
+        self.assertIn('invalid_record_index', stats.downgraded_stats)
+
+    def test_profile_within_budget(self):
+        file_descriptor = FlatFile(
+            self.file_path, distinct_method=DistinctCountMethod.EXACT, memory_budget=MIN_MEMORY_BUDGET
+        ).get_file_descriptor()
+        self.assertEqual(file_descriptor.memory_budget, MIN_MEMORY_BUDGET)
+        for column in file_descriptor.columns:
+            self.assertEqual(column.downgraded_stats, [])
+            self.assertEqual(column.distinct_values, 5000)
+
+    def test_chunked_columns_over_budget(self):
+        # Shared with many columns the share of each is smaller than 5000 distinct tokens
+        _, columns, _, _ = FlatFile._get_column_batch_chunked(
+            self.file_path, 1000, None, DistinctCountMethod.EXACT, None,
+            memory_budget=MemoryBudget(MIN_MEMORY_BUDGET), column_count=1000
+        )
+        token = columns[1]
+        self.assertEqual(token.downgraded_stats, ['distinct_ratio', 'distinct_values'])
+        self.assertEqual(token.stat_accuracy['distinct_values'], StatAccuracy.ESTIMATED)
+        self.assertEqual(token.stat_accuracy['non_null_values'], StatAccuracy.EXACT)
+        self.assertAlmostEqual(token.distinct_values, 5000, delta=250)
+
+
+if __name__ == "__main__":
+    unittest.main()
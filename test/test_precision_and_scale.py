@@ -0,0 +1,42 @@
+import unittest
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from services.flat_file.flat_file import FlatFile
+
+
+def decimal_precision_and_scale(df_col):
+    """Reference implementation : one Decimal per value"""
+    decimal_tuple = df_col.map(lambda x: Decimal(str(x)).as_tuple())
+    max_precision = decimal_tuple.map(lambda x: len(x.digits)).max()
+    max_scale = decimal_tuple.map(lambda x: abs(x.exponent)).max()
+    return max_precision, max_scale
+
+
+class PrecisionAndScaleTestCase(unittest.TestCase):
+
+    CORPUS = [
+        [28.55, 115.9333, -122.9117, 51.0, 9.0],
+        [0.0, 0.5, 0.05, 100.0],
+        [1e-05, 2.5e-07, 3.0],
+        [1.5e+16, 123456789.123, -0.000123],
+        [6000.0, 1433.0, 65500.0],
+    ]
+
+    def test_matches_decimal_reference(self):
+        rng = np.random.default_rng(7)
+        corpus = [pd.Series(values) for values in self.CORPUS]
+        corpus.append(pd.Series(rng.normal(0, 1000, 5000)))
+        corpus.append(pd.Series(np.round(rng.uniform(-90, 90, 5000), 4)))
+        for df_col in corpus:
+            self.assertEqual(FlatFile._get_precision_and_scale(df_col), decimal_precision_and_scale(df_col))
+
+    def test_raw_text_values(self):
+        df_col = pd.Series(['28.5500', '-1.5', '007'])
+        self.assertEqual(FlatFile._get_precision_and_scale(df_col), (6, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
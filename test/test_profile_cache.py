@@ -0,0 +1,56 @@
+import unittest
+
+from services.profile_cache import ProfileCache, get_head_hash
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_descriptor import FlatFileDescriptor, ColumnDataType
+
+
+class ProfileCacheTestCase(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+        cache = ProfileCache()
+        descriptor = FlatFileDescriptor('/some/path/to/filename.csv', total_records=10)
+        self.assertIsNone(cache.get('abc'))
+        self.assertTrue(cache.set('abc', descriptor))
+        cached = cache.get('abc')
+        self.assertEqual(cached.total_records, 10)
+        self.assertIsNot(cached, descriptor)
+        self.assertEqual(cache.get_stats(), {'entries': 1, 'hits': 1, 'misses': 1, 'evictions': 0})
+
+    def test_least_recently_used_eviction(self):
+        cache = ProfileCache(max_entries=2)
+        for key in ['a', 'b']:
+            cache.set(key, FlatFileDescriptor('/{0}.csv'.format(key)))
+        cache.get('a')
+        cache.set('c', FlatFileDescriptor('/c.csv'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_entry_size_limit(self):
+        cache = ProfileCache(max_entry_size=10)
+        self.assertFalse(cache.set('a', FlatFileDescriptor('/a.csv')))
+        self.assertIsNone(cache.get('a'))
+
+    def test_head_hashes(self):
+        cache = ProfileCache(max_entries=1)
+        cache.set('a', FlatFileDescriptor('/a.csv'), head_hash=get_head_hash(b'id\n1\n'))
+        self.assertTrue(cache.may_contain(b'id\n1\n'))
+        # Leave with their entry
+        cache.set('b', FlatFileDescriptor('/b.csv'), head_hash=get_head_hash(b'id\n2\n'))
+        self.assertFalse(cache.may_contain(b'id\n1\n'))
+        self.assertTrue(cache.may_contain(b'id\n2\n'))
+
+    def test_copy_file_descriptor(self):
+        descriptor = FlatFileDescriptor('/a.csv', content_hash='abc', total_records=3)
+        descriptor.add_column('id').add_original_type(ColumnDataType.INTEGER)
+        copied = FlatFile.copy_file_descriptor(descriptor, '/b.csv', original_file_name='other.csv')
+        self.assertNotEqual(copied.unique_id, descriptor.unique_id)
+        self.assertEqual(copied.file_display_name, 'other')
+        self.assertEqual(copied.total_records, 3)
+        self.assertEqual(copied.content_hash, 'abc')
+        self.assertIn('"test_schema"."other"', copied.ddl)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import threading
+import unittest
+
+from services.profile_jobs import ProfileJobQueue, JobStatus
+
+
+class ProfileJobQueueTestCase(unittest.TestCase):
+
+    def test_job_done(self):
+        jobs = ProfileJobQueue(workers=1)
+
+        def run(job):
+            job.set_progress('profiling', 0.5)
+            return 'file-id'
+
+        job = jobs.submit(run, file_name='a.csv')
+        jobs.queue.join()
+        job = jobs.get(job.job_id)
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(job.progress, 1.0)
+        self.assertEqual(job.file_id, 'file-id')
+
+    def test_job_failed(self):
+        jobs = ProfileJobQueue(workers=1)
+
+        def run(job):
+            raise IOError('Unable to read file')
+
+        job = jobs.submit(run)
+        jobs.queue.join()
+        job = jobs.get(job.job_id)
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.error, 'Unable to read file')
+
+    def test_queue_is_bounded(self):
+        jobs = ProfileJobQueue(workers=1, max_queued=2)
+        started = threading.Event()
+        release = threading.Event()
+
+        def run(job):
+            started.set()
+            release.wait()
+
+        running = jobs.submit(run)
+        started.wait()
+        queued = [jobs.submit(run), jobs.submit(run)]
+        self.assertIsNone(jobs.submit(run))
+        self.assertEqual(jobs.get(running.job_id).status, JobStatus.RUNNING)
+        self.assertEqual(jobs.get_stats()['jobs']['queued'], 2)
+
+        release.set()
+        jobs.queue.join()
+        for job in [running] + queued:
+            self.assertEqual(jobs.get(job.job_id).status, JobStatus.DONE)
+
+    def test_finished_jobs_are_trimmed(self):
+        jobs = ProfileJobQueue(workers=1, max_finished=2)
+        submitted = [jobs.submit(lambda job: None) for _ in range(4)]
+        jobs.queue.join()
+        self.assertIsNone(jobs.get(submitted[0].job_id))
+        self.assertIsNotNone(jobs.get(submitted[-1].job_id))
@@ -0,0 +1,73 @@
+import json
+import pathlib
+import unittest
+import tracemalloc
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.profile_metrics import ProfileMetrics, ProfileStage, log_metrics
+
+
+class ProfileMetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        self.test_file_path = '{0}/test_files/test_file_rwrwr.csv'.format(curr_dir)
+
+    def test_measure(self):
+        metrics = ProfileMetrics()
+        for column_name in ['a', 'b', 'a']:
+            with metrics.measure(ProfileStage.COLUMN_SUMMARY, column_name):
+                sum(range(10000))
+        with metrics.measure(ProfileStage.DDL):
+            pass
+        metrics.finish()
+
+        self.assertEqual(metrics.stages['column_summary'].calls, 3)
+        self.assertEqual(metrics.columns['a']['column_summary'].calls, 2)
+        self.assertNotIn('ddl', metrics.columns['a'])
+        self.assertGreater(metrics.stages['column_summary'].wall_time, 0)
+        self.assertIsNone(metrics.stages['ddl'].peak_allocated)
+        self.assertGreaterEqual(metrics.wall_time, sum(s.wall_time for s in metrics.stages.values()))
+
+        other = ProfileMetrics()
+        with other.measure(ProfileStage.COLUMN_SUMMARY, 'c'):
+            pass
+        metrics.merge(other)
+        self.assertEqual(metrics.stages['column_summary'].calls, 4)
+        self.assertEqual(list(metrics.columns), ['a', 'b', 'c'])
+
+    def test_peak_allocated_while_tracing(self):
+        metrics = ProfileMetrics()
+        tracemalloc.start()
+        try:
+            with metrics.measure(ProfileStage.READ_CSV):
+                values = bytearray(1024 * 1024)
+        finally:
+            tracemalloc.stop()
+        self.assertGreaterEqual(metrics.stages['read_csv'].peak_allocated, len(values))
+
+    def test_descriptor_metrics(self):
+        for kwargs, stages in [
+            ({}, ['read_csv', 'column_summary', 'type_inference', 'ddl']),
+            ({'chunk_size': 1000}, ['read_csv', 'column_statistics', 'type_inference', 'datetime_recheck', 'ddl']),
+            ({'workers': 2}, ['read_csv', 'column_summary', 'type_inference', 'ddl'])
+        ]:
+            with self.subTest(kwargs=kwargs):
+                fd = FlatFile(self.test_file_path, **kwargs).get_file_descriptor()
+                self.assertEqual(sorted(fd.metrics.stages), sorted(stages))
+                self.assertEqual(list(fd.metrics.columns), [c.column_name for c in fd.columns])
+                self.assertGreater(fd.metrics.wall_time, 0)
+
+    def test_log_metrics(self):
+        metrics = FlatFile(self.test_file_path).get_file_descriptor().metrics
+        with self.assertLogs('services.flat_file.profile_metrics', level='INFO') as logs:
+            log_metrics(metrics, file_id='abc')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['event'], 'profile_metrics')
+        self.assertEqual(record['file_id'], 'abc')
+        self.assertEqual(len(record['slowest_columns']), 5)
+        self.assertIn('ddl', record['stages'])
+
+
+if __name__ == '__main__':
+    unittest.main()
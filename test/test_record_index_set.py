@@ -0,0 +1,71 @@
+import json
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from common.utils.json_encoder import dumps
+from services.flat_file.record_index_set import RecordIndexSet, ENCODING_RUNS, ENCODING_BITMAP
+
+
+class RecordIndexSetTestCase(unittest.TestCase):
+
+    def test_from_indexes(self):
+        index_set = RecordIndexSet.from_indexes([10, 3, 4, 5, 11, 20, 4])
+        self.assertEqual(index_set.count, 6)
+        self.assertEqual(index_set.to_list(), [3, 4, 5, 10, 11, 20])
+        self.assertEqual(index_set.starts.tolist(), [3, 10, 20])
+        self.assertIn(11, index_set)
+        self.assertNotIn(12, index_set)
+
+    def test_page(self):
+        indexes = np.flatnonzero(np.random.default_rng(1).random(10000) < 0.3)
+        index_set = RecordIndexSet.from_indexes(indexes)
+        self.assertEqual(index_set.page(100, 50), indexes[100:150].tolist())
+        self.assertEqual(index_set.page(len(indexes) - 3, 50), indexes[-3:].tolist())
+        self.assertEqual(index_set.page(len(indexes) + 1, 50), [])
+        with self.assertRaises(ValueError):
+            index_set.page(-1)
+
+    def test_update(self):
+        index_set = RecordIndexSet.from_indexes([1, 2, 3, 10])
+        index_set.update(RecordIndexSet.from_indexes([4, 5, 9, 20]))
+        self.assertEqual(index_set.to_list(), [1, 2, 3, 4, 5, 9, 10, 20])
+        self.assertEqual(index_set.starts.tolist(), [1, 9, 20])
+        self.assertEqual(index_set.add_indexes([0, 6]).starts.tolist(), [0, 9, 20])
+
+    def test_intersection(self):
+        rng = np.random.default_rng(2)
+        first = np.flatnonzero(rng.random(5000) < 0.6)
+        second = np.flatnonzero(rng.random(5000) < 0.4)
+        intersection = RecordIndexSet.from_indexes(first).intersection(RecordIndexSet.from_indexes(second))
+        self.assertEqual(intersection, RecordIndexSet.from_indexes(np.intersect1d(first, second)))
+        self.assertEqual(RecordIndexSet.from_indexes([1, 2]).intersection(RecordIndexSet()).count, 0)
+
+    def test_between(self):
+        indexes = np.flatnonzero(np.random.default_rng(3).random(5000) < 0.3)
+        index_set = RecordIndexSet.from_indexes(indexes)
+        for start, stop in [(0, 5000), (17, 18), (250, 1999), (4990, 9000), (6000, 7000)]:
+            expected = indexes[(indexes >= start) & (indexes < stop)]
+            self.assertEqual(index_set.between(start, stop).tolist(), expected.tolist())
+
+    def test_serialized_form(self):
+        runs = RecordIndexSet.from_indexes(list(range(1000, 5000)) + [9000])
+        value = json.loads(dumps(runs))
+        self.assertEqual(value, {'encoding': ENCODING_RUNS, 'count': 4001, 'runs': [1000, 4000, 4000, 1]})
+        self.assertEqual(RecordIndexSet.from_serializable(value), runs)
+
+        scattered = RecordIndexSet.from_indexes(np.arange(0, 100000, 3))
+        value = json.loads(dumps(scattered))
+        self.assertEqual(value['encoding'], ENCODING_BITMAP)
+        self.assertEqual(RecordIndexSet.from_serializable(value), scattered)
+
+        # Sparse sets over a wide span are written as runs without building the bitmap
+        sparse = RecordIndexSet.from_indexes([5, 60000000])
+        with mock.patch.object(RecordIndexSet, '_bitmap_form') as bitmap_form:
+            self.assertEqual(json.loads(dumps(sparse))['runs'], [5, 1, 59999994, 1])
+            bitmap_form.assert_not_called()
+
+        # Descriptors stored before the compact form hold plain lists
+        self.assertEqual(RecordIndexSet.from_serializable([5, 6]).to_list(), [5, 6])
+        self.assertEqual(RecordIndexSet.from_serializable(None).count, 0)
@@ -0,0 +1,138 @@
+import io
+import csv
+import gzip
+import json
+import shutil
+import pathlib
+import tempfile
+import unittest
+
+import zstandard
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_descriptor import ColumnDataType
+from services.datasources.redshift.redshift_column_converter import FlatFileToRedshiftConverter
+from services.datasources.redshift.redshift_copy_export import RedshiftCopyExport, CopyCompression, get_part_count
+
+
+class RedshiftCopyExportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        self.test_file_path = '{0}/test_files/test_file_rwrwr.csv'.format(curr_dir)
+        self.typed_file_path = '{0}/typed.csv'.format(self.tmp_dir)
+        with open(self.typed_file_path, 'w') as typed_file:
+            typed_file.write('id,opened,active,note\n')
+            typed_file.write('1,03/01/2021,yes,plain\n')
+            typed_file.write('2,04/01/2021,no,"has | pipe"\n')
+            typed_file.write('3,,yes,\n')
+            typed_file.write('4,05/01/2021,no,"quoted ""text"""\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @staticmethod
+    def _read_part(part):
+        with open(part.path, 'rb') as part_file:
+            data = part_file.read()
+        if part.path.endswith('.zst'):
+            data = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read()
+        else:
+            data = gzip.decompress(data)
+        return list(csv.reader(io.StringIO(data.decode('utf-8')), delimiter='|', quotechar='"'))
+
+    def test_part_count(self):
+        mb = 1024 * 1024
+        self.assertEqual(get_part_count(100 * mb, 10 ** 6, slices=4), 4)
+        self.assertEqual(get_part_count(2000 * mb, 10 ** 7, slices=4), 8)
+        self.assertEqual(get_part_count(2 * mb, 10 ** 4, slices=4), 2)
+        self.assertEqual(get_part_count(mb // 2, 10, slices=4), 1)
+        self.assertEqual(get_part_count(100 * mb, 3, slices=4), 3)
+
+    def test_compressed_files_are_split_on_their_csv_size(self):
+        gzip_path = '{0}/feed.csv.gz'.format(self.tmp_dir)
+        with open(self.test_file_path, 'rb') as test_file, open(gzip_path, 'wb') as gzip_file:
+            gzip_file.write(gzip.compress(test_file.read()))
+        descriptor = FlatFile(gzip_path).get_file_descriptor()
+        self.assertLess(descriptor.file_size * 2, descriptor.uncompressed_size)
+
+        export = RedshiftCopyExport(
+            descriptor, self.tmp_dir + '/out', slices=2, min_part_size=1024,
+            max_part_size=descriptor.uncompressed_size // 3
+        )
+        self.assertEqual(export.part_count, 4)
+        # Descriptors stored before compressed input was read have no uncompressed_size
+        export = RedshiftCopyExport(
+            {'local_file_path': gzip_path, 'file_size': descriptor.uncompressed_size, 'total_records': 100, 'columns': []},
+            self.tmp_dir + '/out', slices=2, min_part_size=1024, max_part_size=descriptor.uncompressed_size // 3
+        )
+        self.assertEqual(export.part_count, 4)
+
+    def test_parts_and_manifest(self):
+        descriptor = FlatFile(self.test_file_path).get_file_descriptor()
+        export = RedshiftCopyExport(
+            descriptor, self.tmp_dir + '/out', slices=2, workers=2,
+            min_part_size=1024, max_part_size=descriptor.file_size // 3,
+            url_prefix='s3://bucket/export/'
+        )
+        result = export.export()
+
+        self.assertEqual(len(result.parts) % 2, 0)
+        rows = [row for part in result.parts for row in self._read_part(part)]
+        self.assertEqual(len(rows), descriptor.total_records)
+        self.assertEqual(sum(part.records for part in result.parts), descriptor.total_records)
+        self.assertTrue(all(len(row) == len(descriptor.columns) for row in rows))
+
+        with open(result.manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(
+            [entry['url'] for entry in manifest['entries']],
+            ['s3://bucket/export/' + pathlib.Path(part.path).name for part in result.parts]
+        )
+        self.assertEqual(manifest['entries'][0]['meta']['content_length'], result.parts[0].content_length)
+
+        table = FlatFileToRedshiftConverter.redshift_table_from_flatfile('staging', 'rwrwr', descriptor.columns)
+        copy = export.get_copy_statement(table, 'arn:aws:iam::0:role/copy')
+        self.assertIn('COPY "staging"."rwrwr"', copy)
+        self.assertIn("from 's3://bucket/export/manifest'", copy)
+        self.assertIn('GZIP', copy)
+        self.assertIn('manifest', copy)
+
+    def test_types_are_normalized(self):
+        descriptor = FlatFile(self.typed_file_path).get_file_descriptor()
+        result = RedshiftCopyExport(descriptor, self.tmp_dir + '/out', compression=CopyCompression.ZSTD, workers=1).export()
+
+        self.assertEqual(len(result.parts), 1)
+        self.assertTrue(result.parts[0].path.endswith('.zst'))
+        rows = self._read_part(result.parts[0])
+        self.assertEqual([row[1] for row in rows], ['2021-03-01', '2021-04-01', '', '2021-05-01'])
+        self.assertEqual([row[2] for row in rows], ['t', 'f', 't', 'f'])
+        self.assertEqual(rows[1][3], 'has | pipe')
+        self.assertEqual(rows[3][3], 'quoted "text"')
+        self.assertEqual(result.null_values, {})
+
+    def test_numbers_are_written_verbatim(self):
+        numbers_path = '{0}/numbers.csv'.format(self.tmp_dir)
+        lines = [
+            'big,amount,count',
+            '12345678901234567,123456789012345678.12,1',
+            ',0.10,20',
+            '9007199254740993,1.5e3,',
+            '-42,-0.000,007'
+        ]
+        with open(numbers_path, 'w') as numbers_file:
+            numbers_file.write('\n'.join(lines) + '\n')
+        descriptor = FlatFile(numbers_path).get_file_descriptor()
+        self.assertEqual(
+            [column.original_type.data_type for column in descriptor.columns],
+            [ColumnDataType.INTEGER, ColumnDataType.NUMERIC, ColumnDataType.INTEGER]
+        )
+
+        result = RedshiftCopyExport(descriptor, self.tmp_dir + '/out', workers=1).export()
+        rows = self._read_part(result.parts[0])
+        self.assertEqual(rows, [line.split(',') for line in lines[1:]])
+
+
+if __name__ == "__main__":
+    unittest.main()
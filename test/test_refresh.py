@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask, make_response
+from flask_restful import Api
+
+import services.jsondb as jsondb
+from app.resources import FlatFileRefresh
+from common.utils.json_encoder import dumps
+from services.jsondb import JsonDb
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_reader import FlatFileReader
+from services.flat_file import columnar_sidecar
+from services.profile_jobs import ProfileJobQueue, JobStatus
+
+
+class RefreshTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'feed.csv')
+        with open(self.file_path, 'w') as feed:
+            feed.write('id,code\n')
+            self._write_rows(feed, 0, 1000)
+        self.patch = mock.patch.object(jsondb, 'LOCAL_FILE_DIRECTORY', os.path.join(self.tmp_dir, 'jsondb.json'))
+        self.patch.start()
+
+        descriptor = FlatFile(self.file_path, incremental=True).get_file_descriptor()
+        FlatFileReader.from_descriptor(descriptor).write_sidecar(descriptor)
+        self.file_id = descriptor.unique_id
+        JsonDb().set_by_key(self.file_id, descriptor)
+
+        app = Flask(__name__)
+        app.config['PROFILE_MEMORY_BUDGET'] = 64 * 1024 * 1024
+        app.extensions['profile_jobs'] = self.profile_jobs = ProfileJobQueue(workers=1)
+        api = Api(app)
+        # Descriptors are returned as they are by app.output_json
+        api.representation('application/json')(lambda data, code, headers=None: make_response(dumps(data), code))
+        api.add_resource(FlatFileRefresh.FlatFileRefreshResource, '/flatfile/<string:file_id>/refresh')
+        self.client = app.test_client()
+
+    def tearDown(self):
+        self.patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_rows(self, feed, start, stop):
+        for i in range(start, stop):
+            feed.write('{0},X{0}\n'.format(i))
+
+    def _append(self, start, stop):
+        with open(self.file_path, 'a') as feed:
+            self._write_rows(feed, start, stop)
+
+    def _assert_refreshed(self, total_records, version):
+        descriptor = JsonDb().get_by_key(self.file_id)
+        self.assertEqual(descriptor['total_records'], total_records)
+        self.assertEqual(descriptor['version'], version)
+        self.assertEqual(descriptor['memory_budget'], 64 * 1024 * 1024)
+
+        # Rows are read from a sidecar holding the appended rows, never the previous version's
+        reader = FlatFileReader.from_descriptor(descriptor)
+        self.assertEqual(reader.has_sidecar(), columnar_sidecar.is_available())
+        records = list(reader.iter_records())
+        self.assertEqual(records[-1]['_record_index'], total_records)
+        scanned = FlatFileReader.from_descriptor(dict(descriptor, sidecar_path=None))
+        self.assertEqual(records, list(scanned.iter_records()))
+        return descriptor
+
+    def test_refresh_replaces_the_sidecar(self):
+        self._append(1000, 1200)
+        response = self.client.post('/flatfile/{0}/refresh'.format(self.file_id))
+        self.assertEqual(response.status_code, 200)
+        descriptor = self._assert_refreshed(1200, 2)
+        records = list(FlatFileReader.from_descriptor(descriptor).iter_records(offset=1198))
+        self.assertEqual([record['id'] for record in records], [1198, 1199])
+
+    def test_sidecar_is_extended_with_the_appended_rows(self):
+        self._append(1000, 1200)
+        with mock.patch.object(FlatFileReader, 'write_sidecar', wraps=FlatFileReader.write_sidecar) as write_sidecar:
+            self.client.post('/flatfile/{0}/refresh'.format(self.file_id))
+            self._append(1200, 1201)
+            self.client.post('/flatfile/{0}/refresh'.format(self.file_id))
+        if columnar_sidecar.is_available():
+            # Only the appended rows were parsed, the csv was never read whole
+            write_sidecar.assert_not_called()
+        self._assert_refreshed(1201, 3)
+
+    def test_sidecar_is_rewritten_when_a_type_widens(self):
+        with open(self.file_path, 'a') as feed:
+            feed.write('1000.5,X1000\n')
+        self.client.post('/flatfile/{0}/refresh'.format(self.file_id))
+        descriptor = self._assert_refreshed(1001, 2)
+        records = list(FlatFileReader.from_descriptor(descriptor).iter_records(offset=999))
+        self.assertEqual([record['id'] for record in records], [999.0, 1000.5])
+
+    def test_shared_sidecar_is_kept(self):
+        # Uploads with the same content share the sidecar of the cached profile
+        cached = FlatFileReader.from_descriptor(JsonDb().get_by_key(self.file_id))
+        copy_path = shutil.copy(self.file_path, os.path.join(self.tmp_dir, 'copy.csv'))
+        descriptor = FlatFile.copy_file_descriptor(FlatFile(self.file_path).get_file_descriptor(), copy_path)
+        descriptor.sidecar_path = cached.sidecar_path
+        descriptor.sidecar_format_version = cached.sidecar_format_version
+        JsonDb().set_by_key(descriptor.unique_id, descriptor)
+
+        self.file_id, self.file_path = descriptor.unique_id, copy_path
+        self._append(1000, 1010)
+        self.client.post('/flatfile/{0}/refresh'.format(self.file_id))
+        refreshed = self._assert_refreshed(1010, 2)
+        if cached.sidecar_path is not None:
+            self.assertTrue(os.path.isfile(cached.sidecar_path))
+            self.assertNotEqual(refreshed['sidecar_path'], cached.sidecar_path)
+            self.assertEqual(len(list(cached.iter_records())), 1000)
+
+    def test_async_refresh(self):
+        self._append(1000, 1100)
+        response = self.client.post('/flatfile/{0}/refresh?async=true'.format(self.file_id))
+        self.assertEqual(response.status_code, 202)
+        self.profile_jobs.queue.join()
+        job = self.profile_jobs.get(response.get_json()['job_id'])
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(job.file_id, self.file_id)
+        self._assert_refreshed(1100, 2)
+
+    def test_unknown_file(self):
+        response = self.client.post('/flatfile/missing/refresh')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()['error'], 'FILE_NOT_FOUND')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import io
+import os
+import gzip
+import random
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_reader import FlatFileReader
+from services.flat_file.row_index import (
+    RowIndexBuilder,
+    build_row_index,
+    write_row_index,
+    read_row_index,
+    ROW_INDEX_FORMAT_VERSION
+)
+
+
+class RowIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'quoted.csv')
+        with open(self.file_path, 'wb') as csv_file:
+            csv_file.write(self._csv(0, 3000))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _csv(self, start, stop, header=True, line_break='\n'):
+        # Quoted commas, quoted line breaks, escaped quotes and blank lines all
+        # make row numbers differ from line numbers
+        rng = random.Random(start)
+        lines = ['id,text,amount'] if header else []
+        for i in range(start, stop):
+            text = rng.choice(['plain', '"a, b"', '"two\nlines"', '"say ""hi""\nthen"', ''])
+            lines.append('{0},{1},{2}'.format(i, text, i * 2))
+            if rng.random() < 0.05:
+                lines.append('')
+        return (line_break.join(lines) + line_break).encode('utf-8')
+
+    def _first_id(self, data, row_index, row):
+        offset, skip = row_index.locate(row)
+        df = pd.read_csv(io.BytesIO(data[offset:]), header=None, names=['id', 'text', 'amount'], nrows=skip + 1)
+        return int(df.iloc[skip]['id'])
+
+    def test_offsets_of_rows(self):
+        for line_break in ('\n', '\r\n'):
+            data = self._csv(0, 3000, line_break=line_break)
+            for block_size in (7, 4096):
+                with self.subTest(line_break=line_break, block_size=block_size):
+                    builder = RowIndexBuilder(interval=100)
+                    for start in range(0, len(data), block_size):
+                        builder.write(data[start:start + block_size])
+                    row_index = builder.get_row_index()
+                    self.assertEqual(row_index.total_records, 3000)
+                    # The last offset is the end of the file, where a row appended would start
+                    self.assertEqual(len(row_index.offsets), 31)
+                    self.assertEqual(row_index.offsets[-1], len(data))
+                    for row in (0, 99, 100, 101, 1234, 2999):
+                        self.assertEqual(self._first_id(data, row_index, row), row)
+
+    def test_appended_rows_carry_on(self):
+        first = build_row_index(self.file_path, interval=100)
+        with open(self.file_path, 'ab') as csv_file:
+            csv_file.write(self._csv(3000, 3250, header=False))
+        appended = build_row_index(self.file_path, previous=first, interval=100)
+        rebuilt = build_row_index(self.file_path, interval=100)
+
+        self.assertEqual(appended.total_records, 3250)
+        self.assertEqual(appended.offsets.tolist(), rebuilt.offsets.tolist())
+        self.assertEqual(appended.size, os.path.getsize(self.file_path))
+
+        # A rewritten file is scanned again
+        with open(self.file_path, 'wb') as csv_file:
+            csv_file.write(self._csv(0, 50))
+        self.assertEqual(build_row_index(self.file_path, previous=appended, interval=100).total_records, 50)
+
+    def test_compressed_files_have_no_index(self):
+        file_path = os.path.join(self.tmp_dir, 'quoted.csv.gz')
+        with open(file_path, 'wb') as csv_file:
+            csv_file.write(gzip.compress(self._csv(0, 10)))
+        self.assertIsNone(build_row_index(file_path))
+
+    def test_reader_seeks_to_rows(self):
+        file_descriptor = FlatFile(self.file_path).get_file_descriptor()
+        scanned = FlatFileReader.from_descriptor(file_descriptor, chunk_size=250)
+        write_row_index(file_descriptor, build_row_index(self.file_path, interval=100))
+        self.assertEqual(file_descriptor.row_index_format_version, ROW_INDEX_FORMAT_VERSION)
+        self.assertEqual(read_row_index(file_descriptor.row_index_path).total_records, 3000)
+        indexed = FlatFileReader.from_descriptor(file_descriptor, chunk_size=250)
+
+        for offset, limit in ((0, 5), (99, 3), (1000, 600), (2990, 50)):
+            records = list(indexed.iter_records(offset=offset, limit=limit))
+            self.assertEqual(records, list(scanned.iter_records(offset=offset, limit=limit)))
+            self.assertEqual(records[0]['id'], offset)
+            self.assertEqual(records[0]['_record_index'], offset + 1)
+
+        rows = [0, 5, 99, 100, 101, 2345, 2999, 5000]
+        records = list(indexed.iter_records(rows=rows))
+        self.assertEqual([record['id'] for record in records], rows[:-1])
+        self.assertEqual([record['_record_index'] for record in records], [row + 1 for row in rows[:-1]])
+        self.assertEqual(records, list(scanned.iter_records(rows=rows)))
+
+        # Rows are taken from the columnar sidecar when there is one
+        indexed.write_sidecar(file_descriptor)
+        sidecar = FlatFileReader.from_descriptor(file_descriptor)
+        if sidecar.has_sidecar():
+            sidecar_records = list(sidecar.iter_records(rows=rows))
+            self.assertEqual([record['_record_index'] for record in sidecar_records], [row + 1 for row in rows[:-1]])
+            self.assertEqual([record['text'] for record in sidecar_records], [record['text'] for record in records])
+
+    def test_indexed_rows_match_scanned_rows(self):
+        file_descriptor = FlatFile(self.file_path).get_file_descriptor()
+        scanned = FlatFileReader.from_descriptor(file_descriptor, chunk_size=170)
+        write_row_index(file_descriptor, build_row_index(self.file_path, interval=100))
+        # Rows appended since the index are read from its last interval
+        with open(self.file_path, 'ab') as csv_file:
+            csv_file.write(self._csv(3000, 3150, header=False))
+        indexed = FlatFileReader.from_descriptor(file_descriptor, chunk_size=170)
+
+        rng = random.Random(3)
+        row_sets = [
+            sorted(rng.sample(range(3150), 40)),
+            list(range(95, 420)) + list(range(1999, 2001)) + [3120],
+            list(range(0, 3150, 7))
+        ]
+        for rows in row_sets:
+            records = list(indexed.iter_records(rows=rows, columns=['text', 'id']))
+            self.assertEqual([record['id'] for record in records], rows)
+            self.assertEqual(records, list(scanned.iter_records(rows=rows, columns=['text', 'id'])))
+
+
+if __name__ == "__main__":
+    unittest.main()
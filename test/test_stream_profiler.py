@@ -0,0 +1,59 @@
+import io
+import os
+import shutil
+import pathlib
+import tempfile
+import unittest
+
+from services.flat_file.flat_file import FlatFile
+from services.flat_file.flat_file_descriptor import DistinctCountMethod
+from services.flat_file.stream_profiler import StreamProfiler
+from services.file_services.local_file_service import LocalFileService
+
+
+class _FailingStream(io.BytesIO):
+
+    def read(self, size=-1):
+        if self.tell() > 0:
+            raise IOError('Connection reset')
+        return super().read(size)
+
+
+class StreamProfilerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        with open('{0}/test_files/test_file_rwrwr.csv'.format(curr_dir), 'rb') as test_file:
+            self.data = test_file.read()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fs = LocalFileService(self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_profile_while_saving(self):
+        file_path = os.path.join(self.tmp_dir, 'stream.csv')
+        profiler = StreamProfiler(file_path, expected_size=len(self.data), chunk_size=500, max_buffered_blocks=2)
+        self.fs.save_file_stream(io.BytesIO(self.data), file_path, block_size=4096, consumers=[profiler])
+        streamed = profiler.get_file_descriptor()
+
+        expected = FlatFile(file_path, chunk_size=500, distinct_method=DistinctCountMethod.EXACT).get_file_descriptor()
+        self.assertEqual(streamed.total_records, expected.total_records)
+        self.assertEqual(streamed.file_size, len(self.data))
+        self.assertEqual(streamed.ddl, expected.ddl)
+        for streamed_col, expected_col in zip(streamed.columns, expected.columns):
+            # Samples are random
+            streamed_col.sample_values = expected_col.sample_values = None
+            self.assertEqual(streamed_col, expected_col)
+
+    def test_distinct_method_from_expected_size(self):
+        self.assertEqual(StreamProfiler._get_distinct_method(1024), DistinctCountMethod.EXACT)
+        self.assertEqual(StreamProfiler._get_distinct_method(None), DistinctCountMethod.HYPERLOGLOG)
+
+    def test_failed_upload(self):
+        file_path = os.path.join(self.tmp_dir, 'failed.csv')
+        profiler = StreamProfiler(file_path)
+        with self.assertRaises(IOError):
+            self.fs.save_file_stream(_FailingStream(self.data), file_path, block_size=4096, consumers=[profiler])
+        with self.assertRaises(IOError):
+            profiler.get_file_descriptor()
@@ -0,0 +1,71 @@
+import io
+import shutil
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask
+from flask_restful import Api
+
+import services.jsondb as jsondb
+import services.flat_file.stream_profiler as stream_profiler
+from app.resources import FlatFileUpload
+from services.flat_file.flat_file import FlatFile
+from services.profile_cache import ProfileCache
+from services.profile_jobs import ProfileJobQueue
+
+
+class UploadCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        curr_dir = pathlib.Path(__file__).parent.resolve()
+        with open('{0}/test_files/test_file_rwrwr.csv'.format(curr_dir), 'rb') as test_file:
+            # Rows can only be appended after a line break
+            self.data = test_file.read().rstrip(b'\n') + b'\n'
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patches = [
+            mock.patch.object(FlatFileUpload, 'LOCAL_FILE_DIRECTORY', self.tmp_dir),
+            mock.patch.object(jsondb, 'LOCAL_FILE_DIRECTORY', '{0}/jsondb.json'.format(self.tmp_dir))
+        ]
+        for patch in self.patches:
+            patch.start()
+
+        app = Flask(__name__)
+        app.config['PROFILE_MEMORY_BUDGET'] = None
+        app.extensions['profile_cache'] = self.profile_cache = ProfileCache()
+        app.extensions['profile_jobs'] = ProfileJobQueue(workers=1)
+        Api(app).add_resource(FlatFileUpload.FlatFileUploadResource, '/flatfile')
+        self.client = app.test_client()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _upload(self, data):
+        response = self.client.post(
+            '/flatfile', data={'file': (io.BytesIO(data), 'upload.csv')}, content_type='multipart/form-data'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_repeat_upload_is_not_profiled(self):
+        self._upload(self.data)
+        self.assertEqual(self.profile_cache.get_stats()['entries'], 1)
+
+        with mock.patch.object(stream_profiler, 'FlatFile', wraps=FlatFile) as streamed, \
+                mock.patch.object(FlatFileUpload, 'FlatFile', wraps=FlatFile) as saved:
+            self._upload(self.data)
+            streamed.assert_not_called()
+            saved.assert_not_called()
+            self.assertEqual(self.profile_cache.get_stats()['hits'], 1)
+
+            # Same start, other content: profiled once saved since the stream was skipped
+            self._upload(self.data + self.data[self.data.index(b'\n') + 1:])
+            streamed.assert_not_called()
+            self.assertEqual(saved.call_count, 1)
+        self.assertEqual(self.profile_cache.get_stats()['entries'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()